@@ -0,0 +1,121 @@
+"""Admission control for expensive routes.
+
+Sync routes run on a shared thread pool; a burst of analytics requests could take every
+thread and starve CRUD routes. Each limited route group admits at most `limit` requests at
+once and queues up to `queue` more for at most `wait_seconds`. Requests beyond that get an
+immediate 503 with `Retry-After`. Admission happens in an async dependency, so queued requests
+wait on the event loop without holding a pool thread. Limits come from
+`Settings.admission_limits`; a group absent from it is not limited.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Callable
+
+from fastapi import HTTPException, status
+
+from app.core.config import get_settings
+
+
+class ConcurrencyLimiter:
+    """At most `limit` holders at once, first come first served; used from the event loop only."""
+
+    def __init__(self, limit: int, queue: int, wait_seconds: float) -> None:
+        self.limit = limit
+        self.queue = queue
+        self.wait_seconds = wait_seconds
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting in the queue if needed; False when the request must be shed."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.queue:
+            self.rejected += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.wait_seconds)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            self.rejected += 1
+            return False
+        except BaseException:
+            self._discard(waiter)
+            # the slot may have been handed over just before the request was cancelled
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        # the slot goes straight to the oldest waiter, so `active` stays unchanged
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+_limiters: dict[str, ConcurrencyLimiter] = {}
+
+
+def limiters() -> dict[str, ConcurrencyLimiter]:
+    """Limiters of the route groups served so far, by group."""
+    return dict(_limiters)
+
+
+def get_limiter(group: str) -> ConcurrencyLimiter | None:
+    """The limiter of a route group, built from the settings on first use."""
+    limiter = _limiters.get(group)
+    if limiter is None:
+        settings = get_settings()
+        limit = settings.admission_limits.get(group)
+        if limit is None:
+            return None
+        limiter = _limiters.setdefault(
+            group, ConcurrencyLimiter(limit, settings.admission_queue, settings.admission_wait_seconds)
+        )
+    return limiter
+
+
+def admission(group: str) -> Callable[[], AsyncIterator[None]]:
+    """Router dependency holding one slot of `group` for the duration of the request."""
+
+    async def admit() -> AsyncIterator[None]:
+        limiter = get_limiter(group)
+        if limiter is None:
+            yield
+            return
+        if not await limiter.acquire():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Serveur surchargé, réessayez dans quelques instants",
+                headers={"Retry-After": str(get_settings().admission_retry_after_seconds)},
+            )
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    return admit
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import Any, TypeVar
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from app.models.schemas import BulkItemError
+from app.services.repository import BulkInsertError
+
+MAX_BULK_ITEMS = 5000
+
+ERROR_DETAILS = {
+    "coffee_not_found": "Café introuvable",
+    "water_not_found": "Eau introuvable",
+    "shot_not_found": "Shot introuvable",
+}
+
+T = TypeVar("T")
+
+
+def validate_items(adapter: TypeAdapter[list[T]], items: list[Any]) -> tuple[list[T], list[BulkItemError]]:
+    """Validate a whole bulk body in one pass, reporting failures against item positions."""
+    try:
+        return adapter.validate_python(items), []
+    except ValidationError as err:
+        errors = []
+        for error in err.errors():
+            index, *path = error["loc"]
+            errors.append(
+                BulkItemError(
+                    index=index,
+                    field=".".join(str(part) for part in path) or None,
+                    detail=error["msg"],
+                )
+            )
+        return [], errors
+
+
+def insert_errors(err: BulkInsertError) -> list[BulkItemError]:
+    errors = []
+    for index, code in sorted(err.errors.items()):
+        if code.startswith("unknown_label"):
+            detail = "Libellé sensoriel invalide"
+        else:
+            detail = ERROR_DETAILS.get(code, code)
+        errors.append(BulkItemError(index=index, detail=detail))
+    return errors
+
+
+def rejected(result: BaseModel) -> JSONResponse:
+    """422 carrying the per-item errors; nothing from the batch was written."""
+    return JSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content=result.model_dump(mode="json"))
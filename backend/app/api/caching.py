@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Hashable
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.services.cache import AnalyticsCache
+from app.services.offload import AnalyticsExecutor, AnalyticsTimeout
+from app.services.repository import Repository
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    # weak comparison: W/"x" and "x" designate the same representation
+    return "*" in candidates or etag in candidates or etag.removeprefix("W/") in candidates
+
+
+def cached_result(
+    request: Request,
+    response: Response,
+    repository: Repository,
+    cache: AnalyticsCache,
+    key: Hashable,
+    executor: AnalyticsExecutor,
+    compute: Callable[..., Any],
+    *args: Any,
+    encode_as: type | None = None,
+) -> Any:
+    """Serve `compute(snapshot, *args)` memoized per repository generation, honouring If-None-Match.
+
+    The computation reads an immutable snapshot, so concurrent writes cannot disturb it. It
+    runs on `executor`, which may pickle it to a worker process: `compute` must be a
+    module-level function. A worker process dumps the result as `encode_as` when given. A
+    request whose validator still matches is answered before any snapshot is taken.
+    """
+    generation = repository.generation
+    etag = cache.etag(repository.epoch, generation, f"{request.url.path}?{request.url.query}")
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    def run() -> Any:
+        # a write landing after `generation` was read only makes the result fresher than its tag
+        return executor.run(compute, repository.snapshot(), *args, encode_as=encode_as)
+
+    try:
+        return cache.get_or_compute(key, generation, run)
+    except AnalyticsTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Calcul analytique trop long, réessayez plus tard",
+        ) from None
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from uuid import UUID
+
+from fastapi import Query
+
+from app.models.entities import BeverageType
+from app.services.repository import ShotFilters, TastingFilters
+
+
+def _naive_utc(value: datetime | None) -> datetime | None:
+    """Stored timestamps are naive UTC; an offset in the query is converted to match them."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _filters_or_none(filters: ShotFilters) -> ShotFilters | None:
+    # an empty filter set keeps the plain keyset listing
+    return None if filters == type(filters)() else filters
+
+
+def shot_filters(
+    coffee_id: UUID | None = Query(None, description="Uniquement les shots de ce café"),
+    water_id: UUID | None = Query(None, description="Uniquement les shots préparés avec cette eau"),
+    beverage_type: BeverageType | None = Query(None, description="Uniquement ce type de boisson"),
+    grind_setting: str | None = Query(None, description="Uniquement ce réglage de mouture"),
+    created_from: datetime | None = Query(None, description="Créés à partir de cet instant (inclus, UTC par défaut)"),
+    created_to: datetime | None = Query(None, description="Créés avant cet instant (exclu, UTC par défaut)"),
+) -> ShotFilters | None:
+    return _filters_or_none(
+        ShotFilters(
+            coffee_id=coffee_id,
+            water_id=water_id,
+            beverage_type=beverage_type,
+            grind_setting=grind_setting,
+            created_from=_naive_utc(created_from),
+            created_to=_naive_utc(created_to),
+        )
+    )
+
+
+def tasting_filters(
+    shot_id: UUID | None = Query(None, description="Uniquement les dégustations de ce shot"),
+    coffee_id: UUID | None = Query(None, description="Uniquement les dégustations de shots de ce café"),
+    water_id: UUID | None = Query(None, description="Uniquement les dégustations de shots préparés avec cette eau"),
+    beverage_type: BeverageType | None = Query(None, description="Uniquement ce type de boisson"),
+    grind_setting: str | None = Query(None, description="Uniquement ce réglage de mouture"),
+    created_from: datetime | None = Query(None, description="Créées à partir de cet instant (inclus, UTC par défaut)"),
+    created_to: datetime | None = Query(None, description="Créées avant cet instant (exclu, UTC par défaut)"),
+) -> TastingFilters | None:
+    return _filters_or_none(
+        TastingFilters(
+            shot_id=shot_id,
+            coffee_id=coffee_id,
+            water_id=water_id,
+            beverage_type=beverage_type,
+            grind_setting=grind_setting,
+            created_from=_naive_utc(created_from),
+            created_to=_naive_utc(created_to),
+        )
+    )
@@ -0,0 +1,105 @@
+"""Request metrics in the Prometheus text exposition format.
+
+`MetricsMiddleware` is a plain ASGI middleware: per request it reads the clock twice and
+bumps one histogram bucket keyed by method, route template and status. Recording and
+rendering both happen on the event loop thread, so no lock is taken. Labels use the route
+template (``/api/v1/coffees/{coffee_id}``), never the raw path, to keep series bounded;
+requests matching no route are labelled ``unmatched``.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from time import perf_counter
+from typing import Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# seconds; analytics on large datasets run for whole seconds, CRUD for a few milliseconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED = "unmatched"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def labels(**values: object) -> str:
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in values.items()) + "}"
+
+
+def family(name: str, kind: str, help_text: str, samples: Iterable[tuple[str, object]]) -> str:
+    """One metric family: HELP and TYPE lines, then `name<labels> value` samples."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{sample_labels} {value}" for sample_labels, value in samples)
+    return "\n".join(lines) + "\n"
+
+
+class _Series:
+    __slots__ = ("counts", "total")
+
+    def __init__(self, size: int) -> None:
+        # one count per bucket plus the +Inf overflow, not cumulative
+        self.counts = [0] * size
+        self.total = 0.0
+
+
+class RequestMetrics:
+    """Request latency histograms per (method, route, status)."""
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS) -> None:
+        self.buckets = buckets
+        self._series: dict[tuple[str, str, int], _Series] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route, status)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series(len(self.buckets) + 1)
+        series.counts[bisect_left(self.buckets, seconds)] += 1
+        series.total += seconds
+
+    def render(self) -> str:
+        name = "barisense_http_request_duration_seconds"
+        requests = []
+        histogram = [f"# HELP {name} HTTP request latency by route and status.", f"# TYPE {name} histogram"]
+        for (method, route, status), series in sorted(self._series.items()):
+            series_labels = {"method": method, "route": route, "status": status}
+            count = sum(series.counts)
+            requests.append((labels(**series_labels), count))
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), series.counts):
+                cumulative += bucket_count
+                histogram.append(f"{name}_bucket{labels(**series_labels, le=bound)} {cumulative}")
+            histogram.append(f"{name}_sum{labels(**series_labels)} {series.total!r}")
+            histogram.append(f"{name}_count{labels(**series_labels)} {count}")
+        total = family("barisense_http_requests_total", "counter", "HTTP requests by route and status.", requests)
+        return total + "\n".join(histogram) + "\n"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # the router stores the matched route in the shared scope
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED)
+            self.metrics.observe(scope["method"], path, status, perf_counter() - start)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import HTTPException, Query, Response, status
+
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass(frozen=True)
+class Page:
+    """Keyset page request: items strictly older than `after`, newest first."""
+
+    after: tuple[datetime, UUID] | None
+    limit: int | None
+
+
+def encode_cursor(item) -> str:
+    raw = f"{item.created_at.isoformat()}|{item.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        after = datetime.fromisoformat(created_at), UUID(item_id)
+        if after[0].tzinfo is not None:
+            # creation keys are naive UTC; an aware one could not be compared with them
+            raise ValueError("aware_cursor")
+        return after
+    except (binascii.Error, UnicodeDecodeError, ValueError) as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Curseur invalide") from err
+
+
+def page_params(
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Nombre maximal d'éléments"),
+    after: str | None = Query(None, description=f"Curseur opaque renvoyé dans l'en-tête {NEXT_CURSOR_HEADER}"),
+) -> Page:
+    return Page(after=decode_cursor(after) if after else None, limit=limit)
+
+
+def set_next_cursor(response: Response, items: list, page: Page) -> None:
+    """Advertise the next page when the current one is full."""
+    if page.limit is not None and len(items) == page.limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(items[-1])
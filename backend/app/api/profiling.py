@@ -0,0 +1,70 @@
+"""Opt-in profiling of single requests (`Settings.profiling_enabled`).
+
+A request carrying `Settings.profiling_header` and the configured API key is sampled by a
+`StackSampler` while it runs. The collapsed stacks go to ``<profiling_directory>/<id>.collapsed``
+and the id is returned in the `X-Profile-Id` response header. The middleware is only installed
+when profiling is enabled, so it costs nothing otherwise; once enabled, requests without the
+header pay a scan of their headers. Concurrent requests to the same endpoint show up in the
+same profile.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from uuid import uuid4
+
+from anyio import to_thread
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.profiling import DEFAULT_INTERVAL, StackSampler
+
+PROFILE_ID_HEADER = "X-Profile-Id"
+DEFAULT_API_KEY_HEADER = "x-api-key"
+
+
+class ProfilingMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        directory: str,
+        header: str,
+        api_key: str,
+        api_key_header: str,
+        interval: float = DEFAULT_INTERVAL,
+    ) -> None:
+        self.app = app
+        self.directory = Path(directory)
+        self.interval = interval
+        self._header = header.lower().encode()
+        self._api_key = api_key.encode()
+        self._api_key_headers = {api_key_header.lower().encode(), DEFAULT_API_KEY_HEADER.encode()}
+
+    def _requested(self, scope: Scope) -> bool:
+        requested = authorized = False
+        for name, value in scope["headers"]:
+            if name == self._header:
+                requested = True
+            elif name in self._api_key_headers and value == self._api_key:
+                authorized = True
+        return requested and authorized
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+        profile_id = uuid4().hex
+        sampler = StackSampler(lambda: getattr(scope.get("endpoint"), "__code__", None), self.interval)
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # a new list: the response object may own the one in the message
+                header = (PROFILE_ID_HEADER.lower().encode(), profile_id.encode())
+                message["headers"] = [*message.get("headers", ()), header]
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            await to_thread.run_sync(sampler.write, self.directory / f"{profile_id}.collapsed")
@@ -1,124 +1,127 @@
 from __future__ import annotations
 
-from statistics import mean
+from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import TypeAdapter
 
-from app.core.dependencies import get_repository, require_api_key
+from app.api.admission import admission
+from app.api.caching import cached_result
+from app.api.serialization import model_result
+from app.core.dependencies import get_analytics_cache, get_analytics_executor, get_repository, require_api_key
 from app.models.entities import BeverageType
 from app.models.schemas import (
+    AnalyticsSummary,
     QualityPriceInsight,
     RankedCoffee,
     RetestCandidate,
     StabilityInsight,
 )
-from app.services.analysis import (
-    aggregate_quality_per_price,
-    mean_to_label,
-    stability_label,
-    summarize_rankings,
-    summarize_retest_needed,
-    verdict_label,
-    verdict_from_mean,
-)
+from app.services.cache import AnalyticsCache
+from app.services.insights import Insights
+from app.services.offload import AnalyticsExecutor
 from app.services.repository import Repository
 
-router = APIRouter(prefix="/analytics", tags=["analytics"], dependencies=[Depends(require_api_key)])
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+    dependencies=[Depends(require_api_key), Depends(admission("analytics"))],
+)
 
+_SUMMARY = TypeAdapter(AnalyticsSummary)
+_RANKING = TypeAdapter(list[RankedCoffee])
+_QUALITY_PRICE = TypeAdapter(list[QualityPriceInsight])
+_STABILITY = TypeAdapter(list[StabilityInsight])
+_RETEST = TypeAdapter(list[RetestCandidate])
 
-def _average_for_coffee(repository: Repository, coffee_id, beverage_filter: BeverageType | None = None):
-    tastings = repository.tastings_by_coffee(coffee_id)
-    if beverage_filter:
-        shot_ids = {
-            shot.id for shot in repository.shots_by_coffee(coffee_id) if shot.beverage_type == beverage_filter
-        }
-        tastings = [t for t in tastings if t.shot_id in shot_ids]
-    if not tastings:
-        return None
-    return mean([t.sensory_mean for t in tastings])
 
+# module-level so that the process executor can pickle them
+def _summary(snapshot: Repository) -> AnalyticsSummary:
+    return Insights(snapshot).summary()
 
-def _verdict_label(repository: Repository, coffee_id) -> str:
-    verdict = next((v for v in repository.list_verdicts() if v.coffee_id == coffee_id), None)
-    if verdict:
-        return verdict_label(verdict.status)
-    avg = _average_for_coffee(repository, coffee_id)
-    if avg is None:
-        return "en observation"
-    return verdict_label(verdict_from_mean(avg))
 
+def _rankings_of(snapshot: Repository, water_id: UUID | None) -> dict[BeverageType | None, list[RankedCoffee]]:
+    return Insights(snapshot).rankings(water_id)
 
-@router.get("/rankings/global", response_model=list[RankedCoffee], summary="Classement global des cafés")
-def global_ranking(repository: Repository = Depends(get_repository)) -> list[RankedCoffee]:
-    means = {}
-    for coffee in repository.list_coffees():
-        avg = _average_for_coffee(repository, coffee.id)
-        if avg is not None:
-            means[coffee.id] = {"coffee": coffee, "mean": avg}
-    ranking = summarize_rankings(means)
-    return [
-        RankedCoffee(
-            position=position,
-            coffee_id=coffee_id,
-            name=data["coffee"].name,
-            roaster=data["coffee"].roaster,
-            score_label=mean_to_label(data["mean"]),
-            verdict_label=_verdict_label(repository, coffee_id),
-        )
-        for position, coffee_id, data in ranking
-    ]
 
+def _quality_price(snapshot: Repository) -> list[QualityPriceInsight]:
+    return Insights(snapshot).quality_price()
 
-@router.get(
-    "/rankings/ristretto",
-    response_model=list[RankedCoffee],
-    summary="Classement ristretto (boissons serrées uniquement)",
-)
-def ristretto_ranking(repository: Repository = Depends(get_repository)) -> list[RankedCoffee]:
-    means = {}
-    for coffee in repository.list_coffees():
-        avg = _average_for_coffee(repository, coffee.id, beverage_filter=BeverageType.RISTRETTO)
-        if avg is not None:
-            means[coffee.id] = {"coffee": coffee, "mean": avg}
-    ranking = summarize_rankings(means)
-    return [
-        RankedCoffee(
-            position=position,
-            coffee_id=coffee_id,
-            name=data["coffee"].name,
-            roaster=data["coffee"].roaster,
-            score_label=mean_to_label(data["mean"]),
-            verdict_label=_verdict_label(repository, coffee_id),
-            beverage_filter=BeverageType.RISTRETTO.value,
-        )
-        for position, coffee_id, data in ranking
-    ]
+
+def _stability(snapshot: Repository) -> list[StabilityInsight]:
+    return Insights(snapshot).stability()
+
+
+def _retest(snapshot: Repository) -> list[RetestCandidate]:
+    return Insights(snapshot).retest()
+
+
+def _rankings(
+    request: Request,
+    response: Response,
+    repository: Repository,
+    cache: AnalyticsCache,
+    executor: AnalyticsExecutor,
+    water_id: UUID | None,
+) -> dict[BeverageType | None, list[RankedCoffee]] | Response:
+    if water_id and not repository.get_water(water_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Eau introuvable")
+    # every beverage ranking is built together, so the routes share one cache entry
+    return cached_result(
+        request,
+        response,
+        repository,
+        cache,
+        ("rankings", water_id),
+        executor,
+        _rankings_of,
+        water_id,
+    )
+
+
+@router.get("", response_model=AnalyticsSummary, summary="Synthèse analytique complète")
+def summary(
+    request: Request,
+    response: Response,
+    repository: Repository = Depends(get_repository),
+    cache: AnalyticsCache = Depends(get_analytics_cache),
+    executor: AnalyticsExecutor = Depends(get_analytics_executor),
+) -> AnalyticsSummary:
+    result = cached_result(
+        request, response, repository, cache, "summary", executor, _summary, encode_as=AnalyticsSummary
+    )
+    return model_result(response, _SUMMARY, result)
+
+
+@router.get("/rankings/global", response_model=list[RankedCoffee], summary="Classement global des cafés")
+def global_ranking(
+    request: Request,
+    response: Response,
+    water_id: UUID | None = Query(None, description="Restreindre aux shots réalisés avec cette eau"),
+    repository: Repository = Depends(get_repository),
+    cache: AnalyticsCache = Depends(get_analytics_cache),
+    executor: AnalyticsExecutor = Depends(get_analytics_executor),
+) -> list[RankedCoffee]:
+    rankings = _rankings(request, response, repository, cache, executor, water_id)
+    return model_result(response, _RANKING, rankings if isinstance(rankings, Response) else rankings[None])
 
 
 @router.get(
-    "/rankings/expresso",
+    "/rankings/{beverage_type}",
     response_model=list[RankedCoffee],
-    summary="Classement expresso",
+    summary="Classement par type de boisson (ristretto, expresso, café long)",
 )
-def expresso_ranking(repository: Repository = Depends(get_repository)) -> list[RankedCoffee]:
-    means = {}
-    for coffee in repository.list_coffees():
-        avg = _average_for_coffee(repository, coffee.id, beverage_filter=BeverageType.EXPRESSO)
-        if avg is not None:
-            means[coffee.id] = {"coffee": coffee, "mean": avg}
-    ranking = summarize_rankings(means)
-    return [
-        RankedCoffee(
-            position=position,
-            coffee_id=coffee_id,
-            name=data["coffee"].name,
-            roaster=data["coffee"].roaster,
-            score_label=mean_to_label(data["mean"]),
-            verdict_label=_verdict_label(repository, coffee_id),
-            beverage_filter=BeverageType.EXPRESSO.value,
-        )
-        for position, coffee_id, data in ranking
-    ]
+def beverage_ranking(
+    request: Request,
+    response: Response,
+    beverage_type: BeverageType,
+    water_id: UUID | None = Query(None, description="Restreindre aux shots réalisés avec cette eau"),
+    repository: Repository = Depends(get_repository),
+    cache: AnalyticsCache = Depends(get_analytics_cache),
+    executor: AnalyticsExecutor = Depends(get_analytics_executor),
+) -> list[RankedCoffee]:
+    rankings = _rankings(request, response, repository, cache, executor, water_id)
+    return model_result(response, _RANKING, rankings if isinstance(rankings, Response) else rankings[beverage_type])
 
 
 @router.get(
@@ -126,32 +129,17 @@ def expresso_ranking(repository: Repository = Depends(get_repository)) -> list[R
     response_model=list[QualityPriceInsight],
     summary="Rapport qualité / prix par café",
 )
-def quality_price(repository: Repository = Depends(get_repository)) -> list[QualityPriceInsight]:
-    insights: list[QualityPriceInsight] = []
-    ratio_priority = {
-        "excellent rapport Q/P": 4,
-        "bon rapport Q/P": 3,
-        "moyen": 2,
-        "défavorable": 1,
-        "non renseigné": 0,
-    }
-    for coffee in repository.list_coffees():
-        avg = _average_for_coffee(repository, coffee.id)
-        if avg is None:
-            continue
-        ratio_label = aggregate_quality_per_price(avg, coffee.cost_per_shot_eur)
-        insights.append(
-            QualityPriceInsight(
-                coffee_id=coffee.id,
-                name=coffee.name,
-                roaster=coffee.roaster,
-                cost_per_shot_eur=coffee.cost_per_shot_eur,
-                quality_label=mean_to_label(avg),
-                verdict_label=_verdict_label(repository, coffee.id),
-                ratio_label=ratio_label,
-            )
-        )
-    return sorted(insights, key=lambda i: ratio_priority.get(i.ratio_label, 0), reverse=True)
+def quality_price(
+    request: Request,
+    response: Response,
+    repository: Repository = Depends(get_repository),
+    cache: AnalyticsCache = Depends(get_analytics_cache),
+    executor: AnalyticsExecutor = Depends(get_analytics_executor),
+) -> list[QualityPriceInsight]:
+    result = cached_result(
+        request, response, repository, cache, "quality-price", executor, _quality_price
+    )
+    return model_result(response, _QUALITY_PRICE, result)
 
 
 @router.get(
@@ -159,22 +147,17 @@ def quality_price(repository: Repository = Depends(get_repository)) -> list[Qual
     response_model=list[StabilityInsight],
     summary="Cafés les plus stables (écart-type des dégustations)",
 )
-def stability(repository: Repository = Depends(get_repository)) -> list[StabilityInsight]:
-    insights: list[StabilityInsight] = []
-    for coffee in repository.list_coffees():
-        means = [t.sensory_mean for t in repository.tastings_by_coffee(coffee.id)]
-        if not means:
-            continue
-        insights.append(
-            StabilityInsight(
-                coffee_id=coffee.id,
-                name=coffee.name,
-                roaster=coffee.roaster,
-                stability=stability_label(means),
-                sample_size=len(means),
-            )
-        )
-    return insights
+def stability(
+    request: Request,
+    response: Response,
+    repository: Repository = Depends(get_repository),
+    cache: AnalyticsCache = Depends(get_analytics_cache),
+    executor: AnalyticsExecutor = Depends(get_analytics_executor),
+) -> list[StabilityInsight]:
+    result = cached_result(
+        request, response, repository, cache, "stability", executor, _stability
+    )
+    return model_result(response, _STABILITY, result)
 
 
 @router.get(
@@ -182,16 +165,14 @@ def stability(repository: Repository = Depends(get_repository)) -> list[Stabilit
     response_model=list[RetestCandidate],
     summary="Cafés à retester (pas assez de dégustations)",
 )
-def to_retest(repository: Repository = Depends(get_repository)) -> list[RetestCandidate]:
-    counts = repository.tasting_counts()
-    candidates_ids = summarize_retest_needed(counts)
-    coffees = [c for c in repository.list_coffees() if c.id in candidates_ids]
-    return [
-        RetestCandidate(
-            coffee_id=coffee.id,
-            name=coffee.name,
-            roaster=coffee.roaster,
-            reason="Une seule dégustation ou aucune",
-        )
-        for coffee in coffees
-    ]
+def to_retest(
+    request: Request,
+    response: Response,
+    repository: Repository = Depends(get_repository),
+    cache: AnalyticsCache = Depends(get_analytics_cache),
+    executor: AnalyticsExecutor = Depends(get_analytics_executor),
+) -> list[RetestCandidate]:
+    result = cached_result(
+        request, response, repository, cache, "retest", executor, _retest
+    )
+    return model_result(response, _RETEST, result)
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query, Response
+from pydantic import TypeAdapter
+
+from app.api.routes.tastings import serialize_tasting
+from app.api.serialization import model_result
+from app.core.dependencies import get_repository, require_api_key
+from app.models.schemas import ChangeFeed, CoffeeRead, ShotRead, VerdictRead, WaterRead
+from app.services.repository import Repository
+
+router = APIRouter(prefix="/changes", tags=["synchronisation"], dependencies=[Depends(require_api_key)])
+
+_CHANGE_FEED = TypeAdapter(ChangeFeed)
+
+
+@router.get("", response_model=ChangeFeed, summary="Modifications depuis une version (synchronisation différentielle)")
+def list_changes(
+    response: Response,
+    since: int | None = Query(None, ge=0, description="Version renvoyée par le dernier appel ; absente : tout"),
+    epoch: int | None = Query(None, description="Epoch renvoyée par le dernier appel"),
+    repository: Repository = Depends(get_repository),
+) -> ChangeFeed:
+    changes = repository.changes_since(since, epoch)
+    upserts = changes.upserts
+    feed = ChangeFeed(
+        epoch=changes.epoch,
+        version=changes.version,
+        full=changes.full,
+        coffees=[CoffeeRead.model_validate(coffee) for coffee in upserts["coffees"]],
+        waters=[WaterRead.model_validate(water) for water in upserts["waters"]],
+        shots=[ShotRead.model_validate(shot) for shot in upserts["shots"]],
+        tastings=[serialize_tasting(tasting) for tasting in upserts["tastings"]],
+        verdicts=[VerdictRead.model_validate(verdict) for verdict in upserts["verdicts"]],
+        deleted=changes.deleted,
+    )
+    return model_result(response, _CHANGE_FEED, feed)
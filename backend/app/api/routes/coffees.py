@@ -1,7 +1,9 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 
+from app.api.pagination import Page, page_params, set_next_cursor
+from app.api.serialization import fast_serialization_enabled, records_response, coffee_record
 from app.core.dependencies import get_repository, require_api_key
 from app.models.schemas import CoffeeCreate, CoffeeRead
 from app.services.repository import Repository
@@ -10,8 +12,16 @@ router = APIRouter(prefix="/coffees", tags=["coffees"], dependencies=[Depends(re
 
 
 @router.get("", response_model=list[CoffeeRead], summary="Lister les cafés enregistrés")
-def list_coffees(repository: Repository = Depends(get_repository)) -> list[CoffeeRead]:
-    return [CoffeeRead.model_validate(coffee) for coffee in repository.list_coffees()]
+def list_coffees(
+    response: Response,
+    page: Page = Depends(page_params),
+    repository: Repository = Depends(get_repository),
+) -> list[CoffeeRead]:
+    coffees = repository.list_coffees(after=page.after, limit=page.limit)
+    set_next_cursor(response, coffees, page)
+    if fast_serialization_enabled():
+        return records_response(response, coffee_record, coffees)
+    return [CoffeeRead.model_validate(coffee) for coffee in coffees]
 
 
 @router.get("/{coffee_id}", response_model=CoffeeRead, summary="Détail d'un café")
@@ -58,3 +68,21 @@ def delete_coffee(coffee_id: UUID, repository: Repository = Depends(get_reposito
     if not repository.get_coffee(coffee_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Café introuvable")
     repository.delete_coffee(coffee_id)
+
+
+@router.delete(
+    "",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Supprimer plusieurs cafés et leurs données associées",
+)
+def delete_coffees(
+    ids: list[UUID] = Query(..., description="Identifiants des cafés à supprimer"),
+    repository: Repository = Depends(get_repository),
+) -> None:
+    missing = [str(coffee_id) for coffee_id in ids if not repository.get_coffee(coffee_id)]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Café introuvable: {', '.join(missing)}",
+        )
+    repository.delete_coffees(ids)
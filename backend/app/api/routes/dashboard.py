@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from pydantic import TypeAdapter
+
+from app.api.admission import admission
+from app.api.caching import cached_result
+from app.api.pagination import MAX_PAGE_SIZE
+from app.api.routes.tastings import serialize_tasting
+from app.api.serialization import model_result
+from app.core.dependencies import get_analytics_cache, get_analytics_executor, get_repository, require_api_key
+from app.models.schemas import CoffeeRead, Dashboard, DashboardSection, ShotRead, VerdictRead, WaterRead
+from app.services.cache import AnalyticsCache
+from app.services.insights import Insights
+from app.services.offload import AnalyticsExecutor
+from app.services.repository import Repository
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["tableau de bord"],
+    dependencies=[Depends(require_api_key), Depends(admission("dashboard"))],
+)
+
+_DASHBOARD = TypeAdapter(Dashboard)
+DEFAULT_RECENT = 20
+
+
+def build_dashboard(repository: Repository, sections: frozenset[DashboardSection], recent: int) -> Dashboard:
+    """Requested sections of one snapshot; the analytics ones share a single `Insights`."""
+    insights = Insights(repository)
+    snapshot = insights.repository
+    # built in declaration order, so rankings fill the verdict labels quality/price reuses
+    builders = {
+        DashboardSection.COFFEES: lambda: [CoffeeRead.model_validate(c) for c in insights.coffees],
+        DashboardSection.WATERS: lambda: [WaterRead.model_validate(w) for w in insights.waters],
+        DashboardSection.SHOTS: lambda: [ShotRead.model_validate(s) for s in snapshot.list_shots(limit=recent)],
+        DashboardSection.TASTINGS: lambda: [serialize_tasting(t) for t in snapshot.list_tastings(limit=recent)],
+        DashboardSection.VERDICTS: lambda: [VerdictRead.model_validate(v) for v in snapshot.list_verdicts()],
+        DashboardSection.SUMMARY: insights.summary,
+        DashboardSection.RANKINGS: lambda: {
+            key.value if key else "global": ranking for key, ranking in insights.rankings().items()
+        },
+        DashboardSection.QUALITY_PRICE: insights.quality_price,
+        DashboardSection.STABILITY: insights.stability,
+        DashboardSection.RETEST: insights.retest,
+    }
+    return Dashboard(**{section.value: build() for section, build in builders.items() if section in sections})
+
+
+@router.get("", response_model=Dashboard, summary="Écran d'accueil (listes et analyses) en un seul appel")
+def dashboard(
+    request: Request,
+    response: Response,
+    sections: list[DashboardSection] = Query(
+        list(DashboardSection), description="Sections à inclure (toutes par défaut), paramètre répétable"
+    ),
+    recent: int = Query(
+        DEFAULT_RECENT, ge=1, le=MAX_PAGE_SIZE, description="Nombre de shots et de dégustations récents"
+    ),
+    repository: Repository = Depends(get_repository),
+    cache: AnalyticsCache = Depends(get_analytics_cache),
+    executor: AnalyticsExecutor = Depends(get_analytics_executor),
+) -> Dashboard:
+    wanted = frozenset(sections)
+    result = cached_result(
+        request,
+        response,
+        repository,
+        cache,
+        ("dashboard", wanted, recent),
+        executor,
+        build_dashboard,
+        wanted,
+        recent,
+        encode_as=Dashboard,
+    )
+    return model_result(response, _DASHBOARD, result)
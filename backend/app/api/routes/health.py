@@ -6,7 +6,10 @@ router = APIRouter(tags=["health"])
 
 
 @router.get("/health", summary="Vérification de disponibilité")
-def healthcheck() -> dict[str, str]:
-    """Return app metadata to quickly validate deployment."""
+async def healthcheck() -> dict[str, str]:
+    """Return app metadata to quickly validate deployment.
+
+    Async so that it answers from the event loop even when every pool thread is busy.
+    """
     settings = get_settings()
     return {"status": "ok", "app": settings.app_name, "version": settings.version}
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from app.core.dependencies import get_live_rankings, require_api_key
+from app.services.live import LiveRankings
+
+router = APIRouter(prefix="/live", tags=["temps réel"], dependencies=[Depends(require_api_key)])
+
+
+@router.get(
+    "/rankings",
+    summary="Flux SSE des changements du classement global et des verdicts",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def live_rankings(live: LiveRankings = Depends(get_live_rankings)) -> StreamingResponse:
+    """Événements `ranking` (RankingDiff) et `verdicts` (VerdictDiff) ; le premier de chaque type
+    porte l'état complet (`full: true`), les suivants uniquement les lignes modifiées."""
+    subscriber = await live.subscribe()
+    return StreamingResponse(
+        live.events(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
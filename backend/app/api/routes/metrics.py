@@ -0,0 +1,101 @@
+from anyio import to_thread
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.api.admission import limiters
+from app.api.metrics import CONTENT_TYPE, RequestMetrics, family, labels
+from app.core.dependencies import get_analytics_cache, get_repository, get_request_metrics, require_api_key
+from app.services.cache import AnalyticsCache
+from app.services.repository import Repository
+
+router = APIRouter(tags=["health"], dependencies=[Depends(require_api_key)])
+
+
+def _repository_families(counts: dict[str, int], generation: int) -> str:
+    return family(
+        "barisense_entities",
+        "gauge",
+        "Entities stored per collection.",
+        [(labels(collection=collection), count) for collection, count in counts.items()],
+    ) + family("barisense_repository_generation", "gauge", "Repository write counter.", [("", generation)])
+
+
+def _cache_families(cache: AnalyticsCache) -> str:
+    lookups = cache.hits + cache.misses + cache.coalesced
+    # coalesced lookups shared a computation they did not start: served without computing
+    ratio = (cache.hits + cache.coalesced) / lookups if lookups else 0.0
+    return family(
+        "barisense_analytics_cache_lookups_total",
+        "counter",
+        "Analytics cache lookups by outcome.",
+        [
+            (labels(result="hit"), cache.hits),
+            (labels(result="miss"), cache.misses),
+            (labels(result="coalesced"), cache.coalesced),
+        ],
+    ) + family(
+        "barisense_analytics_cache_hit_ratio",
+        "gauge",
+        "Share of analytics lookups served without computing.",
+        [("", ratio)],
+    )
+
+
+def _pool_families() -> str:
+    pool = to_thread.current_default_thread_limiter()
+    statistics = pool.statistics()
+    return (
+        family("barisense_threadpool_threads", "gauge", "Threads of the request pool.", [("", pool.total_tokens)])
+        + family(
+            "barisense_threadpool_busy", "gauge", "Busy threads of the request pool.", [("", pool.borrowed_tokens)]
+        )
+        + family(
+            "barisense_threadpool_queued",
+            "gauge",
+            "Calls waiting for a thread of the request pool.",
+            [("", statistics.tasks_waiting)],
+        )
+    )
+
+
+def _admission_families() -> str:
+    groups = sorted(limiters().items())
+    return (
+        family(
+            "barisense_admission_active",
+            "gauge",
+            "Admitted requests in progress per route group.",
+            [(labels(group=group), limiter.active) for group, limiter in groups],
+        )
+        + family(
+            "barisense_admission_waiting",
+            "gauge",
+            "Requests queued for admission per route group.",
+            [(labels(group=group), limiter.waiting) for group, limiter in groups],
+        )
+        + family(
+            "barisense_admission_rejected_total",
+            "counter",
+            "Requests shed with a 503 per route group.",
+            [(labels(group=group), limiter.rejected) for group, limiter in groups],
+        )
+    )
+
+
+@router.get("/metrics", response_class=PlainTextResponse, summary="Métriques au format Prometheus")
+async def metrics(
+    repository: Repository = Depends(get_repository),
+    cache: AnalyticsCache = Depends(get_analytics_cache),
+    request_metrics: RequestMetrics = Depends(get_request_metrics),
+) -> PlainTextResponse:
+    """Latences par route et statut, volumes du dépôt, cache d'analyse, pool de threads et admission."""
+    # counting may hit SQLite: off the event loop
+    counts, generation = await to_thread.run_sync(lambda: (repository.counts(), repository.generation))
+    body = (
+        request_metrics.render()
+        + _repository_families(counts, generation)
+        + _cache_families(cache)
+        + _pool_families()
+        + _admission_families()
+    )
+    return PlainTextResponse(body, media_type=CONTENT_TYPE)
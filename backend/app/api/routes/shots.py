@@ -1,17 +1,34 @@
+from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
+from pydantic import TypeAdapter
 
+from app.api.bulk import MAX_BULK_ITEMS, insert_errors, rejected, validate_items
+from app.api.filters import shot_filters
+from app.api.pagination import Page, page_params, set_next_cursor
+from app.api.serialization import fast_serialization_enabled, records_response, shot_record
 from app.core.dependencies import get_repository, require_api_key
-from app.models.schemas import ShotCreate, ShotRead
-from app.services.repository import Repository
+from app.models.schemas import ShotBulkResult, ShotCreate, ShotRead
+from app.services.repository import BulkInsertError, Repository, ShotFilters
+
+_SHOT_LIST = TypeAdapter(list[ShotCreate])
 
 router = APIRouter(prefix="/shots", tags=["shots"], dependencies=[Depends(require_api_key)])
 
 
 @router.get("", response_model=list[ShotRead], summary="Lister les shots effectués")
-def list_shots(repository: Repository = Depends(get_repository)) -> list[ShotRead]:
-    return [ShotRead.model_validate(shot) for shot in repository.list_shots()]
+def list_shots(
+    response: Response,
+    page: Page = Depends(page_params),
+    filters: ShotFilters | None = Depends(shot_filters),
+    repository: Repository = Depends(get_repository),
+) -> list[ShotRead]:
+    shots = repository.list_shots(after=page.after, limit=page.limit, filters=filters)
+    set_next_cursor(response, shots, page)
+    if fast_serialization_enabled():
+        return records_response(response, shot_record, shots)
+    return [ShotRead.model_validate(shot) for shot in shots]
 
 
 @router.get("/{shot_id}", response_model=ShotRead, summary="Récupérer un shot")
@@ -42,6 +59,28 @@ def create_shot(
     return ShotRead.model_validate(created)
 
 
+@router.post(
+    "/bulk",
+    response_model=ShotBulkResult,
+    status_code=status.HTTP_201_CREATED,
+    summary="Enregistrer une série de shots",
+    responses={422: {"model": ShotBulkResult, "description": "Aucun shot enregistré, erreurs par élément"}},
+)
+def create_shots_bulk(
+    items: list[Any] = Body(..., max_length=MAX_BULK_ITEMS),
+    repository: Repository = Depends(get_repository),
+) -> ShotBulkResult:
+    payloads, errors = validate_items(_SHOT_LIST, items)
+    if not errors:
+        try:
+            created = repository.add_shots(payloads)
+        except BulkInsertError as err:
+            errors = insert_errors(err)
+    if errors:
+        return rejected(ShotBulkResult(created=[], errors=errors))
+    return ShotBulkResult(created=[ShotRead.model_validate(shot) for shot in created], errors=[])
+
+
 @router.put(
     "/{shot_id}",
     response_model=ShotRead,
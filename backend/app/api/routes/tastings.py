@@ -1,18 +1,34 @@
+from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
+from pydantic import TypeAdapter
 
+from app.api.bulk import MAX_BULK_ITEMS, insert_errors, rejected, validate_items
+from app.api.filters import tasting_filters
+from app.api.pagination import Page, page_params, set_next_cursor
+from app.api.serialization import fast_serialization_enabled, records_response, tasting_record
 from app.core.dependencies import get_repository, require_api_key
-from app.models.schemas import TastingCreate, TastingRead
-from app.services.analysis import mean_to_label, verdict_from_mean, verdict_label
-from app.services.repository import Repository
+from app.models.schemas import TastingBulkResult, TastingCreate, TastingRead
+from app.services.repository import BulkInsertError, Repository, TastingFilters
+
+_TASTING_LIST = TypeAdapter(list[TastingCreate])
 
 router = APIRouter(prefix="/tastings", tags=["dégustations"], dependencies=[Depends(require_api_key)])
 
 
 @router.get("", response_model=list[TastingRead], summary="Lister les dégustations")
-def list_tastings(repository: Repository = Depends(get_repository)) -> list[TastingRead]:
-    return [serialize_tasting(t) for t in repository.list_tastings()]
+def list_tastings(
+    response: Response,
+    page: Page = Depends(page_params),
+    filters: TastingFilters | None = Depends(tasting_filters),
+    repository: Repository = Depends(get_repository),
+) -> list[TastingRead]:
+    tastings = repository.list_tastings(after=page.after, limit=page.limit, filters=filters)
+    set_next_cursor(response, tastings, page)
+    if fast_serialization_enabled():
+        return records_response(response, tasting_record, tastings)
+    return [serialize_tasting(t) for t in tastings]
 
 
 @router.get("/{tasting_id}", response_model=TastingRead, summary="Détail d'une dégustation")
@@ -45,6 +61,28 @@ def create_tasting(
     return serialize_tasting(tasting)
 
 
+@router.post(
+    "/bulk",
+    response_model=TastingBulkResult,
+    status_code=status.HTTP_201_CREATED,
+    summary="Enregistrer une série de dégustations",
+    responses={422: {"model": TastingBulkResult, "description": "Aucune dégustation enregistrée, erreurs par élément"}},
+)
+def create_tastings_bulk(
+    items: list[Any] = Body(..., max_length=MAX_BULK_ITEMS),
+    repository: Repository = Depends(get_repository),
+) -> TastingBulkResult:
+    payloads, errors = validate_items(_TASTING_LIST, items)
+    if not errors:
+        try:
+            created = repository.add_tastings(payloads)
+        except BulkInsertError as err:
+            errors = insert_errors(err)
+    if errors:
+        return rejected(TastingBulkResult(created=[], errors=errors))
+    return TastingBulkResult(created=[serialize_tasting(t) for t in created], errors=[])
+
+
 @router.delete(
     "/{tasting_id}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -57,18 +95,4 @@ def delete_tasting(tasting_id: UUID, repository: Repository = Depends(get_reposi
 
 
 def serialize_tasting(tasting) -> TastingRead:
-    return TastingRead(
-        id=tasting.id,
-        shot_id=tasting.shot_id,
-        acidity_label=mean_to_label(tasting.acidity_score),
-        bitterness_label=mean_to_label(tasting.bitterness_score),
-        body_label=mean_to_label(tasting.body_score),
-        aroma_label=mean_to_label(tasting.aroma_score),
-        balance_label=mean_to_label(tasting.balance_score),
-        finish_label=mean_to_label(tasting.finish_score),
-        overall_label=mean_to_label(tasting.overall_score),
-        mean_label=mean_to_label(tasting.sensory_mean),
-        verdict_label=verdict_label(verdict_from_mean(tasting.sensory_mean)),
-        comments=tasting.comments,
-        created_at=tasting.created_at,
-    )
+    return TastingRead(**tasting_record(tasting))
@@ -1,7 +1,9 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 
+from app.api.pagination import Page, page_params, set_next_cursor
+from app.api.serialization import fast_serialization_enabled, records_response, verdict_record
 from app.core.dependencies import get_repository, require_api_key
 from app.models.schemas import VerdictCreate, VerdictRead
 from app.services.repository import Repository
@@ -10,8 +12,16 @@ router = APIRouter(prefix="/verdicts", tags=["verdicts"], dependencies=[Depends(
 
 
 @router.get("", response_model=list[VerdictRead], summary="Lister les verdicts calculés")
-def list_verdicts(repository: Repository = Depends(get_repository)) -> list[VerdictRead]:
-    return [VerdictRead.model_validate(verdict) for verdict in repository.list_verdicts()]
+def list_verdicts(
+    response: Response,
+    page: Page = Depends(page_params),
+    repository: Repository = Depends(get_repository),
+) -> list[VerdictRead]:
+    verdicts = repository.list_verdicts(after=page.after, limit=page.limit)
+    set_next_cursor(response, verdicts, page)
+    if fast_serialization_enabled():
+        return records_response(response, verdict_record, verdicts)
+    return [VerdictRead.model_validate(verdict) for verdict in verdicts]
 
 
 @router.get("/{verdict_id}", response_model=VerdictRead, summary="Consulter un verdict")
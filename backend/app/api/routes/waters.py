@@ -1,7 +1,9 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 
+from app.api.pagination import Page, page_params, set_next_cursor
+from app.api.serialization import fast_serialization_enabled, records_response, water_record
 from app.core.dependencies import get_repository, require_api_key
 from app.models.schemas import WaterCreate, WaterRead
 from app.services.repository import Repository
@@ -10,8 +12,16 @@ router = APIRouter(prefix="/waters", tags=["eaux"], dependencies=[Depends(requir
 
 
 @router.get("", response_model=list[WaterRead], summary="Lister les eaux disponibles")
-def list_waters(repository: Repository = Depends(get_repository)) -> list[WaterRead]:
-    return [WaterRead.model_validate(water) for water in repository.list_waters()]
+def list_waters(
+    response: Response,
+    page: Page = Depends(page_params),
+    repository: Repository = Depends(get_repository),
+) -> list[WaterRead]:
+    waters = repository.list_waters(after=page.after, limit=page.limit)
+    set_next_cursor(response, waters, page)
+    if fast_serialization_enabled():
+        return records_response(response, water_record, waters)
+    return [WaterRead.model_validate(water) for water in waters]
 
 
 @router.get("/{water_id}", response_model=WaterRead, summary="Récupérer une eau")
@@ -13,6 +13,25 @@ class Settings(BaseSettings):
     allow_origins: list[str] = ["*"]
     version: str = "0.1.0"
     database_url: str = "sqlite:///./barisense.db"
+    journal_snapshot_every: int = 100_000
+    journal_fsync: bool = False
+    change_log_capacity: int = 100_000
+    live_poll_interval: float = 0.25
+    fast_serialization: bool = False
+    analytics_execution: Literal["inline", "thread", "process"] = "inline"
+    analytics_workers: int = 2
+    analytics_timeout_seconds: float = 30.0
+    # concurrent requests per route group; groups left out are not limited
+    admission_limits: dict[str, int] = {"analytics": 4, "dashboard": 4}
+    admission_queue: int = 16
+    admission_wait_seconds: float = 5.0
+    admission_retry_after_seconds: int = 1
+    metrics_enabled: bool = True
+    # profiling also requires api_key: only key holders may write profiles to disk
+    profiling_enabled: bool = False
+    profiling_directory: str = "./profiles"
+    profiling_header: str = "X-Profile"
+    profiling_interval_seconds: float = 0.001
     api_key_header: str = "X-API-Key"
     api_key: str | None = None
 
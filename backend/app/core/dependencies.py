@@ -1,15 +1,90 @@
 from functools import lru_cache
+from weakref import WeakKeyDictionary
 
 from fastapi import Depends, Header, HTTPException, Request, status
 
+from app.api.metrics import RequestMetrics
 from app.core.config import get_settings
+from app.services.cache import AnalyticsCache
+from app.services.journal import Journal
+from app.services.live import LiveRankings
+from app.services.offload import AnalyticsExecutor
 from app.services.repository import Repository
+from app.services.sqlite_repository import SqliteRepository
+
+MEMORY_URL = "memory://"
+
+_analytics_caches: WeakKeyDictionary[Repository | SqliteRepository, AnalyticsCache] = WeakKeyDictionary()
+_live_rankings: WeakKeyDictionary[Repository | SqliteRepository, LiveRankings] = WeakKeyDictionary()
+
+
+def create_repository(database_url: str) -> Repository | SqliteRepository:
+    """Build the repository selected by `database_url`: `sqlite:///file`, `journal:///dir` or `memory://`."""
+    if database_url == MEMORY_URL:
+        return Repository()
+    if database_url.startswith("journal:///"):
+        settings = get_settings()
+        journal = Journal.from_url(
+            database_url, snapshot_every=settings.journal_snapshot_every, fsync=settings.journal_fsync
+        )
+        return journal.open()
+    if database_url.startswith("sqlite:///"):
+        return SqliteRepository.from_url(database_url)
+    raise ValueError(f"Unsupported database_url: {database_url}")
+
+
+@lru_cache
+def get_repository() -> Repository | SqliteRepository:
+    """Provide the shared repository configured by `Settings.database_url`."""
+    settings = get_settings()
+    repository = create_repository(settings.database_url)
+    repository.limit_changes(settings.change_log_capacity)
+    return repository
+
+
+def close_repository() -> None:
+    """Release the shared repository (journal file, SQLite connections) at shutdown."""
+    if get_repository.cache_info().currsize:
+        get_repository().close()
+        get_repository.cache_clear()
+
+
+@lru_cache
+def get_analytics_executor() -> AnalyticsExecutor:
+    """Provide the executor analytics run on, as selected by `Settings.analytics_execution`."""
+    settings = get_settings()
+    return AnalyticsExecutor(
+        settings.analytics_execution, settings.analytics_workers, settings.analytics_timeout_seconds
+    )
+
+
+def close_analytics_executor() -> None:
+    """Stop the analytics thread or process pool at shutdown."""
+    if get_analytics_executor.cache_info().currsize:
+        get_analytics_executor().close()
+        get_analytics_executor.cache_clear()
+
+
+def get_analytics_cache(repository: Repository = Depends(get_repository)) -> AnalyticsCache:
+    """Provide the analytics cache attached to the active repository."""
+    cache = _analytics_caches.get(repository)
+    if cache is None:
+        cache = _analytics_caches.setdefault(repository, AnalyticsCache())
+    return cache
+
+
+def get_live_rankings(repository: Repository = Depends(get_repository)) -> LiveRankings:
+    """Provide the ranking/verdict broadcaster attached to the active repository."""
+    live = _live_rankings.get(repository)
+    if live is None:
+        live = _live_rankings.setdefault(repository, LiveRankings(repository, get_settings().live_poll_interval))
+    return live
 
 
 @lru_cache
-def get_repository() -> Repository:
-    """Provide a shared in-memory repository."""
-    return Repository()
+def get_request_metrics() -> RequestMetrics:
+    """Provide the request histograms recorded by `MetricsMiddleware`."""
+    return RequestMetrics()
 
 
 def require_api_key(request: Request, x_api_key: str | None = Header(default=None)) -> None:
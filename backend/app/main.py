@@ -1,13 +1,39 @@
+from contextlib import asynccontextmanager
+
 from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.routes import analytics, coffees, health, shots, tastings, verdicts, waters
+from app.api.metrics import MetricsMiddleware
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.api.profiling import PROFILE_ID_HEADER, ProfilingMiddleware
+from app.api.routes import (
+    analytics,
+    changes,
+    coffees,
+    dashboard,
+    health,
+    live,
+    metrics,
+    shots,
+    tastings,
+    verdicts,
+    waters,
+)
 from app.core.config import get_settings
+from app.core.dependencies import close_analytics_executor, close_repository, get_request_metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    close_analytics_executor()
+    close_repository()
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
-    app = FastAPI(title=settings.app_name, version=settings.version)
+    app = FastAPI(title=settings.app_name, version=settings.version, lifespan=lifespan)
+    profiling = settings.profiling_enabled and settings.api_key is not None
 
     app.add_middleware(
         CORSMiddleware,
@@ -15,8 +41,24 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, *([PROFILE_ID_HEADER] if profiling else [])],
     )
 
+    if profiling:
+        app.add_middleware(
+            ProfilingMiddleware,
+            directory=settings.profiling_directory,
+            header=settings.profiling_header,
+            api_key=settings.api_key,
+            api_key_header=settings.api_key_header,
+            interval=settings.profiling_interval_seconds,
+        )
+
+    if settings.metrics_enabled:
+        # outermost, so the recorded latency covers every other middleware
+        app.add_middleware(MetricsMiddleware, metrics=get_request_metrics())
+        app.include_router(metrics.router)
+
     # Public healthcheck
     app.include_router(health.router)
 
@@ -28,6 +70,9 @@ def create_app() -> FastAPI:
     api_router.include_router(tastings.router)
     api_router.include_router(verdicts.router)
     api_router.include_router(analytics.router)
+    api_router.include_router(dashboard.router)
+    api_router.include_router(changes.router)
+    api_router.include_router(live.router)
     app.include_router(api_router)
 
     return app
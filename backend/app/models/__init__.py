@@ -1,35 +1,54 @@
 from app.models.entities import BeverageType, Coffee, CoffeeFormat, Shot, Tasting, Verdict, VerdictStatus, Water, WaterSource
 from app.models.schemas import (
+    AnalyticsSummary,
+    BulkItemError,
+    CoffeeAnalytics,
     CoffeeCreate,
     CoffeeRead,
+    ExtractionSnapshot,
+    GlobalScore,
+    ParameterSuggestion,
     QualityPriceInsight,
     RankedCoffee,
     RetestCandidate,
+    SensorySummary,
     StabilityInsight,
+    ShotBulkResult,
     ShotCreate,
     ShotRead,
+    TastingBulkResult,
     TastingCreate,
     TastingRead,
     VerdictCreate,
     VerdictRead,
     WaterCreate,
+    WaterImpact,
     WaterRead,
 )
 
 __all__ = [
+    "AnalyticsSummary",
     "BeverageType",
+    "BulkItemError",
     "Coffee",
+    "CoffeeAnalytics",
     "CoffeeCreate",
     "CoffeeFormat",
     "CoffeeRead",
+    "ExtractionSnapshot",
+    "GlobalScore",
+    "ParameterSuggestion",
     "QualityPriceInsight",
     "RankedCoffee",
     "RetestCandidate",
+    "SensorySummary",
     "Shot",
+    "ShotBulkResult",
     "ShotCreate",
     "ShotRead",
     "StabilityInsight",
     "Tasting",
+    "TastingBulkResult",
     "TastingCreate",
     "TastingRead",
     "Verdict",
@@ -38,6 +57,7 @@ __all__ = [
     "VerdictStatus",
     "Water",
     "WaterCreate",
+    "WaterImpact",
     "WaterRead",
     "WaterSource",
 ]
@@ -30,7 +30,7 @@ class VerdictStatus(str, Enum):
     A_EVITER = "a_eviter"
 
 
-@dataclass
+@dataclass(slots=True)
 class Coffee:
     name: str
     roaster: str
@@ -44,16 +44,21 @@ class Coffee:
     created_at: datetime = field(default_factory=datetime.utcnow)
 
 
-@dataclass
+@dataclass(slots=True)
 class Water:
     label: str
     source: WaterSource
     brand: Optional[str]
+    mineralization_ppm: Optional[float] = None
+    hardness_ca_mg_l: Optional[float] = None
+    alkalinity_hco3_mg_l: Optional[float] = None
+    ph: Optional[float] = None
+    filter_type: Optional[str] = None
     id: UUID = field(default_factory=uuid4)
     created_at: datetime = field(default_factory=datetime.utcnow)
 
 
-@dataclass
+@dataclass(slots=True)
 class Shot:
     coffee_id: UUID
     beverage_type: BeverageType
@@ -68,7 +73,7 @@ class Shot:
     created_at: datetime = field(default_factory=datetime.utcnow)
 
 
-@dataclass
+@dataclass(slots=True)
 class Tasting:
     shot_id: UUID
     acidity_score: int
@@ -79,12 +84,13 @@ class Tasting:
     finish_score: int
     overall_score: int
     sensory_mean: float
+    weighted_sensory_mean: Optional[float] = None
     comments: Optional[str] = None
     id: UUID = field(default_factory=uuid4)
     created_at: datetime = field(default_factory=datetime.utcnow)
 
 
-@dataclass
+@dataclass(slots=True)
 class Verdict:
     coffee_id: UUID
     status: VerdictStatus
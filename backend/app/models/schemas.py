@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import date, datetime
+from enum import Enum
 from typing import Annotated, Literal
 from uuid import UUID
 
@@ -174,3 +175,142 @@ class RetestCandidate(BaseModel):
     name: str
     roaster: str
     reason: str
+
+
+class ExtractionSnapshot(BaseModel):
+    shot_id: UUID
+    beverage_type: BeverageType
+    grind_setting: str
+    brew_ratio: float
+    extraction_time_seconds: float
+    water_id: UUID | None = None
+    water_label: str | None = None
+    diagnosis: str
+    recommendations: list[str]
+    created_at: datetime
+
+
+class ParameterSuggestion(BaseModel):
+    beverage_type: BeverageType
+    recommended_ratio: float
+    recommended_extraction_time: float
+    suggested_grind: str | None = None
+    rationale: str
+
+
+class SensorySummary(BaseModel):
+    mean: float | None = None
+    weighted_mean: float | None = None
+    sample_size: int
+
+
+class GlobalScore(BaseModel):
+    score: float
+    verdict: str
+    details: str
+
+
+class WaterImpact(BaseModel):
+    water_id: UUID
+    label: str
+    source: WaterSource
+    classification: str
+    impact_on_extraction: str
+    impact_on_sensory: str
+    average_brew_ratio: float | None = None
+    average_sensory_mean: float | None = None
+    rank: int
+
+
+class CoffeeAnalytics(BaseModel):
+    coffee: CoffeeRead
+    extraction_history: list[ExtractionSnapshot]
+    parameter_suggestions: list[ParameterSuggestion]
+    sensory_summary: SensorySummary
+    global_score: GlobalScore
+    water_impacts: list[WaterImpact]
+
+
+class AnalyticsSummary(BaseModel):
+    coffees: list[CoffeeAnalytics]
+    water_rankings: list[WaterImpact]
+
+
+class DashboardSection(str, Enum):
+    COFFEES = "coffees"
+    WATERS = "waters"
+    SHOTS = "shots"
+    TASTINGS = "tastings"
+    VERDICTS = "verdicts"
+    SUMMARY = "summary"
+    RANKINGS = "rankings"
+    QUALITY_PRICE = "quality_price"
+    STABILITY = "stability"
+    RETEST = "retest"
+
+
+class Dashboard(BaseModel):
+    """Écran d'accueil en un seul appel ; les sections non demandées valent null."""
+
+    coffees: list[CoffeeRead] | None = None
+    waters: list[WaterRead] | None = None
+    shots: list[ShotRead] | None = Field(None, description="Shots les plus récents")
+    tastings: list[TastingRead] | None = Field(None, description="Dégustations les plus récentes")
+    verdicts: list[VerdictRead] | None = None
+    summary: AnalyticsSummary | None = None
+    rankings: dict[str, list[RankedCoffee]] | None = Field(
+        None, description="Classement global (clé `global`) et par type de boisson"
+    )
+    quality_price: list[QualityPriceInsight] | None = None
+    stability: list[StabilityInsight] | None = None
+    retest: list[RetestCandidate] | None = None
+
+
+class ChangeFeed(BaseModel):
+    """Entités modifiées depuis une version, pour resynchroniser un client hors ligne."""
+
+    epoch: int = Field(..., description="Identifiant de la séquence de versions, à renvoyer avec `since`")
+    version: int = Field(..., description="Version atteinte, à passer en `since` au prochain appel")
+    full: bool = Field(
+        ..., description="Historique insuffisant : remplacer toutes les données locales par celles-ci"
+    )
+    coffees: list[CoffeeRead]
+    waters: list[WaterRead]
+    shots: list[ShotRead]
+    tastings: list[TastingRead]
+    verdicts: list[VerdictRead]
+    deleted: dict[str, list[UUID]] = Field(..., description="Identifiants supprimés, par collection")
+
+
+class RankingDiff(BaseModel):
+    """Lignes du classement global modifiées depuis l'événement précédent."""
+
+    version: int
+    full: bool = Field(..., description="Classement complet : remplace l'état local")
+    updated: list[RankedCoffee]
+    removed: list[UUID] = Field(..., description="Cafés sortis du classement")
+
+
+class VerdictDiff(BaseModel):
+    """Verdicts créés, modifiés ou supprimés depuis l'événement précédent."""
+
+    version: int
+    full: bool = Field(..., description="Liste complète : remplace l'état local")
+    updated: list[VerdictRead]
+    removed: list[UUID]
+
+
+class BulkItemError(BaseModel):
+    index: int = Field(..., description="Position de l'élément dans la liste envoyée")
+    field: str | None = Field(None, description="Champ en cause, le cas échéant")
+    detail: str
+
+
+class ShotBulkResult(BaseModel):
+    created: list[ShotRead]
+    errors: list[BulkItemError]
+
+
+class TastingBulkResult(BaseModel):
+    created: list[TastingRead]
+    errors: list[BulkItemError]
@@ -1,9 +1,30 @@
+from __future__ import annotations
+
 from collections import defaultdict
+from dataclasses import dataclass
+from math import sqrt
 from statistics import mean, pstdev
-from typing import Iterable
-
-from app.models.entities import VerdictStatus
-from app.models.schemas import ShotCreate
+from typing import TYPE_CHECKING, Iterable
+from uuid import UUID
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from app.services.columns import ColumnStore, EntityCodes
+
+from app.models.entities import BeverageType, Coffee, Shot, Tasting, VerdictStatus, Water
+from app.models.schemas import (
+    AnalyticsSummary,
+    CoffeeAnalytics,
+    ExtractionSnapshot,
+    GlobalScore,
+    ParameterSuggestion,
+    RankedCoffee,
+    SensorySummary,
+    ShotCreate,
+    TastingCreate,
+    WaterImpact,
+)
 
 REFERENCE_DOSE_GRAMS = 18.0
 TARGET_BREW_RATIOS: dict[BeverageType, float] = {
@@ -25,6 +46,7 @@ SENSORY_LABEL_TO_SCORE = {
     "insipide": 1,
     "doux": 2,
     "équilibré": 3,
+    "equilibre": 3,
     "expressif": 4,
     "intense": 5,
 }
@@ -66,19 +88,6 @@ def compute_sensory_mean(scores: Iterable[int]) -> float:
     return round(mean(list(scores)), 2)
 
 
-def verdict_from_mean(score: float) -> VerdictStatus:
-    scores = [
-        tasting.acidity,
-        tasting.bitterness,
-        tasting.body,
-        tasting.aroma,
-        tasting.balance,
-        tasting.finish,
-        tasting.overall,
-    ]
-    return round(mean(scores), 2)
-
-
 def compute_weighted_sensory_mean(
     tasting: TastingCreate, weights: dict[str, float] | None = None
 ) -> float:
@@ -120,7 +129,10 @@ def verdict_label(status: VerdictStatus) -> str:
 def stability_label(scores: list[float]) -> str:
     if len(scores) < 2:
         return "données insuffisantes"
-    spread = pstdev(scores)
+    return spread_label(pstdev(scores))
+
+
+def spread_label(spread: float) -> str:
     if spread < 0.25:
         return "très stable"
     if spread < 0.5:
@@ -143,6 +155,40 @@ def aggregate_quality_per_price(avg_quality: float, cost_per_shot: float) -> str
     return "défavorable"
 
 
+@dataclass(slots=True)
+class SensoryAggregate:
+    """Running count, sum and sum of squares of sensory means, kept in hundredths to stay exact."""
+
+    count: int = 0
+    total: int = 0
+    total_sq: int = 0
+
+    def add(self, sensory_mean: float, weight: int = 1) -> None:
+        hundredths = round(sensory_mean * 100)
+        self.count += weight
+        self.total += weight * hundredths
+        self.total_sq += weight * hundredths * hundredths
+
+    def remove(self, sensory_mean: float) -> None:
+        self.add(sensory_mean, weight=-1)
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / (100 * self.count) if self.count else None
+
+    @property
+    def spread(self) -> float | None:
+        """Population standard deviation, as `statistics.pstdev` would return."""
+        if not self.count:
+            return None
+        return sqrt(max(0, self.count * self.total_sq - self.total * self.total)) / (100 * self.count)
+
+    def stability_label(self) -> str:
+        if self.count < 2:
+            return "données insuffisantes"
+        return spread_label(self.spread)
+
+
 def summarize_rankings(means_by_coffee: dict) -> list[tuple]:
     ordered = sorted(means_by_coffee.items(), key=lambda item: item[1]["mean"], reverse=True)
     enriched: list[tuple] = []
@@ -160,73 +206,180 @@ def mean_by_key(items: Iterable[tuple[object, float]]) -> dict[object, float]:
     for key, value in items:
         grouped[key].append(value)
     return {key: mean(values) for key, values in grouped.items()}
+
+
+def verdict_from_score(score: float) -> str:
+    """Map a blended global score to a public verdict label."""
+    if score >= 4.5:
+        return "racheter"
+    if score >= 3.5:
+        return "à affiner"
+    if score >= 2.5:
         return "en observation"
     return "à éviter"
 
 
-def compute_extraction_score(shot: Shot) -> float:
-    """Score extraction consistency against target brew ratios and shot duration."""
-    target = TARGET_BREW_RATIOS.get(shot.beverage_type, 2.0)
-    ratio_penalty = abs(shot.brew_ratio - target) * 1.4
-    time_penalty = 0.0
-    if shot.extraction_time_seconds < 22:
-        time_penalty = (22 - shot.extraction_time_seconds) * 0.04
-    elif shot.extraction_time_seconds > 36:
-        time_penalty = (shot.extraction_time_seconds - 36) * 0.04
-    score = 5 - min(4, ratio_penalty + time_penalty)
-    return round(max(1.0, min(score, 5.0)), 2)
+BEVERAGE_CODES: dict[BeverageType, int] = {beverage_type: code for code, beverage_type in enumerate(BeverageType)}
+_TARGET_RATIO_BY_CODE = np.array([TARGET_BREW_RATIOS.get(beverage_type, 2.0) for beverage_type in BeverageType])
+
+# code tables shared by the scalar helpers and the columnar kernel
+DIAGNOSIS_LABELS = ("dans la cible", "sous-extrait", "sur-extrait")
+DIAGNOSIS_ADVICE = (
+    None,
+    "Resserrer la mouture ou prolonger l'extraction.",
+    "Ouvrir légèrement la mouture ou réduire le yield.",
+)
+TIMING_ADVICE = (
+    None,
+    "Augmenter la finesse pour rallonger le débit.",
+    "Baisser la dose ou ouvrir la mouture pour accélérer.",
+)
+NO_WATER = -1
+WATER_PROFILES = (
+    ("équilibrée", "Extraction stable", "Profil aromatique neutre"),
+    (
+        "faible minéralisation",
+        "Risque de sous-extraction, peu de résistance au débit",
+        "Acidité plus tranchante, corps plus léger",
+    ),
+    (
+        "fortement minéralisée",
+        "Peut pousser la sur-extraction et la lenteur de débit",
+        "Amertume accrue, texture plus lourde",
+    ),
+    ("tampon faible", "Ph instable, variations sensibles", "Acidité perçue plus haute"),
+)
+
+
+@dataclass(frozen=True)
+class ExtractionBatch:
+    """Columnar output of `score_extractions`, one row per shot."""
+
+    scores: np.ndarray
+    diagnosis_codes: np.ndarray
+    timing_codes: np.ndarray
+    water_codes: np.ndarray
+
+    def diagnosis(self, row: int) -> tuple[str, list[str]]:
+        return _diagnosis_from_codes(
+            int(self.diagnosis_codes[row]), int(self.timing_codes[row]), int(self.water_codes[row])
+        )
 
 
-def diagnose_extraction(shot: Shot, water: Water | None) -> tuple[str, list[str]]:
-    """Generate a concise extraction diagnosis and remediation advice."""
-    target = TARGET_BREW_RATIOS.get(shot.beverage_type, 2.0)
-    ratio_delta = shot.brew_ratio - target
+def classify_water_profiles(mineralization, hardness, alkalinity) -> np.ndarray:
+    """Vectorised water classification; rows whose mineralization is NaN have no water."""
+    mineralization = np.asarray(mineralization, dtype=np.float64)
+    hardness = np.asarray(hardness, dtype=np.float64)
+    alkalinity = np.asarray(alkalinity, dtype=np.float64)
+    codes = np.select(
+        [
+            (mineralization < 70) | (hardness < 25),
+            (mineralization > 180) | (hardness > 90) | (alkalinity > 120),
+            alkalinity < 40,
+        ],
+        [1, 2, 3],
+        default=0,
+    ).astype(np.int8)
+    codes[np.isnan(mineralization)] = NO_WATER
+    return codes
+
+
+def score_extractions(
+    brew_ratio,
+    extraction_time,
+    beverage_code,
+    mineralization=None,
+    hardness=None,
+    alkalinity=None,
+) -> ExtractionBatch:
+    """Score and diagnose many shots in one vectorised call.
+
+    Water columns are optional; a NaN mineralization marks a shot without water and a
+    missing measure on a known water must be passed as 0, as `classify_water_profile` does.
+    """
+    brew_ratio = np.asarray(brew_ratio, dtype=np.float64)
+    extraction_time = np.asarray(extraction_time, dtype=np.float64)
+    target = _TARGET_RATIO_BY_CODE[np.asarray(beverage_code, dtype=np.intp)]
+
+    ratio_delta = brew_ratio - target
+    ratio_penalty = np.abs(ratio_delta) * 1.4
+    too_fast = extraction_time < 22
+    too_slow = extraction_time > 36
+    time_penalty = np.where(
+        too_fast, (22 - extraction_time) * 0.04, np.where(too_slow, (extraction_time - 36) * 0.04, 0.0)
+    )
+    score = 5 - np.minimum(4, ratio_penalty + time_penalty)
+    scores = np.round(np.clip(score, 1.0, 5.0), 2)
+
+    diagnosis_codes = np.select([ratio_delta < -0.2, ratio_delta > 0.3], [1, 2], default=0).astype(np.int8)
+    timing_codes = np.select([too_fast, too_slow], [1, 2], default=0).astype(np.int8)
+    if mineralization is None:
+        water_codes = np.full(brew_ratio.shape, NO_WATER, dtype=np.int8)
+    else:
+        water_codes = classify_water_profiles(mineralization, hardness, alkalinity)
+    return ExtractionBatch(scores, diagnosis_codes, timing_codes, water_codes)
+
+
+def score_shots(shots: list[Shot], waters_by_id: dict[UUID, Water]) -> ExtractionBatch:
+    """Build the kernel columns from shot and water entities and score them."""
+    waters = [waters_by_id.get(shot.water_id) for shot in shots]
+    return score_extractions(
+        [shot.brew_ratio for shot in shots],
+        [shot.extraction_time_seconds for shot in shots],
+        [BEVERAGE_CODES[shot.beverage_type] for shot in shots],
+        [(water.mineralization_ppm or 0) if water else np.nan for water in waters],
+        [(water.hardness_ca_mg_l or 0) if water else np.nan for water in waters],
+        [(water.alkalinity_hco3_mg_l or 0) if water else np.nan for water in waters],
+    )
+
+
+def score_columns(columns: ColumnStore, waters_by_id: dict[UUID, Water]) -> ExtractionBatch:
+    """Score every row of the shot columns; a row's result is indexed by its row number."""
+    shots = columns.shots
+    # water codes index these lookups; the trailing NaN entry serves shots without water (-1)
+    waters = [waters_by_id.get(water_id) for water_id in columns.waters.ids] + [None]
+    water_rows = shots.column("water")
+    return score_extractions(
+        shots.column("brew_ratio"),
+        shots.column("extraction_time"),
+        shots.column("beverage"),
+        np.array([(water.mineralization_ppm or 0) if water else np.nan for water in waters])[water_rows],
+        np.array([(water.hardness_ca_mg_l or 0) if water else np.nan for water in waters])[water_rows],
+        np.array([(water.alkalinity_hco3_mg_l or 0) if water else np.nan for water in waters])[water_rows],
+    )
+
+
+def _diagnosis_from_codes(diagnosis_code: int, timing_code: int, water_code: int) -> tuple[str, list[str]]:
     advice: list[str] = []
-    diagnosis = "dans la cible"
-
-    if ratio_delta < -0.2:
-        diagnosis = "sous-extrait"
-        advice.append("Resserrer la mouture ou prolonger l'extraction.")
-    elif ratio_delta > 0.3:
-        diagnosis = "sur-extrait"
-        advice.append("Ouvrir légèrement la mouture ou réduire le yield.")
-
-    if shot.extraction_time_seconds < 22:
-        advice.append("Augmenter la finesse pour rallonger le débit.")
-    elif shot.extraction_time_seconds > 36:
-        advice.append("Baisser la dose ou ouvrir la mouture pour accélérer.")
-
-    if water:
-        classification, impact_extraction, impact_sensory = classify_water_profile(water)
+    if DIAGNOSIS_ADVICE[diagnosis_code]:
+        advice.append(DIAGNOSIS_ADVICE[diagnosis_code])
+    if TIMING_ADVICE[timing_code]:
+        advice.append(TIMING_ADVICE[timing_code])
+    if water_code != NO_WATER:
+        classification, impact_extraction, impact_sensory = WATER_PROFILES[water_code]
         advice.append(f"Eau {classification}: {impact_extraction}.")
         if impact_sensory not in impact_extraction:
             advice.append(impact_sensory)
-    return diagnosis, advice
+    return DIAGNOSIS_LABELS[diagnosis_code], advice
+
+
+def compute_extraction_score(shot: Shot) -> float:
+    """Score extraction consistency against target brew ratios and shot duration."""
+    return float(score_shots([shot], {}).scores[0])
+
+
+def diagnose_extraction(shot: Shot, water: Water | None) -> tuple[str, list[str]]:
+    """Generate a concise extraction diagnosis and remediation advice."""
+    waters_by_id = {shot.water_id: water} if water else {}
+    return score_shots([shot], waters_by_id).diagnosis(0)
 
 
 def classify_water_profile(water: Water) -> tuple[str, str, str]:
     """Classify water into intuitive buckets and state expected impacts."""
-    mineralization = water.mineralization_ppm or 0
-    hardness = water.hardness_ca_mg_l or 0
-    alkalinity = water.alkalinity_hco3_mg_l or 0
-    classification = "équilibrée"
-    extraction_bias = "Extraction stable"
-    sensory_bias = "Profil aromatique neutre"
-
-    if mineralization < 70 or hardness < 25:
-        classification = "faible minéralisation"
-        extraction_bias = "Risque de sous-extraction, peu de résistance au débit"
-        sensory_bias = "Acidité plus tranchante, corps plus léger"
-    elif mineralization > 180 or hardness > 90 or alkalinity > 120:
-        classification = "fortement minéralisée"
-        extraction_bias = "Peut pousser la sur-extraction et la lenteur de débit"
-        sensory_bias = "Amertume accrue, texture plus lourde"
-    elif alkalinity < 40:
-        classification = "tampon faible"
-        extraction_bias = "Ph instable, variations sensibles"
-        sensory_bias = "Acidité perçue plus haute"
-
-    return classification, extraction_bias, sensory_bias
+    code = classify_water_profiles(
+        [water.mineralization_ppm or 0], [water.hardness_ca_mg_l or 0], [water.alkalinity_hco3_mg_l or 0]
+    )[0]
+    return WATER_PROFILES[code]
 
 
 def compute_water_impact(
@@ -234,11 +387,18 @@ def compute_water_impact(
 ) -> WaterImpact:
     """Aggregate extraction and sensoriel impacts for a given water."""
     shots_with_water = [shot for shot in shots if shot.water_id == water.id]
-    tastings_with_water = [t for t in tastings if t.shot_id in {s.id for s in shots_with_water}]
+    shot_ids = {s.id for s in shots_with_water}
+    tastings_with_water = [t for t in tastings if t.shot_id in shot_ids]
     avg_ratio = round(mean([s.brew_ratio for s in shots_with_water]), 2) if shots_with_water else None
     avg_sensory = (
         round(mean([t.sensory_mean for t in tastings_with_water]), 2) if tastings_with_water else None
     )
+    return _water_impact(water, avg_ratio, avg_sensory, rank)
+
+
+def _water_impact(
+    water: Water, average_brew_ratio: float | None, average_sensory_mean: float | None, rank: int
+) -> WaterImpact:
     classification, impact_extraction, impact_sensory = classify_water_profile(water)
     return WaterImpact(
         water_id=water.id,
@@ -247,8 +407,8 @@ def compute_water_impact(
         classification=classification,
         impact_on_extraction=impact_extraction,
         impact_on_sensory=impact_sensory,
-        average_brew_ratio=avg_ratio,
-        average_sensory_mean=avg_sensory,
+        average_brew_ratio=average_brew_ratio,
+        average_sensory_mean=average_sensory_mean,
         rank=rank,
     )
 
@@ -261,6 +421,236 @@ def compute_global_score(sensory_mean: float | None, extraction_scores: list[flo
     return round(score, 2)
 
 
+def coffee_verdict_label(repository, coffee_id: UUID) -> str:
+    """Stored verdict of a coffee, or the one implied by its overall sensory mean."""
+    verdict = repository.verdict_for_coffee(coffee_id)
+    if verdict:
+        return verdict_label(verdict.status)
+    aggregate = repository.sensory_aggregate(coffee_id)
+    if aggregate is None:
+        return "en observation"
+    return verdict_label(verdict_from_mean(aggregate.mean))
+
+
+def build_rankings(
+    repository,
+    water_id: UUID | None = None,
+    verdict_labels: dict[UUID, str] | None = None,
+    coffees: list[Coffee] | None = None,
+    global_aggregates: dict[UUID, SensoryAggregate] | None = None,
+) -> dict[BeverageType | None, list[RankedCoffee]]:
+    """Rank coffees globally (key None) and per beverage type in a single pass over coffees.
+
+    Without a water filter the repository's running aggregates are used as is; with one,
+    aggregates are rebuilt by a scan of the tasting columns. `verdict_labels` memoizes the
+    coffee verdict labels; it, `coffees` and the unfiltered `global_aggregates` may be shared
+    with other sections built on the same snapshot.
+    """
+    repository = repository.snapshot()
+    keys: tuple[BeverageType | None, ...] = (None, *BeverageType)
+    if water_id is None:
+        aggregates = {key: repository.sensory_aggregates(key) for key in BeverageType}
+        aggregates[None] = repository.sensory_aggregates() if global_aggregates is None else global_aggregates
+    else:
+        aggregates = water_sensory_aggregates(repository.columns, water_id)
+
+    means: dict[BeverageType | None, dict] = {key: {} for key in keys}
+    for coffee in repository.list_coffees() if coffees is None else coffees:
+        for key in keys:
+            aggregate = aggregates[key].get(coffee.id)
+            if aggregate is not None:
+                means[key][coffee.id] = {"coffee": coffee, "mean": aggregate.mean}
+
+    verdict_labels = {} if verdict_labels is None else verdict_labels
+    rankings: dict[BeverageType | None, list[RankedCoffee]] = {}
+    for key in keys:
+        rankings[key] = []
+        for position, coffee_id, data in summarize_rankings(means[key]):
+            if coffee_id not in verdict_labels:
+                verdict_labels[coffee_id] = coffee_verdict_label(repository, coffee_id)
+            rankings[key].append(
+                RankedCoffee(
+                    position=position,
+                    coffee_id=coffee_id,
+                    name=data["coffee"].name,
+                    roaster=data["coffee"].roaster,
+                    score_label=mean_to_label(data["mean"]),
+                    verdict_label=verdict_labels[coffee_id],
+                    water_filter=str(water_id) if water_id else None,
+                    beverage_filter=key.value if key else None,
+                )
+            )
+    return rankings
+
+
+def _hundredths(values: np.ndarray) -> np.ndarray:
+    # sensory means and brew ratios are stored rounded to two decimals
+    return np.rint(values * 100)
+
+
+def _grouped(keys: np.ndarray, *values: np.ndarray) -> tuple[list[int], list[int], list[list[float]]]:
+    """Distinct keys with the row count and the sum of each value column under each key."""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(unique))
+    totals = [np.bincount(inverse, weights=column, minlength=len(unique)).tolist() for column in values]
+    return unique.tolist(), counts.tolist(), totals
+
+
+def _grouped_means(keys: np.ndarray, values: np.ndarray) -> dict[int, float]:
+    """Mean per key of two-decimal values, equal to `round(statistics.mean(group), 2)`."""
+    unique, counts, (totals,) = _grouped(keys, _hundredths(values))
+    return _rounded_means(keys, values, unique, counts, totals)
+
+
+def _rounded_means(
+    keys: np.ndarray, values: np.ndarray, unique: list[int], counts: list[int], totals: list[float]
+) -> dict[int, float]:
+    """Round the mean of each `unique` key from its row count and its sum of hundredths.
+
+    Exact integer sums of hundredths decide the rounding, except for a mean lying exactly
+    halfway between two hundredths: that one depends on the binary values, so it is
+    recomputed from the rows of `keys`/`values` with `statistics.mean` like the object-based
+    summary did.
+    """
+    ties = {
+        key
+        for key, count, total in zip(unique, counts, totals)
+        if (2 * int(total)) % count == 0 and (2 * int(total) // count) % 2
+    }
+    tied_groups: dict[int, list[float]] = defaultdict(list)
+    if ties:
+        tied = np.isin(keys, list(ties))
+        for key, value in zip(keys[tied].tolist(), values[tied].tolist()):
+            tied_groups[key].append(value)
+    return {
+        key: round(mean(tied_groups[key]), 2) if key in ties else round(total / (100 * count), 2)
+        for key, count, total in zip(unique, counts, totals)
+    }
+
+
+def water_sensory_aggregates(
+    columns: ColumnStore, water_id: UUID
+) -> dict[BeverageType | None, dict[UUID, SensoryAggregate]]:
+    """Sensory aggregates per coffee of the tastings whose shot used `water_id`, globally (None)
+    and per beverage type."""
+    aggregates: dict[BeverageType | None, dict[UUID, SensoryAggregate]] = {
+        key: {} for key in (None, *BeverageType)
+    }
+    water_code = columns.waters.get(water_id)
+    if water_code is None:
+        return aggregates
+    shots, tastings = columns.shots, columns.tastings
+    shot_rows = tastings.column("shot")
+    selected = tastings.live & (shots.column("water")[shot_rows] == water_code)
+    rows = shot_rows[selected]
+    coffee_codes = shots.column("coffee")[rows]
+    beverage_codes = shots.column("beverage")[rows]
+    hundredths = _hundredths(columns.sensory_means()[selected])
+    coffee_ids = columns.coffees.ids
+    for key in aggregates:
+        mask = slice(None) if key is None else beverage_codes == BEVERAGE_CODES[key]
+        values = hundredths[mask]
+        unique, counts, (totals, squares) = _grouped(coffee_codes[mask], values, values * values)
+        aggregates[key] = {
+            coffee_ids[code]: SensoryAggregate(count, int(total), int(square))
+            for code, count, total, square in zip(unique, counts, totals, squares)
+        }
+    return aggregates
+
+
+@dataclass
+class _SummaryIndex:
+    """Everything a summary needs beyond the shot objects, computed by scans of the columns.
+
+    Shot groups keep the order of the repository listing (newest first) so that ties are
+    broken as when filtering that listing; per-coffee and per-water figures are keyed by the
+    column store's integer codes.
+    """
+
+    waters: list[Water]
+    waters_by_id: dict[UUID, Water]
+    shots_by_coffee: dict[UUID, list[Shot]]
+    extraction: ExtractionBatch
+    extraction_rows: dict[UUID, int]
+    # per shot row: best (weighted, else plain) sensory mean of its tastings, 0 when untasted
+    best_tasting_scores: np.ndarray
+    tasted: np.ndarray
+    coffee_codes: EntityCodes
+    water_codes: EntityCodes
+    sensory_means: dict[int, float]
+    weighted_means: dict[int, float]
+    sample_sizes: dict[int, int]
+    # keyed by water code, then by coffee/water pair code
+    brew_ratio_by_water: dict[int, float]
+    sensory_by_water: dict[int, float]
+    brew_ratio_by_pair: dict[int, float]
+    sensory_by_pair: dict[int, float]
+    water_slots: int
+
+    @classmethod
+    def build(
+        cls, repository, waters: list[Water], aggregates: dict[UUID, SensoryAggregate]
+    ) -> _SummaryIndex:
+        columns: ColumnStore = repository.columns
+        shots, tastings = columns.shots, columns.tastings
+        waters_by_id = {water.id: water for water in waters}
+        shots_by_coffee: dict[UUID, list[Shot]] = defaultdict(list)
+        for shot in repository.list_shots():
+            shots_by_coffee[shot.coffee_id].append(shot)
+
+        live_shots = shots.live
+        shot_coffees = shots.column("coffee")[live_shots]
+        shot_waters = shots.column("water")[live_shots]
+        brew_ratios = shots.column("brew_ratio")[live_shots]
+
+        live_tastings = tastings.live
+        tasting_rows = tastings.column("shot")[live_tastings]
+        tasting_coffees = shots.column("coffee")[tasting_rows]
+        tasting_waters = shots.column("water")[tasting_rows]
+        all_sensory = columns.sensory_means()
+        sensory = all_sensory[live_tastings]
+        weighted = columns.weighted_or_sensory_means(all_sensory)[live_tastings]
+
+        best_tasting_scores = np.zeros(shots.size)
+        np.maximum.at(best_tasting_scores, tasting_rows, weighted)
+        tasted = np.bincount(tasting_rows, minlength=shots.size) > 0
+
+        # per-coffee counts and sums are the repository's running aggregates, not a new scan
+        coffee_aggregates = list(aggregates.items())
+        unique = [columns.coffees.get(coffee_id) for coffee_id, _ in coffee_aggregates]
+        counts = [aggregate.count for _, aggregate in coffee_aggregates]
+        totals = [aggregate.total for _, aggregate in coffee_aggregates]
+        # NO_WATER (-1) shifts to 0, so pair codes never collide across coffees
+        water_slots = len(columns.waters) + 1
+        return cls(
+            waters=waters,
+            waters_by_id=waters_by_id,
+            shots_by_coffee=shots_by_coffee,
+            extraction=score_columns(columns, waters_by_id),
+            extraction_rows=shots.rows,
+            best_tasting_scores=best_tasting_scores,
+            tasted=tasted,
+            coffee_codes=columns.coffees,
+            water_codes=columns.waters,
+            sensory_means=_rounded_means(tasting_coffees, sensory, unique, counts, totals),
+            weighted_means=_grouped_means(tasting_coffees, weighted),
+            sample_sizes=dict(zip(unique, counts)),
+            brew_ratio_by_water=_grouped_means(shot_waters, brew_ratios),
+            sensory_by_water=_grouped_means(tasting_waters, sensory),
+            brew_ratio_by_pair=_grouped_means(_pair_codes(shot_coffees, shot_waters, water_slots), brew_ratios),
+            sensory_by_pair=_grouped_means(_pair_codes(tasting_coffees, tasting_waters, water_slots), sensory),
+            water_slots=water_slots,
+        )
+
+    def pair_code(self, coffee_code: int, water: Water) -> int | None:
+        water_code = self.water_codes.get(water.id)
+        return None if water_code is None else coffee_code * self.water_slots + water_code + 1
+
+
+def _pair_codes(coffee_codes: np.ndarray, water_codes: np.ndarray, water_slots: int) -> np.ndarray:
+    return coffee_codes.astype(np.int64) * water_slots + water_codes + 1
+
+
 class AnalyticsEngine:
     """Centralise the analytics logic to keep routers slim."""
 
@@ -268,31 +658,36 @@ class AnalyticsEngine:
         self.repository = repository
         self.sensory_weights = sensory_weights or DEFAULT_SENSORY_WEIGHTS
 
-    def build_summary(self) -> AnalyticsSummary:
-        coffees = list(self.repository.list_coffees())
-        waters = list(self.repository.list_waters())
-        shots = list(self.repository.list_shots())
-        tastings = list(self.repository.list_tastings())
-
-        coffee_blocks = [
-            self._build_coffee_analytics(coffee, waters, shots, tastings) for coffee in coffees
-        ]
-        water_rankings = self._rank_waters(waters, shots, tastings)
+    def build_summary(
+        self,
+        coffees: list[Coffee] | None = None,
+        waters: list[Water] | None = None,
+        aggregates: dict[UUID, SensoryAggregate] | None = None,
+    ) -> AnalyticsSummary:
+        """Summary of every coffee and water; the listings and the sensory aggregates may be
+        passed in when another section already read them from the same snapshot."""
+        repository = self.repository.snapshot()
+        if coffees is None:
+            coffees = repository.list_coffees()
+        if waters is None:
+            waters = repository.list_waters()
+        if aggregates is None:
+            aggregates = repository.sensory_aggregates()
+        index = _SummaryIndex.build(repository, waters, aggregates)
+        coffee_blocks = [self._build_coffee_analytics(coffee, index) for coffee in coffees]
+        water_rankings = self._rank_waters(index)
         return AnalyticsSummary(coffees=coffee_blocks, water_rankings=water_rankings)
 
-    def _build_coffee_analytics(
-        self, coffee: Coffee, waters: list[Water], shots: list[Shot], tastings: list[Tasting]
-    ) -> CoffeeAnalytics:
-        coffee_shots = [shot for shot in shots if shot.coffee_id == coffee.id]
-        tasting_index: dict[UUID, list[Tasting]] = defaultdict(list)
-        for tasting in tastings:
-            tasting_index[tasting.shot_id].append(tasting)
+    def _build_coffee_analytics(self, coffee: Coffee, index: _SummaryIndex) -> CoffeeAnalytics:
+        coffee_shots = index.shots_by_coffee.get(coffee.id, [])
+        coffee_code = index.coffee_codes.get(coffee.id)
 
         extraction_history: list[ExtractionSnapshot] = []
         extraction_scores: list[float] = []
         for shot in sorted(coffee_shots, key=lambda s: s.created_at):
-            water = next((w for w in waters if w.id == shot.water_id), None)
-            diagnosis, recos = diagnose_extraction(shot, water)
+            water = index.waters_by_id.get(shot.water_id)
+            row = index.extraction_rows[shot.id]
+            diagnosis, recos = index.extraction.diagnosis(row)
             extraction_history.append(
                 ExtractionSnapshot(
                     shot_id=shot.id,
@@ -307,18 +702,12 @@ class AnalyticsEngine:
                     created_at=shot.created_at,
                 )
             )
-            extraction_scores.append(compute_extraction_score(shot))
-
-        sensory_scores = [t.sensory_mean for t in tastings if t.shot_id in {s.id for s in coffee_shots}]
-        weighted_scores = [
-            t.weighted_sensory_mean or t.sensory_mean
-            for t in tastings
-            if t.shot_id in {s.id for s in coffee_shots}
-        ]
+            extraction_scores.append(float(index.extraction.scores[row]))
+
         sensory_summary = SensorySummary(
-            mean=round(mean(sensory_scores), 2) if sensory_scores else None,
-            weighted_mean=round(mean(weighted_scores), 2) if weighted_scores else None,
-            sample_size=len(sensory_scores),
+            mean=index.sensory_means.get(coffee_code),
+            weighted_mean=index.weighted_means.get(coffee_code),
+            sample_size=index.sample_sizes.get(coffee_code, 0),
         )
         global_score_value = compute_global_score(sensory_summary.weighted_mean, extraction_scores)
         global_score = GlobalScore(
@@ -327,8 +716,8 @@ class AnalyticsEngine:
             details="Mélange pondéré extraction/sensoriel",
         )
 
-        parameter_suggestions = self._build_parameter_suggestions(coffee_shots, tasting_index)
-        water_impacts = self._summarise_water_impacts(coffee_shots, waters, tasting_index)
+        parameter_suggestions = self._build_parameter_suggestions(coffee_shots, index)
+        water_impacts = self._summarise_water_impacts(coffee_code, index) if coffee_code is not None else []
 
         return CoffeeAnalytics(
             coffee=coffee,
@@ -339,9 +728,7 @@ class AnalyticsEngine:
             water_impacts=water_impacts,
         )
 
-    def _build_parameter_suggestions(
-        self, shots: list[Shot], tasting_index: dict
-    ) -> list[ParameterSuggestion]:
+    def _build_parameter_suggestions(self, shots: list[Shot], index: _SummaryIndex) -> list[ParameterSuggestion]:
         suggestions: list[ParameterSuggestion] = []
         for beverage_type in {shot.beverage_type for shot in shots}:
             relevant_shots = [shot for shot in shots if shot.beverage_type == beverage_type]
@@ -349,13 +736,12 @@ class AnalyticsEngine:
                 continue
             shot_scores = []
             for shot in relevant_shots:
-                tastings = tasting_index.get(shot.id, [])
-                best_tasting_score = max((t.weighted_sensory_mean or t.sensory_mean for t in tastings), default=0)
-                shot_scores.append((best_tasting_score, shot))
+                row = index.extraction_rows[shot.id]
+                shot_scores.append((index.best_tasting_scores[row], shot))
             _, best_shot = max(shot_scores, key=lambda pair: pair[0])
             target_ratio = TARGET_BREW_RATIOS.get(beverage_type, 2.0)
             rationale = "Basé sur le meilleur score sensoriel disponible"
-            if not tasting_index.get(best_shot.id):
+            if not index.tasted[index.extraction_rows[best_shot.id]]:
                 rationale = "Basé sur la stabilité d'extraction faute de dégustation"
             suggestions.append(
                 ParameterSuggestion(
@@ -368,16 +754,15 @@ class AnalyticsEngine:
             )
         return suggestions
 
-    def _summarise_water_impacts(
-        self, shots: list[Shot], waters: list[Water], tasting_index: dict
-    ) -> list[WaterImpact]:
+    def _summarise_water_impacts(self, coffee_code: int, index: _SummaryIndex) -> list[WaterImpact]:
         impacts: list[WaterImpact] = []
-        for water in waters:
-            shots_with_water = [shot for shot in shots if shot.water_id == water.id]
-            tastings_with_water = [t for shot in shots_with_water for t in tasting_index.get(shot.id, [])]
-            if not shots_with_water and not tastings_with_water:
+        for water in index.waters:
+            pair = index.pair_code(coffee_code, water)
+            if pair not in index.brew_ratio_by_pair:
                 continue
-            impacts.append(compute_water_impact(water, shots_with_water, tastings_with_water, rank=0))
+            impacts.append(
+                _water_impact(water, index.brew_ratio_by_pair[pair], index.sensory_by_pair.get(pair), rank=0)
+            )
         # local ranking by weighted sensory
         impacts_sorted = sorted(
             impacts,
@@ -388,18 +773,17 @@ class AnalyticsEngine:
             impact.rank = idx
         return impacts_sorted
 
-    def _rank_waters(
-        self, waters: list[Water], shots: list[Shot], tastings: list[Tasting]
-    ) -> list[WaterImpact]:
+    def _rank_waters(self, index: _SummaryIndex) -> list[WaterImpact]:
         ranking: list[WaterImpact] = []
-        tastings_by_water: dict[UUID, list[Tasting]] = defaultdict(list)
-        for tasting in tastings:
-            ranking_shot = next((s for s in shots if s.id == tasting.shot_id), None)
-            if ranking_shot and ranking_shot.water_id:
-                tastings_by_water[ranking_shot.water_id].append(tasting)
-        for water in waters:
+        for water in index.waters:
+            water_code = index.water_codes.get(water.id)
             ranking.append(
-                compute_water_impact(water, [s for s in shots if s.water_id == water.id], tastings_by_water[water.id], 0)
+                _water_impact(
+                    water,
+                    index.brew_ratio_by_water.get(water_code),
+                    index.sensory_by_water.get(water_code),
+                    0,
+                )
             )
         ranking_sorted = sorted(
             ranking,
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Event, Lock
+from typing import Any, Callable, Hashable
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    generation: int
+    value: Any
+
+
+@dataclass
+class _Flight:
+    """A computation in progress, shared by the lookups of the same key and generation."""
+
+    generation: int
+    done: Event = field(default_factory=Event)
+    value: Any = None
+    error: BaseException | None = None
+
+
+class AnalyticsCache:
+    """Memoize derived results per repository write generation.
+
+    An entry stays valid as long as the repository generation it was computed at is
+    current; any write bumps the generation and the next lookup recomputes. Lookups of a
+    key and generation already being computed wait for that computation instead of starting
+    their own (single flight), and count as `coalesced`.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self._flights: dict[Hashable, _Flight] = {}
+        self._lock = Lock()
+
+    def get_or_compute(self, key: Hashable, generation: int, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.generation == generation:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            flight = self._flights.get(key)
+            leader = flight is None or flight.generation != generation
+            if leader:
+                self.misses += 1
+                flight = self._flights[key] = _Flight(generation)
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = compute()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                entry = self._entries.get(key)
+                # a slower computation of an older generation must not replace a newer result
+                if flight.error is None and (entry is None or entry.generation <= generation):
+                    self._entries[key] = CacheEntry(generation, flight.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+        return flight.value
+
+    @staticmethod
+    def etag(epoch: int, generation: int, resource: str) -> str:
+        """Weak validator for `resource` as of `generation` of the repository `epoch`.
+
+        A digest of stable values only, so every worker sharing a database derives the same
+        validator; an in-memory repository draws a new epoch per instance.
+        """
+        digest = hashlib.blake2b(f"{epoch}:{generation}:{resource}".encode(), digest_size=12).hexdigest()
+        return f'W/"{digest}"'
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
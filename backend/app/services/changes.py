@@ -0,0 +1,92 @@
+"""Change log behind the `/changes` delta feed of offline-first clients.
+
+The log keeps only the latest change of each entity, stamped with the repository version
+(generation) that made it, in version order: a client that last synced at version `v`
+receives the entities changed after `v` in O(changes), deletions as tombstones. Repeated
+updates of one entity collapse into a single entry, and beyond `capacity` entries the
+oldest ones are dropped; `floor` then records up to which version history is missing, and
+clients older than it must download everything again.
+"""
+
+from __future__ import annotations
+
+import secrets
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from uuid import UUID
+
+from app.models.entities import Coffee, Shot, Tasting, Verdict, Water
+
+DEFAULT_CAPACITY = 100_000
+# change kinds, named like the API collections
+KINDS = ("coffees", "waters", "shots", "tastings", "verdicts")
+KIND_OF = {Coffee: "coffees", Water: "waters", Shot: "shots", Tasting: "tastings", Verdict: "verdicts"}
+
+
+def new_epoch() -> int:
+    """Random identifier of one version sequence (fits SQLite's signed 64-bit integers)."""
+    return secrets.randbits(62)
+
+
+def is_covered(
+    version: int | None, epoch: int | None, *, current_epoch: int, current: int, floor: int
+) -> bool:
+    """Whether a client at `version` of `epoch` can be brought up to date by a delta."""
+    if version is None or (epoch is not None and epoch != current_epoch) or version > current:
+        return False
+    return version == current or version >= floor
+
+
+@dataclass(frozen=True, slots=True)
+class Change:
+    version: int
+    kind: str
+    entity_id: UUID
+    deleted: bool
+
+
+@dataclass
+class ChangeSet:
+    """Entities changed after a version, grouped by kind.
+
+    `full` means the requested version is no longer covered (or belongs to another epoch):
+    `upserts` then holds every entity and the client must replace its local copy.
+    """
+
+    epoch: int
+    version: int
+    full: bool
+    upserts: dict[str, list] = field(default_factory=lambda: {kind: [] for kind in KINDS})
+    deleted: dict[str, list[UUID]] = field(default_factory=lambda: {kind: [] for kind in KINDS})
+
+
+class ChangeLog:
+    """Latest change per entity, oldest first; written under the repository lock."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, floor: int = 0) -> None:
+        self.capacity = capacity
+        # changes up to this version may have been dropped
+        self.floor = floor
+        self.epoch = new_epoch()
+        self._latest: OrderedDict[tuple[str, UUID], Change] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    def record(self, kind: str, entity_id: UUID, version: int, deleted: bool = False) -> None:
+        key = (kind, entity_id)
+        self._latest.pop(key, None)
+        self._latest[key] = Change(version, kind, entity_id, deleted)
+        while len(self._latest) > self.capacity:
+            _, dropped = self._latest.popitem(last=False)
+            self.floor = max(self.floor, dropped.version)
+
+    def since(self, version: int) -> list[Change]:
+        """Changes made after `version`, oldest first, walking back from the newest one."""
+        changes = []
+        for change in reversed(self._latest.values()):
+            if change.version <= version:
+                break
+            changes.append(change)
+        changes.reverse()
+        return changes
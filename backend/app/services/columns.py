@@ -0,0 +1,283 @@
+"""Column-oriented copy of shots and tastings for vectorised analytics scans.
+
+The repository keeps one typed array per field next to its entity dicts: a row is appended
+when an entity is inserted, overwritten when it is updated and tombstoned in the ``alive``
+mask when it is deleted. Rows are never reused; once tombstones outnumber live rows the
+tables are compacted together so that tasting rows keep pointing at their shot row.
+
+Coffees and waters are referenced by dense integer codes (`EntityCodes`), so grouping a
+scan by coffee or water is a `np.bincount` over an int32 column. Values the entities already
+hold and a column can be derived from, like sensory means, are not stored a second time.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence
+from uuid import UUID
+
+import numpy as np
+
+from app.models.entities import Shot, Tasting
+from app.services.analysis import BEVERAGE_CODES, NO_WATER
+
+SHOT_COLUMNS: dict[str, str] = {
+    "dose": "float64",
+    "yield": "float64",
+    "brew_ratio": "float64",
+    "extraction_time": "float64",
+    "beverage": "int8",
+    "coffee": "int32",
+    "water": "int32",
+}
+SENSORY_COLUMNS = ("acidity", "bitterness", "body", "aroma", "balance", "finish", "overall")
+TASTING_COLUMNS: dict[str, str] = {
+    "shot": "int32",
+    **{axis: "int8" for axis in SENSORY_COLUMNS},
+}
+# sensory mean by total of the seven scores; `compute_sensory_mean` gives the same float, since
+# `statistics.mean` of ints is their correctly rounded true division
+SENSORY_MEANS = np.array(
+    [round(total / len(SENSORY_COLUMNS), 2) for total in range(5 * len(SENSORY_COLUMNS) + 1)]
+)
+INITIAL_CAPACITY = 1024
+# tombstones tolerated before a compaction, on top of the half-dead rule
+COMPACT_MIN_DEAD = 4096
+
+
+class EntityCodes:
+    """Dense integer code per entity id, assigned on first use and never reused."""
+
+    def __init__(self, ids: list[UUID] | None = None) -> None:
+        self.ids: list[UUID] = ids if ids is not None else []
+        self._codes: dict[UUID, int] = {item_id: code for code, item_id in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def code(self, item_id: UUID) -> int:
+        code = self._codes.get(item_id)
+        if code is None:
+            code = self._codes[item_id] = len(self.ids)
+            self.ids.append(item_id)
+        return code
+
+    def get(self, item_id: UUID) -> int | None:
+        return self._codes.get(item_id)
+
+    def copy(self) -> EntityCodes:
+        return EntityCodes(self.ids.copy())
+
+
+class ColumnTable:
+    """Growable typed columns, one row per entity, with a tombstone mask.
+
+    `share` hands a snapshot a view of the used rows without copying them. The table then
+    copies its arrays before it next changes a row in place, and its id map before it next
+    changes it; appended rows lie past the view's size, so they are written directly.
+    """
+
+    def __init__(self, dtypes: dict[str, str], capacity: int = INITIAL_CAPACITY) -> None:
+        self.dtypes = dtypes
+        self.size = 0
+        self.dead = 0
+        self.rows: dict[UUID, int] = {}
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in dtypes.items()}
+        # whether the arrays, then the id map, are still read by a snapshot's view
+        self._shared_arrays = False
+        self._shared_rows = False
+
+    def __len__(self) -> int:
+        return self.size - self.dead
+
+    @property
+    def live(self) -> np.ndarray:
+        """Boolean mask of the rows that are not tombstoned."""
+        return self._alive[: self.size]
+
+    def column(self, name: str) -> np.ndarray:
+        return self._columns[name][: self.size]
+
+    def _reserve(self, extra: int) -> None:
+        capacity = len(self._alive)
+        if self.size + extra <= capacity:
+            return
+        while capacity < self.size + extra:
+            capacity *= 2
+        self._alive = _resized(self._alive, self.size, capacity)
+        self._columns = {name: _resized(array, self.size, capacity) for name, array in self._columns.items()}
+        self._shared_arrays = False
+
+    def _own_arrays(self) -> None:
+        if self._shared_arrays:
+            self._alive = self._alive.copy()
+            self._columns = {name: array.copy() for name, array in self._columns.items()}
+            self._shared_arrays = False
+
+    def _own_rows(self) -> dict[UUID, int]:
+        if self._shared_rows:
+            self.rows = self.rows.copy()
+            self._shared_rows = False
+        return self.rows
+
+    def extend(self, ids: Sequence[UUID], values: dict[str, Sequence]) -> None:
+        """Append one row per id; `values` holds one sequence per column."""
+        count = len(ids)
+        self._reserve(count)
+        start, end = self.size, self.size + count
+        for name, array in self._columns.items():
+            array[start:end] = values[name]
+        self._alive[start:end] = True
+        self._own_rows().update(zip(ids, range(start, end)))
+        self.size = end
+
+    def assign(self, item_id: UUID, values: dict[str, Sequence]) -> None:
+        """Overwrite the row of an existing id with single-item `values`."""
+        self._own_arrays()
+        row = self.rows[item_id]
+        for name, array in self._columns.items():
+            array[row] = values[name][0]
+
+    def tombstone(self, ids: Sequence[UUID]) -> None:
+        for item_id in ids:
+            if item_id not in self.rows:
+                continue
+            self._own_arrays()
+            self._alive[self._own_rows().pop(item_id)] = False
+            self.dead += 1
+
+    def needs_compaction(self) -> bool:
+        return self.dead > COMPACT_MIN_DEAD and 2 * self.dead > self.size
+
+    def compact(self) -> np.ndarray:
+        """Drop tombstoned rows; returns the new row of every old row (-1 when dropped)."""
+        keep = self.live.copy()
+        remap = np.cumsum(keep, dtype=np.int64) - 1
+        remap[~keep] = -1
+        capacity = max(INITIAL_CAPACITY, len(self))
+        columns = {}
+        for name, array in self._columns.items():
+            columns[name] = np.zeros(capacity, dtype=array.dtype)
+            columns[name][: len(self)] = array[: self.size][keep]
+        self._columns = columns
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._alive[: len(self)] = True
+        new_rows = remap.tolist()
+        self.rows = {item_id: new_rows[row] for item_id, row in self.rows.items()}
+        self.size = len(self)
+        self.dead = 0
+        self._shared_arrays = self._shared_rows = False
+        return remap
+
+    def share(self) -> ColumnTable:
+        """Read-only view of the used rows, for snapshots; see the class docstring."""
+        view = ColumnTable(self.dtypes, capacity=1)
+        view.size = self.size
+        view.dead = self.dead
+        view.rows = self.rows
+        view._alive = self._alive
+        view._columns = dict(self._columns)
+        self._shared_arrays = self._shared_rows = True
+        return view
+
+
+def _resized(array: np.ndarray, used: int, capacity: int) -> np.ndarray:
+    grown = np.zeros(capacity, dtype=array.dtype)
+    grown[:used] = array[:used]
+    return grown
+
+
+class ColumnStore:
+    """Shot and tasting columns of one repository, written under its lock."""
+
+    def __init__(self) -> None:
+        self.coffees = EntityCodes()
+        self.waters = EntityCodes()
+        self.shots = ColumnTable(SHOT_COLUMNS)
+        self.tastings = ColumnTable(TASTING_COLUMNS)
+        # the few tastings that carry a weighted mean; the others fall back to their plain mean
+        self.weighted_means: dict[UUID, float] = {}
+
+    def share(self) -> ColumnStore:
+        """Read-only view for snapshots: the tables are shared, the small code maps copied."""
+        view = ColumnStore()
+        view.coffees = self.coffees.copy()
+        view.waters = self.waters.copy()
+        view.shots = self.shots.share()
+        view.tastings = self.tastings.share()
+        view.weighted_means = self.weighted_means.copy()
+        return view
+
+    def sensory_means(self) -> np.ndarray:
+        """Sensory mean of every tasting row, derived from its score columns."""
+        totals = np.zeros(self.tastings.size, dtype=np.intp)
+        for axis in SENSORY_COLUMNS:
+            totals += self.tastings.column(axis)
+        return SENSORY_MEANS[totals]
+
+    def weighted_or_sensory_means(self, sensory_means: np.ndarray) -> np.ndarray:
+        """`sensory_means` with the weighted mean of the tastings that have one."""
+        means = sensory_means.copy()
+        rows = self.tastings.rows
+        for tasting_id, weighted in self.weighted_means.items():
+            means[rows[tasting_id]] = weighted
+        return means
+
+    def _shot_values(self, shots: Sequence[Shot]) -> dict[str, list]:
+        coffee_code = self.coffees.code
+        water_code = self.waters.code
+        return {
+            "dose": [shot.dose_in_grams for shot in shots],
+            "yield": [shot.beverage_weight_grams for shot in shots],
+            "brew_ratio": [shot.brew_ratio for shot in shots],
+            "extraction_time": [shot.extraction_time_seconds for shot in shots],
+            "beverage": [BEVERAGE_CODES[shot.beverage_type] for shot in shots],
+            "coffee": [coffee_code(shot.coffee_id) for shot in shots],
+            "water": [water_code(shot.water_id) if shot.water_id else NO_WATER for shot in shots],
+        }
+
+    def _tasting_values(self, tastings: Sequence[Tasting]) -> dict[str, list]:
+        shot_rows = self.shots.rows
+        return {
+            "shot": [shot_rows[tasting.shot_id] for tasting in tastings],
+            "acidity": [tasting.acidity_score for tasting in tastings],
+            "bitterness": [tasting.bitterness_score for tasting in tastings],
+            "body": [tasting.body_score for tasting in tastings],
+            "aroma": [tasting.aroma_score for tasting in tastings],
+            "balance": [tasting.balance_score for tasting in tastings],
+            "finish": [tasting.finish_score for tasting in tastings],
+            "overall": [tasting.overall_score for tasting in tastings],
+        }
+
+    def put_shot(self, shot: Shot) -> None:
+        """Append a new shot or overwrite the row of an updated one."""
+        if shot.id in self.shots.rows:
+            self.shots.assign(shot.id, self._shot_values([shot]))
+        else:
+            self.add_shots([shot])
+
+    def add_shots(self, shots: Sequence[Shot]) -> None:
+        self.shots.extend([shot.id for shot in shots], self._shot_values(shots))
+
+    def add_tastings(self, tastings: Sequence[Tasting]) -> None:
+        self.tastings.extend([tasting.id for tasting in tastings], self._tasting_values(tastings))
+        self.weighted_means.update(
+            (tasting.id, tasting.weighted_sensory_mean)
+            for tasting in tastings
+            if tasting.weighted_sensory_mean is not None
+        )
+
+    def delete(self, shot_ids: Sequence[UUID] = (), tasting_ids: Sequence[UUID] = ()) -> None:
+        self.tastings.tombstone(tasting_ids)
+        for tasting_id in tasting_ids:
+            self.weighted_means.pop(tasting_id, None)
+        self.shots.tombstone(shot_ids)
+        if self.shots.needs_compaction() or self.tastings.needs_compaction():
+            self.compact()
+
+    def compact(self) -> None:
+        """Drop tombstones from both tables, re-pointing tastings at their new shot rows."""
+        self.tastings.compact()
+        shot_rows = self.shots.compact()
+        tasting_shots = self.tastings.column("shot")
+        tasting_shots[:] = shot_rows[tasting_shots]
@@ -0,0 +1,122 @@
+"""Analytics sections of one repository snapshot, sharing their intermediate groupings.
+
+Each `/analytics/*` route builds one section from a fresh `Insights`; the dashboard builds
+several from the same instance, so the coffee and water listings, the sensory aggregates and
+the verdict labels are read or computed once for all of them.
+"""
+
+from __future__ import annotations
+
+from functools import cached_property
+from uuid import UUID
+
+from app.models.entities import BeverageType, Coffee, Water
+from app.models.schemas import (
+    AnalyticsSummary,
+    QualityPriceInsight,
+    RankedCoffee,
+    RetestCandidate,
+    StabilityInsight,
+)
+from app.services.analysis import (
+    AnalyticsEngine,
+    SensoryAggregate,
+    aggregate_quality_per_price,
+    build_rankings,
+    coffee_verdict_label,
+    mean_to_label,
+    summarize_retest_needed,
+)
+from app.services.repository import Repository
+
+RATIO_PRIORITY = {
+    "excellent rapport Q/P": 4,
+    "bon rapport Q/P": 3,
+    "moyen": 2,
+    "défavorable": 1,
+    "non renseigné": 0,
+}
+
+
+class Insights:
+    def __init__(self, repository: Repository) -> None:
+        self.repository = repository.snapshot()
+        self._verdict_labels: dict[UUID, str] = {}
+
+    @cached_property
+    def coffees(self) -> list[Coffee]:
+        return self.repository.list_coffees()
+
+    @cached_property
+    def waters(self) -> list[Water]:
+        return self.repository.list_waters()
+
+    @cached_property
+    def aggregates(self) -> dict[UUID, SensoryAggregate]:
+        return self.repository.sensory_aggregates()
+
+    def verdict_label(self, coffee_id: UUID) -> str:
+        if coffee_id not in self._verdict_labels:
+            self._verdict_labels[coffee_id] = coffee_verdict_label(self.repository, coffee_id)
+        return self._verdict_labels[coffee_id]
+
+    def summary(self) -> AnalyticsSummary:
+        return AnalyticsEngine(self.repository).build_summary(self.coffees, self.waters, self.aggregates)
+
+    def rankings(self, water_id: UUID | None = None) -> dict[BeverageType | None, list[RankedCoffee]]:
+        return build_rankings(
+            self.repository,
+            water_id,
+            verdict_labels=self._verdict_labels,
+            coffees=self.coffees,
+            global_aggregates=self.aggregates,
+        )
+
+    def quality_price(self) -> list[QualityPriceInsight]:
+        insights: list[QualityPriceInsight] = []
+        for coffee in self.coffees:
+            aggregate = self.aggregates.get(coffee.id)
+            if aggregate is None:
+                continue
+            insights.append(
+                QualityPriceInsight(
+                    coffee_id=coffee.id,
+                    name=coffee.name,
+                    roaster=coffee.roaster,
+                    cost_per_shot_eur=coffee.cost_per_shot_eur,
+                    quality_label=mean_to_label(aggregate.mean),
+                    verdict_label=self.verdict_label(coffee.id),
+                    ratio_label=aggregate_quality_per_price(aggregate.mean, coffee.cost_per_shot_eur),
+                )
+            )
+        return sorted(insights, key=lambda i: RATIO_PRIORITY.get(i.ratio_label, 0), reverse=True)
+
+    def stability(self) -> list[StabilityInsight]:
+        insights: list[StabilityInsight] = []
+        for coffee in self.coffees:
+            aggregate = self.aggregates.get(coffee.id)
+            if aggregate is None:
+                continue
+            insights.append(
+                StabilityInsight(
+                    coffee_id=coffee.id,
+                    name=coffee.name,
+                    roaster=coffee.roaster,
+                    stability=aggregate.stability_label(),
+                    sample_size=aggregate.count,
+                )
+            )
+        return insights
+
+    def retest(self) -> list[RetestCandidate]:
+        candidates_ids = set(summarize_retest_needed(self.repository.tasting_counts()))
+        return [
+            RetestCandidate(
+                coffee_id=coffee.id,
+                name=coffee.name,
+                roaster=coffee.roaster,
+                reason="Une seule dégustation ou aucune",
+            )
+            for coffee in self.coffees
+            if coffee.id in candidates_ids
+        ]
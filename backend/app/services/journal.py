@@ -0,0 +1,319 @@
+"""Append-only binary journal and snapshots for the in-memory repository.
+
+Layout of a journal directory:
+
+- ``journal-<seq>.bin``: mutation records, one frame each, in the order they were applied;
+- ``snapshot-<seq>.bin``: every entity as of the start of segment ``<seq>``, in chunked frames
+  closed by an end frame, so a truncated snapshot is never mistaken for a complete one.
+
+A frame is ``<payload length><crc32>`` followed by a marshal payload made of plain values
+(UUIDs as 128-bit integers, datetimes as ISO strings, enums as their value). Startup loads the
+newest complete snapshot and replays only the segments written after it; a torn frame at the
+end of the last segment, left by a crash mid-append, is cut off. Any other bad frame stops the
+replay with `JournalCorrupted` rather than applying the later records on top of a gap.
+"""
+
+from __future__ import annotations
+
+import gc
+import marshal
+import os
+import struct
+import threading
+import zlib
+from dataclasses import fields
+from datetime import date, datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Iterator
+from uuid import UUID, SafeUUID
+
+from app.models.entities import (
+    BeverageType,
+    Coffee,
+    CoffeeFormat,
+    Shot,
+    Tasting,
+    Verdict,
+    VerdictStatus,
+    Water,
+    WaterSource,
+)
+from app.services.repository import Repository
+
+FRAME = struct.Struct("<II")
+KINDS: tuple[type, ...] = (Coffee, Water, Shot, Tasting, Verdict)
+OPS = ("put", "delete")
+END = "end"
+SNAPSHOT_CHUNK = 4096
+_new = object.__new__
+_set = object.__setattr__
+_UNKNOWN_SAFETY = SafeUUID.unknown
+ENUM_FIELDS: dict[str, type[Enum]] = {
+    "format": CoffeeFormat,
+    "source": WaterSource,
+    "beverage_type": BeverageType,
+    "status": VerdictStatus,
+}
+
+
+class JournalCorrupted(RuntimeError):
+    """A journal segment holds a bad frame that is not a torn tail: replaying past it would lose records."""
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _encode_uuid(value: UUID | None) -> int | None:
+    return value.int if value is not None else None
+
+
+def _decode_uuid(value: int | None) -> UUID | None:
+    if value is None:
+        return None
+    # skips UUID.__init__ argument parsing, the bulk of decoding time on startup
+    uuid = _new(UUID)
+    _set(uuid, "int", value)
+    _set(uuid, "is_safe", _UNKNOWN_SAFETY)
+    return uuid
+
+
+def _encode_datetime(value: datetime) -> str:
+    return value.isoformat(timespec="microseconds")
+
+
+def _enum_decoder(enum: type[Enum]) -> Callable[[str], Enum]:
+    return {member.value: member for member in enum}.__getitem__
+
+
+def _field_codec(name: str) -> tuple[Callable[[Any], Any], Callable[[Any], Any]]:
+    if name == "id" or name.endswith("_id"):
+        return _encode_uuid, _decode_uuid
+    if name == "created_at":
+        return _encode_datetime, datetime.fromisoformat
+    if name == "purchased_at":
+        return date.toordinal, date.fromordinal
+    if name in ENUM_FIELDS:
+        return (lambda member: member.value), _enum_decoder(ENUM_FIELDS[name])
+    return _identity, _identity
+
+
+class _EntityCodec:
+    """Positional encoding of one entity dataclass as a tuple of marshal-friendly values."""
+
+    def __init__(self, kind: type) -> None:
+        self.kind = kind
+        names = [f.name for f in fields(kind)]
+        codecs = [_field_codec(name) for name in names]
+        self._fields = list(zip(names, (encode for encode, _ in codecs)))
+        # plain fields go through untouched
+        self._decoders = [(i, decode) for i, (_, decode) in enumerate(codecs) if decode is not _identity]
+
+    def encode(self, entity) -> tuple:
+        return tuple(encode(getattr(entity, name)) for name, encode in self._fields)
+
+    def decode(self, values: tuple):
+        values = list(values)
+        for index, decode in self._decoders:
+            values[index] = decode(values[index])
+        return self.kind(*values)
+
+
+CODECS = [_EntityCodec(kind) for kind in KINDS]
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+
+def _frame(record: tuple) -> bytes:
+    payload = marshal.dumps(record)
+    return FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _frames(path: Path) -> Iterator[tuple[int, Any]]:
+    """Yield (end offset, record) for every intact frame, stopping at the first torn one."""
+    data = path.read_bytes()
+    offset = 0
+    while offset + FRAME.size <= len(data):
+        length, crc = FRAME.unpack_from(data, offset)
+        start = offset + FRAME.size
+        payload = data[start : start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+        offset = start + length
+        yield offset, marshal.loads(payload)
+
+
+def _torn_tail(path: Path, end: int) -> bool:
+    """Whether the bytes after offset `end` are a single frame cut short by a crash mid-append."""
+    size = path.stat().st_size
+    if size - end < FRAME.size:
+        return True
+    with open(path, "rb") as handle:
+        handle.seek(end)
+        length, _ = FRAME.unpack(handle.read(FRAME.size))
+    return end + FRAME.size + length >= size
+
+
+class Journal:
+    """Durable mutation log for a `Repository`, compacted into periodic snapshots."""
+
+    def __init__(self, directory: str | Path, snapshot_every: int = 100_000, fsync: bool = False) -> None:
+        self.directory = Path(directory)
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.records_since_snapshot = 0
+        self._segment = 0
+        self._file = None
+        self._lock = threading.Lock()
+        self._compacting = threading.Lock()
+        self._compaction_scheduled = False
+        self._repository: Repository | None = None
+
+    @classmethod
+    def from_url(cls, database_url: str, **options: Any) -> Journal:
+        directory = database_url.removeprefix("journal:///")
+        if directory == database_url or not directory:
+            raise ValueError("database_url must look like journal:///path/to/directory")
+        return cls(directory, **options)
+
+    def _path(self, prefix: str, seq: int) -> Path:
+        return self.directory / f"{prefix}-{seq:08d}.bin"
+
+    def _sequences(self, prefix: str) -> list[int]:
+        return sorted(int(path.stem.split("-")[1]) for path in self.directory.glob(f"{prefix}-*.bin"))
+
+    # Startup
+    def open(self) -> Repository:
+        """Load the newest snapshot, replay the later segments and start journaling into a new one."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for partial in self.directory.glob("snapshot-*.tmp"):
+            partial.unlink()
+        # loading allocates millions of long-lived objects: cyclic GC passes would only slow it down
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            repository, first_segment = self._load_snapshot()
+            segments = [seq for seq in self._sequences("journal") if seq >= first_segment]
+            for seq in segments:
+                last = seq == segments[-1]
+                self.records_since_snapshot += self._replay(repository, self._path("journal", seq), last)
+        finally:
+            if collecting:
+                gc.enable()
+        self._segment = max(segments, default=first_segment - 1) + 1
+        self._file = open(self._path("journal", self._segment), "ab")
+        self._repository = repository
+        repository.attach_journal(self)
+        return repository
+
+    def _load_snapshot(self) -> tuple[Repository, int]:
+        for seq in reversed(self._sequences("snapshot")):
+            entities: list[list] = [[] for _ in KINDS]
+            complete = False
+            for _, record in _frames(self._path("snapshot", seq)):
+                if record[0] == END:
+                    complete = True
+                    break
+                codec = CODECS[record[1]]
+                entities[record[1]].extend(codec.decode(values) for values in record[2])
+            if complete:
+                return Repository.from_entities(*entities), seq
+        return Repository(), 0
+
+    def _replay(self, repository: Repository, path: Path, last: bool) -> int:
+        count = 0
+        end = 0
+        for end, (op, code, values) in _frames(path):
+            kind = KINDS[code]
+            value = CODECS[code].decode(values) if op == 0 else _decode_uuid(values)
+            repository.replay(OPS[op], kind, value)
+            count += 1
+        if end < path.stat().st_size:
+            # earlier segments were closed by a rotation: only the last one can end mid-frame
+            if not (last and _torn_tail(path, end)):
+                raise JournalCorrupted(f"bad frame at offset {end} of {path}")
+            with open(path, "r+b") as handle:
+                handle.truncate(end)
+        return count
+
+    # Writing
+    def append(self, op: str, kind: type, value) -> None:
+        code = KIND_CODES[kind]
+        if op == "put":
+            record = (0, code, CODECS[code].encode(value))
+        else:
+            record = (1, code, value.int)
+        with self._lock:
+            self._file.write(_frame(record))
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.records_since_snapshot += 1
+            due = self.records_since_snapshot >= self.snapshot_every and not self._compaction_scheduled
+            if due:
+                self._compaction_scheduled = True
+        if due:
+            threading.Thread(target=self._compact_in_background, name="journal-compaction", daemon=True).start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        finally:
+            with self._lock:
+                self._compaction_scheduled = False
+
+    def compact(self) -> None:
+        """Snapshot the repository, then drop the snapshots and segments it supersedes."""
+        if self._repository is None or not self._compacting.acquire(blocking=False):
+            return
+        try:
+            with self._repository.transaction():
+                snapshot = self._repository.snapshot()
+                seq = self._rotate()
+            self._write_snapshot(snapshot, seq)
+            for old in self._sequences("snapshot"):
+                if old < seq:
+                    self._path("snapshot", old).unlink(missing_ok=True)
+            for old in self._sequences("journal"):
+                if old < seq:
+                    self._path("journal", old).unlink(missing_ok=True)
+        finally:
+            self._compacting.release()
+
+    def _rotate(self) -> int:
+        with self._lock:
+            self._file.close()
+            self._segment += 1
+            self._file = open(self._path("journal", self._segment), "ab")
+            self.records_since_snapshot = 0
+            return self._segment
+
+    def _write_snapshot(self, snapshot: Repository, seq: int) -> None:
+        path = self._path("snapshot", seq)
+        partial = path.with_suffix(".tmp")
+        collections = (
+            snapshot.list_coffees(),
+            snapshot.list_waters(),
+            snapshot.list_shots(),
+            snapshot.list_tastings(),
+            snapshot.list_verdicts(),
+        )
+        with open(partial, "wb") as handle:
+            for code, items in enumerate(collections):
+                encode = CODECS[code].encode
+                items.reverse()  # oldest first, as they were created
+                for start in range(0, len(items), SNAPSHOT_CHUNK):
+                    chunk = [encode(item) for item in items[start : start + SNAPSHOT_CHUNK]]
+                    handle.write(_frame((0, code, chunk)))
+            handle.write(_frame((END,)))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(partial, path)
+
+    def close(self) -> None:
+        if self._repository is not None:
+            self._repository.attach_journal(None)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
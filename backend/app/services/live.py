@@ -0,0 +1,315 @@
+"""Live global ranking and verdict diffs for Server-Sent Events subscribers.
+
+`RankingTracker` turns each new repository generation into the diff since the previous one.
+The change feed names the coffees and verdicts written since then, and its tastings and
+shots name the coffees whose tastings changed. Only those coffees get their mean read and
+their verdict label recomputed, and only they move in the ranked list, kept sorted with
+bisect; rows are re-sent for the positions between the first and last one touched, and
+only when their position, labels or names changed.
+
+`LiveRankings` polls the generation from a single background task while anyone listens and
+hands the same encoded frames to every subscriber queue, so a write costs one diff however
+many dashboards are connected. Polling also picks up writes made by other worker processes
+sharing a SQLite database.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from anyio import to_thread
+
+from app.models.entities import Coffee, Verdict
+from app.models.schemas import RankedCoffee, RankingDiff, VerdictDiff, VerdictRead
+from app.services.analysis import coffee_verdict_label, mean_to_label
+from app.services.changes import ChangeSet
+from app.services.repository import Repository
+
+POLL_INTERVAL = 0.25
+KEEPALIVE_SECONDS = 15.0
+# frames a subscriber may lag behind before it is disconnected (it then reconnects in full)
+SUBSCRIBER_BACKLOG = 64
+KEEPALIVE_FRAME = b": keep-alive\n\n"
+_MICROSECOND = timedelta(microseconds=1)
+
+
+@dataclass(slots=True)
+class _Ranked:
+    coffee: Coffee
+    mean: float
+    verdict_label: str
+
+
+def _ranking_key(ranked: _Ranked) -> tuple[float, int, int]:
+    """Ascending in ranking order: mean descending, ties newest first like the coffee listing."""
+    coffee = ranked.coffee
+    return (-ranked.mean, -((coffee.created_at - datetime.min) // _MICROSECOND), -coffee.id.int)
+
+
+def _frame(event: str, diff: RankingDiff | VerdictDiff) -> bytes:
+    return f"event: {event}\ndata: {diff.model_dump_json()}\n\n".encode()
+
+
+class RankingTracker:
+    """Last published global ranking and verdicts of a repository, advanced by `update`."""
+
+    def __init__(self, repository: Repository) -> None:
+        self.repository = repository
+        self.version: int | None = None
+        self.epoch: int | None = None
+        self._coffees: dict[UUID, Coffee] = {}
+        self._verdicts: dict[UUID, Verdict] = {}
+        self._ranked: dict[UUID, _Ranked] = {}
+        # ranked coffees sorted by `_ranking_key`: position = index + 1
+        self._order: list[_Ranked] = []
+        # coffee each known tasting counts for, to map tasting deletions and shot moves to coffees
+        self._tasting_coffees: dict[UUID, UUID] = {}
+        # published row per coffee: (position, name, roaster, score label, verdict label)
+        self._rows: dict[UUID, tuple] = {}
+
+    def update(self) -> tuple[RankingDiff, VerdictDiff] | None:
+        """Diffs since the previous call, or None when the generation has not moved.
+
+        Reads are not atomic across the change feed and the aggregates; a write landing in
+        between is fully reflected by the next call.
+        """
+        repository = self.repository
+        generation = repository.generation
+        if generation == self.version:
+            return None
+        changes = repository.changes_since(generation if self.version is None else self.version, self.epoch)
+        full = self.version is None or changes.full
+        if full:
+            self._coffees = {coffee.id: coffee for coffee in repository.list_coffees()}
+            previous = self._verdicts
+            self._verdicts = {verdict.id: verdict for verdict in repository.list_verdicts()}
+            updated_verdicts = list(self._verdicts.values())
+            removed_verdicts = [verdict_id for verdict_id in previous if verdict_id not in self._verdicts]
+            shot_coffees = {shot.id: shot.coffee_id for shot in repository.list_shots()}
+            # a tasting of a shot written since list_shots comes back in the next delta
+            self._tasting_coffees = {
+                tasting.id: shot_coffees[tasting.shot_id]
+                for tasting in repository.list_tastings()
+                if tasting.shot_id in shot_coffees
+            }
+        else:
+            affected = {coffee.id for coffee in changes.upserts["coffees"]} | set(changes.deleted["coffees"])
+            self._coffees.update((coffee.id, coffee) for coffee in changes.upserts["coffees"])
+            for coffee_id in changes.deleted["coffees"]:
+                self._coffees.pop(coffee_id, None)
+            updated_verdicts = changes.upserts["verdicts"]
+            removed_verdicts = changes.deleted["verdicts"]
+            for verdict_id in removed_verdicts:
+                verdict = self._verdicts.pop(verdict_id, None)
+                if verdict is not None:
+                    affected.add(verdict.coffee_id)
+            for verdict in updated_verdicts:
+                previous_verdict = self._verdicts.get(verdict.id)
+                if previous_verdict is not None:
+                    affected.add(previous_verdict.coffee_id)
+                self._verdicts[verdict.id] = verdict
+                affected.add(verdict.coffee_id)
+            affected |= self._tasted_coffees(changes)
+
+        self.version, self.epoch = changes.version, changes.epoch
+        ranking = self._rerank() if full else self._reposition(affected)
+        verdict_diff = VerdictDiff(
+            version=changes.version,
+            full=full,
+            updated=[VerdictRead.model_validate(verdict) for verdict in updated_verdicts],
+            removed=removed_verdicts,
+        )
+        return ranking, verdict_diff
+
+    def _tasted_coffees(self, changes: ChangeSet) -> set[UUID]:
+        """Coffees that gained or lost tastings: new and deleted tastings, moved shots."""
+        coffees: set[UUID] = set()
+        tasting_coffees = self._tasting_coffees
+
+        def assign(tasting_id: UUID, coffee_id: UUID) -> None:
+            previous = tasting_coffees.get(tasting_id)
+            if previous != coffee_id:
+                tasting_coffees[tasting_id] = coffee_id
+                coffees.add(coffee_id)
+                if previous is not None:
+                    coffees.add(previous)
+
+        for tasting_id in changes.deleted["tastings"]:
+            coffee_id = tasting_coffees.pop(tasting_id, None)
+            if coffee_id is not None:
+                coffees.add(coffee_id)
+        for tasting in changes.upserts["tastings"]:
+            shot = self.repository.get_shot(tasting.shot_id)
+            if shot is not None:
+                assign(tasting.id, shot.coffee_id)
+        for shot in changes.upserts["shots"]:
+            for tasting in self.repository.list_tastings_for_shot(shot.id):
+                assign(tasting.id, shot.coffee_id)
+        return coffees
+
+    def _ranked_coffee(self, coffee_id: UUID, mean: float | None) -> _Ranked | None:
+        coffee = self._coffees.get(coffee_id)
+        if mean is None or coffee is None:
+            return None
+        return _Ranked(coffee, mean, coffee_verdict_label(self.repository, coffee_id))
+
+    def _rerank(self) -> RankingDiff:
+        """Rank every coffee from scratch and publish the whole ranking."""
+        self._ranked = {}
+        for coffee_id, aggregate in self.repository.sensory_aggregates().items():
+            ranked = self._ranked_coffee(coffee_id, aggregate.mean)
+            if ranked is not None:
+                self._ranked[coffee_id] = ranked
+        self._order = sorted(self._ranked.values(), key=_ranking_key)
+        removed = [coffee_id for coffee_id in self._rows if coffee_id not in self._ranked]
+        self._rows = {}
+        return self._publish_rows(0, len(self._order), removed, full=True)
+
+    def _reposition(self, affected: set[UUID]) -> RankingDiff:
+        """Move only the affected coffees and publish the rows between the first and last index
+        touched, or down to the last row when the number of ranked coffees changed."""
+        order = self._order
+        start, stop, resized = len(order), 0, False
+        removed = []
+        for coffee_id in affected:
+            previous = self._ranked.pop(coffee_id, None)
+            if previous is not None:
+                index = bisect_left(order, _ranking_key(previous), key=_ranking_key)
+                del order[index]
+                start, stop = min(start, index), max(stop, index + 1)
+            aggregate = self.repository.sensory_aggregate(coffee_id)
+            current = self._ranked_coffee(coffee_id, None if aggregate is None else aggregate.mean)
+            if current is not None:
+                self._ranked[coffee_id] = current
+                index = bisect_left(order, _ranking_key(current), key=_ranking_key)
+                order.insert(index, current)
+                start, stop = min(start, index), max(stop, index + 1)
+            elif previous is not None:
+                removed.append(coffee_id)
+                self._rows.pop(coffee_id, None)
+            resized |= (previous is None) != (current is None)
+        if resized:
+            stop = len(order)
+        return self._publish_rows(start, stop, removed, full=False)
+
+    def _publish_rows(self, start: int, stop: int, removed: list[UUID], full: bool) -> RankingDiff:
+        rows = self._rows
+        changed = []
+        for position, ranked in enumerate(self._order[start:stop], start=start + 1):
+            coffee = ranked.coffee
+            row = (position, coffee.name, coffee.roaster, mean_to_label(ranked.mean), ranked.verdict_label)
+            if rows.get(coffee.id) != row:
+                rows[coffee.id] = row
+                changed.append(coffee.id)
+        return RankingDiff(
+            version=self.version,
+            full=full,
+            updated=[self._entry(coffee_id) for coffee_id in changed],
+            removed=removed,
+        )
+
+    def _entry(self, coffee_id: UUID) -> RankedCoffee:
+        position, name, roaster, score_label, verdict_label = self._rows[coffee_id]
+        return RankedCoffee(
+            position=position,
+            coffee_id=coffee_id,
+            name=name,
+            roaster=roaster,
+            score_label=score_label,
+            verdict_label=verdict_label,
+        )
+
+    def state(self) -> tuple[RankingDiff, VerdictDiff]:
+        """The whole published state, as the diffs a new subscriber starts from."""
+        ranking = RankingDiff(
+            version=self.version,
+            full=True,
+            updated=[self._entry(ranked.coffee.id) for ranked in self._order],
+            removed=[],
+        )
+        verdicts = VerdictDiff(
+            version=self.version,
+            full=True,
+            updated=[VerdictRead.model_validate(verdict) for verdict in self._verdicts.values()],
+            removed=[],
+        )
+        return ranking, verdicts
+
+
+class Subscriber:
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(SUBSCRIBER_BACKLOG)
+        # set when the subscriber fell too far behind; its stream then ends
+        self.dropped = False
+
+
+class LiveRankings:
+    """Fan-out of `RankingTracker` diffs to Server-Sent Events subscribers."""
+
+    def __init__(self, repository: Repository, interval: float = POLL_INTERVAL) -> None:
+        self.tracker = RankingTracker(repository)
+        self.interval = interval
+        self._subscribers: set[Subscriber] = set()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        # encoded full state, reused by every subscriber joining at the same version
+        self._state: tuple[int | None, bytes] | None = None
+
+    async def subscribe(self) -> Subscriber:
+        subscriber = Subscriber()
+        async with self._lock:
+            await self._poll()
+            version = self.tracker.version
+            if self._state is None or self._state[0] != version:
+                ranking, verdicts = self.tracker.state()
+                self._state = (version, _frame("ranking", ranking) + _frame("verdicts", verdicts))
+            subscriber.queue.put_nowait(self._state[1])
+            self._subscribers.add(subscriber)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            await asyncio.sleep(self.interval)
+            async with self._lock:
+                await self._poll()
+
+    async def _poll(self) -> None:
+        diffs = await to_thread.run_sync(self.tracker.update)
+        if diffs is None:
+            return
+        ranking, verdicts = diffs
+        frame = b""
+        if ranking.updated or ranking.removed:
+            frame += _frame("ranking", ranking)
+        if verdicts.updated or verdicts.removed:
+            frame += _frame("verdicts", verdicts)
+        if frame:
+            self._publish(frame)
+
+    def _publish(self, frame: bytes) -> None:
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                subscriber.dropped = True
+                self._subscribers.discard(subscriber)
+
+    async def events(self, subscriber: Subscriber):
+        """SSE byte stream of one subscriber, with keep-alive comments while idle."""
+        try:
+            while not subscriber.dropped:
+                try:
+                    yield await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE_FRAME
+        finally:
+            self.unsubscribe(subscriber)
@@ -0,0 +1,222 @@
+"""Execution of CPU-heavy analytics away from the request threads.
+
+Analytics are pure-Python loops over a snapshot: run on the request thread they hold the GIL
+and slow down every CRUD request served meanwhile. `AnalyticsExecutor` runs them in one of
+three modes:
+
+- ``inline``: on the calling thread, as before (no timeout);
+- ``thread``: on a small dedicated thread pool, which bounds how many run at once;
+- ``process``: on a process pool, away from the GIL of the API process. The snapshot is
+  encoded once per generation with the journal codecs, re-encoding only the entities written
+  since the previous one. Each worker keeps its own copy of the repository and applies only
+  the entities that changed, so a new generation costs it O(changes), not a full rebuild.
+  Large results can come back as JSON bytes, which the API process sends without decoding.
+
+Thread and process modes wait at most `timeout` seconds per request. A computation that
+times out keeps running in its worker (pools cannot interrupt one), but its caller is
+released with `AnalyticsTimeout`.
+"""
+
+from __future__ import annotations
+
+import marshal
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import fields
+from functools import cache
+from threading import Lock
+from typing import Any, Callable, Literal
+from uuid import UUID, uuid4
+
+from pydantic import TypeAdapter
+
+from app.services.journal import CODECS, KINDS
+from app.services.repository import Repository
+
+ExecutionMode = Literal["inline", "thread", "process"]
+DEFAULT_WORKERS = 2
+DEFAULT_TIMEOUT = 30.0
+# beyond this share of replaced entities, rebuilding a worker repository beats replaying
+REBUILD_RATIO = 0.25
+
+class AnalyticsTimeout(TimeoutError):
+    """An offloaded computation did not finish within the executor timeout."""
+
+
+class EncodedJSON(bytes):
+    """A result already dumped to JSON by the worker, sent back as is."""
+
+
+@cache
+def _adapter(kind: type) -> TypeAdapter:
+    return TypeAdapter(kind)
+
+
+def _collections(snapshot: Repository) -> tuple[list, ...]:
+    return (
+        snapshot.list_coffees(),
+        snapshot.list_waters(),
+        snapshot.list_shots(),
+        snapshot.list_tastings(),
+        snapshot.list_verdicts(),
+    )
+
+
+class SnapshotEncoder:
+    """Encodes successive snapshots with the journal codecs, re-encoding only replaced entities.
+
+    Entities are replaced on write, never mutated, so an entity object already seen in the
+    previous snapshot keeps its encoding. The payload is decoded by `SnapshotDecoder`.
+    """
+
+    def __init__(self) -> None:
+        self._previous: list[dict[UUID, tuple[Any, tuple]]] = [{} for _ in CODECS]
+
+    def encode(self, snapshot: Repository) -> bytes:
+        encoded = []
+        for code, items in enumerate(_collections(snapshot)):
+            encode = CODECS[code].encode
+            previous = self._previous[code]
+            current = {}
+            values = []
+            for item in items:
+                known = previous.get(item.id)
+                if known is None or known[0] is not item:
+                    known = (item, encode(item))
+                current[item.id] = known
+                values.append(known[1])
+            self._previous[code] = current
+            encoded.append(values)
+        return marshal.dumps((snapshot.generation, encoded))
+
+
+class SnapshotDecoder:
+    """Keeps a repository in step with successive `SnapshotEncoder` payloads.
+
+    Only entities whose encoding changed are decoded. The first payload, or one replacing more
+    than `REBUILD_RATIO` of the entities, rebuilds the repository; the others are applied as
+    journal replays, deletions children first and puts parents first.
+    """
+
+    def __init__(self) -> None:
+        self._previous: list[dict[int, tuple[tuple, Any]]] = [{} for _ in CODECS]
+        self._id_positions = [[field.name for field in fields(codec.kind)].index("id") for codec in CODECS]
+        self._repository: Repository | None = None
+
+    def decode(self, payload: bytes) -> Repository:
+        generation, encoded = marshal.loads(payload)
+        puts: list[list] = []
+        deletes: list[list[UUID]] = []
+        for code, items in enumerate(encoded):
+            decode = CODECS[code].decode
+            previous = self._previous[code]
+            position = self._id_positions[code]
+            current = {}
+            changed = []
+            for values in items:
+                known = previous.pop(values[position], None)
+                if known is None or known[0] != values:
+                    known = (values, decode(values))
+                    changed.append(known[1])
+                current[values[position]] = known
+            # what is left of the previous entities is gone from this snapshot
+            deletes.append([entity.id for _, entity in previous.values()])
+            puts.append(changed)
+            self._previous[code] = current
+        total = sum(len(current) for current in self._previous)
+        changes = sum(map(len, puts)) + sum(map(len, deletes))
+        if self._repository is None or changes > total * REBUILD_RATIO:
+            collections = [[entity for _, entity in current.values()] for current in self._previous]
+            self._repository = Repository.from_entities(*collections, generation=generation)
+            # nobody reads the change feed of a worker copy
+            self._repository.limit_changes(0)
+            return self._repository
+        repository = self._repository
+        for code in reversed(range(len(CODECS))):
+            for entity_id in deletes[code]:
+                repository.replay("delete", KINDS[code], entity_id)
+        for code, entities in enumerate(puts):
+            for entity in entities:
+                repository.replay("put", KINDS[code], entity)
+        return repository
+
+
+# repository of this worker process and the token of the payload it reflects
+_worker_snapshot: tuple[str, Repository] | None = None
+_worker_decoder = SnapshotDecoder()
+
+
+def _run_in_worker(
+    token: str, payload: bytes, function: Callable[..., Any], args: tuple, encode_as: type | None
+) -> Any:
+    global _worker_snapshot
+    if _worker_snapshot is None or _worker_snapshot[0] != token:
+        _worker_snapshot = (token, _worker_decoder.decode(payload))
+    result = function(_worker_snapshot[1], *args)
+    if encode_as is None:
+        return result
+    return EncodedJSON(_adapter(encode_as).dump_json(result))
+
+
+class AnalyticsExecutor:
+    """Runs `function(snapshot, *args)` inline, on a thread pool or on a process pool.
+
+    In process mode `function` and `args` are pickled: pass module-level functions, not lambdas.
+    Large results come back faster as JSON than pickled: with `encode_as`, the worker dumps the
+    result as that type and `run` returns `EncodedJSON`.
+    """
+
+    def __init__(
+        self, mode: ExecutionMode = "inline", workers: int = DEFAULT_WORKERS, timeout: float = DEFAULT_TIMEOUT
+    ) -> None:
+        self.mode = mode
+        self.workers = workers
+        self.timeout = timeout
+        self._pool: Executor | None = None
+        self._lock = Lock()
+        self._encoder = SnapshotEncoder()
+        # (snapshot, token, payload) of the last snapshot sent to the process pool
+        self._encoded: tuple[Repository, str, bytes] | None = None
+
+    def run(
+        self, function: Callable[..., Any], snapshot: Repository, *args: Any, encode_as: type | None = None
+    ) -> Any:
+        if self.mode == "inline":
+            return function(snapshot, *args)
+        if self.mode == "thread":
+            future = self._executor().submit(function, snapshot, *args)
+        else:
+            token, payload = self._payload(snapshot)
+            future = self._executor().submit(_run_in_worker, token, payload, function, args, encode_as)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise AnalyticsTimeout(f"analytics did not finish within {self.timeout:g}s") from None
+
+    def _executor(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.mode == "thread":
+                    self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="analytics")
+                else:
+                    # spawned, not forked: the API process runs threads whose locks a fork would copy
+                    context = multiprocessing.get_context("spawn")
+                    self._pool = ProcessPoolExecutor(self.workers, mp_context=context)
+            return self._pool
+
+    def _payload(self, snapshot: Repository) -> tuple[str, bytes]:
+        with self._lock:
+            encoded = self._encoded
+            if encoded is None or encoded[0] is not snapshot:
+                encoded = self._encoded = (snapshot, uuid4().hex, self._encoder.encode(snapshot))
+            return encoded[1], encoded[2]
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._encoded = None
+            self._encoder = SnapshotEncoder()
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,69 @@
+"""Sampling profiler for single requests, writing flamegraph-ready collapsed stacks.
+
+cProfile only sees the thread it is enabled in, while sync routes run on pool threads.
+`StackSampler` instead reads every thread's stack from a background thread at a fixed
+interval and keeps those running a given code object (the route endpoint), from that frame
+down. The result is in the collapsed format of flamegraph.pl / speedscope: one
+``caller;callee;... count`` line per distinct stack.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Callable
+
+DEFAULT_INTERVAL = 0.001
+
+
+def _label(frame: FrameType) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}"
+
+
+class StackSampler:
+    """Counts the stacks running `root()` in any thread until `stop` is called."""
+
+    def __init__(self, root: Callable[[], CodeType | None], interval: float = DEFAULT_INTERVAL) -> None:
+        self.root = root
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        sampler = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            # the endpoint is only known once the request has been routed
+            root = self.root()
+            if root is None:
+                continue
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == sampler:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame))
+                    if frame.f_code is root:
+                        break
+                    frame = frame.f_back
+                else:
+                    continue  # this thread is not running the endpoint
+                stack.reverse()
+                self.stacks[";".join(stack)] += 1
+
+    def write(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines = [f"{stack} {count}\n" for stack, count in self.stacks.most_common()]
+        path.write_text("".join(lines))
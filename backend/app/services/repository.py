@@ -1,9 +1,18 @@
 from __future__ import annotations
 
+from bisect import bisect_left, insort
 from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, fields, replace
+from datetime import datetime
+from functools import wraps
+from operator import attrgetter
+from sys import intern
+from threading import RLock
+from typing import Hashable, Iterable, Iterator, Protocol, Sequence
 from uuid import UUID
 
-from app.models.entities import Coffee, Shot, Tasting, Verdict, Water
+from app.models.entities import BeverageType, Coffee, Shot, Tasting, Verdict, Water
 from app.models.schemas import (
     CoffeeCreate,
     ShotCreate,
@@ -12,6 +21,7 @@ from app.models.schemas import (
     WaterCreate,
 )
 from app.services.analysis import (
+    SensoryAggregate,
     compute_brew_ratio,
     compute_cost_per_shot,
     compute_sensory_mean,
@@ -19,10 +29,374 @@ from app.services.analysis import (
     mean_to_label,
     verdict_from_mean,
 )
+from app.services.changes import KIND_OF, ChangeLog, ChangeSet, is_covered
+from app.services.columns import ColumnStore
+
+
+CreationKey = tuple[datetime, UUID]
+# sorts before every real id, so (t, MIN_UUID) bounds a creation range at instant t
+MIN_UUID = UUID(int=0)
+SHOT_FILTER_FIELDS = ("coffee_id", "water_id", "beverage_type", "grind_setting")
+TASTING_FILTER_FIELDS = (*SHOT_FILTER_FIELDS, "shot_id")
+# Repository attributes a snapshot shares as they are (see `Repository.snapshot`)
+SHARED_CONTAINERS = (
+    "_coffees",
+    "_waters",
+    "_shots",
+    "_tastings",
+    "_verdicts",
+    "_shots_by_coffee",
+    "_tastings_by_shot",
+    "_verdict_by_coffee",
+)
+
+
+@dataclass(frozen=True)
+class ShotFilters:
+    """Filters of the shot listing; None matches anything.
+
+    `created_from` is inclusive and `created_to` exclusive, both naive UTC like `created_at`.
+    """
+
+    coffee_id: UUID | None = None
+    water_id: UUID | None = None
+    beverage_type: BeverageType | None = None
+    grind_setting: str | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+    def equalities(self) -> dict[str, Hashable]:
+        return {
+            field.name: getattr(self, field.name)
+            for field in fields(self)
+            if not field.name.startswith("created_") and getattr(self, field.name) is not None
+        }
+
+    def creation_bounds(self, after: CreationKey | None = None) -> tuple[CreationKey | None, CreationKey | None]:
+        """(lower, upper) keys of the requested range, lower inclusive; `after` narrows the upper one."""
+        lower = None if self.created_from is None else (self.created_from, MIN_UUID)
+        upper = None if self.created_to is None else (self.created_to, MIN_UUID)
+        if after is not None and (upper is None or after < upper):
+            upper = after
+        return lower, upper
+
+
+@dataclass(frozen=True)
+class TastingFilters(ShotFilters):
+    """Filters of the tasting listing: the shot fields apply to the tasted shot."""
+
+    shot_id: UUID | None = None
+
+
+class BulkInsertError(ValueError):
+    """Raised by bulk inserts when some items cannot be written; nothing was written."""
+
+    def __init__(self, errors: dict[int, str]) -> None:
+        super().__init__("bulk_rejected")
+        self.errors = errors
+
+
+class MutationLog(Protocol):
+    def append(self, op: str, kind: type, value) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class _Lookups(Protocol):
+    def get_coffee(self, coffee_id: UUID) -> Coffee | None: ...
+
+    def get_water(self, water_id: UUID) -> Water | None: ...
+
+    def get_shot(self, shot_id: UUID) -> Shot | None: ...
+
+
+def build_shot(payload: ShotCreate) -> Shot:
+    shot = Shot(**payload.model_dump())
+    shot.brew_ratio = compute_brew_ratio(payload)
+    return shot
+
+
+def prepare_shots(repository: _Lookups, payloads: Sequence[ShotCreate]) -> list[Shot]:
+    """Build every shot of a bulk insert, or raise BulkInsertError with each bad reference."""
+    known: dict[UUID, bool] = {}
+    errors: dict[int, str] = {}
+
+    def exists(item_id: UUID, lookup) -> bool:
+        if item_id not in known:
+            known[item_id] = lookup(item_id) is not None
+        return known[item_id]
+
+    for index, payload in enumerate(payloads):
+        if not exists(payload.coffee_id, repository.get_coffee):
+            errors[index] = "coffee_not_found"
+        elif payload.water_id and not exists(payload.water_id, repository.get_water):
+            errors[index] = "water_not_found"
+    if errors:
+        raise BulkInsertError(errors)
+    return [build_shot(payload) for payload in payloads]
+
+
+def prepare_tastings(repository: _Lookups, payloads: Sequence[TastingCreate]) -> list[tuple[Shot, Tasting]]:
+    """Build every tasting of a bulk insert with its shot, or raise BulkInsertError."""
+    shots: dict[UUID, Shot | None] = {}
+    prepared: list[tuple[Shot, Tasting]] = []
+    errors: dict[int, str] = {}
+    for index, payload in enumerate(payloads):
+        if payload.shot_id not in shots:
+            shots[payload.shot_id] = repository.get_shot(payload.shot_id)
+        shot = shots[payload.shot_id]
+        if shot is None:
+            errors[index] = "shot_not_found"
+            continue
+        try:
+            prepared.append((shot, build_tasting(payload)))
+        except ValueError as err:
+            errors[index] = str(err)
+    if errors:
+        raise BulkInsertError(errors)
+    return prepared
+
+
+def latest_means(prepared: Iterable[tuple[Shot, Tasting]]) -> dict[UUID, float]:
+    """Sensory mean of the last tasting per coffee: the one its automatic verdict follows."""
+    return {shot.coffee_id: tasting.sensory_mean for shot, tasting in prepared}
+
+
+def build_tasting(payload: TastingCreate) -> Tasting:
+    """Translate sensory labels into stored scores and their mean."""
+    scores = {
+        "acidity_score": label_to_score(payload.acidity_label),
+        "bitterness_score": label_to_score(payload.bitterness_label),
+        "body_score": label_to_score(payload.body_label),
+        "aroma_score": label_to_score(payload.aroma_label),
+        "balance_score": label_to_score(payload.balance_label),
+        "finish_score": label_to_score(payload.finish_label),
+        "overall_score": label_to_score(payload.overall_label),
+    }
+    return Tasting(
+        shot_id=payload.shot_id,
+        comments=payload.comments,
+        sensory_mean=compute_sensory_mean(scores.values()),
+        **scores,
+    )
+
+
+def auto_verdict(coffee_id: UUID, sensory_mean: float) -> VerdictCreate:
+    """Verdict derived from the freshest tasting of a coffee."""
+    status = verdict_from_mean(sensory_mean)
+    rationale = f"Moyenne sensorielle {mean_to_label(sensory_mean)} sur le dernier shot"
+    return VerdictCreate(coffee_id=coffee_id, status=status, rationale=rationale)
+
+
+def _writer(method):
+    """Serialize a write method on the repository lock; readers never take it."""
+
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        if self._read_only:
+            raise RuntimeError("read_only_snapshot")
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+
+    return locked
+
+
+def _creation_key(item) -> CreationKey:
+    return (item.created_at, item.id)
+
+
+_shot_filter_values = attrgetter(*SHOT_FILTER_FIELDS)
+
+
+def _tasting_filter_values(shot: Shot) -> tuple:
+    return (*_shot_filter_values(shot), shot.id)
+
+
+class _CreationOrder:
+    """Entities in ascending (created_at, id) order so listings and keyset pages need no sort.
+
+    Holding the entities themselves costs one pointer per item, where (created_at, id)
+    key tuples cost a tuple each. Writers update the list in place under the repository
+    lock; `newest_first` only runs single C-level list operations on it, which a
+    concurrent insert cannot tear. Once `share` has handed the list to a snapshot, the
+    next change copies it first.
+    """
+
+    def __init__(self, items: list | None = None) -> None:
+        self._items: list = items if items is not None else []
+        self._shared = False
+
+    @classmethod
+    def of(cls, items: Iterable) -> _CreationOrder:
+        return cls(sorted(items, key=_creation_key))
+
+    def copy(self) -> _CreationOrder:
+        return _CreationOrder(self._items.copy())
+
+    def share(self) -> _CreationOrder:
+        """Read-only view of the current items, for snapshots."""
+        self._shared = True
+        return _CreationOrder(self._items)
+
+    def _writable(self) -> list:
+        if self._shared:
+            self._items = self._items.copy()
+            self._shared = False
+        return self._items
+
+    def _position(self, item) -> int | None:
+        position = bisect_left(self._items, _creation_key(item), key=_creation_key)
+        if position < len(self._items) and self._items[position].id == item.id:
+            return position
+        return None
+
+    def add(self, item) -> None:
+        insort(self._writable(), item, key=_creation_key)
+
+    def add_many(self, items: Iterable) -> None:
+        writable = self._writable()
+        writable.extend(items)
+        writable.sort(key=_creation_key)
+
+    def replace(self, item) -> None:
+        """Swap in the new version of an entity; its creation key never changes."""
+        position = self._position(item)
+        if position is not None:
+            self._writable()[position] = item
+
+    def discard(self, item) -> None:
+        position = self._position(item)
+        if position is not None:
+            del self._writable()[position]
+
+    def discard_many(self, items: Iterable) -> None:
+        dropped = {item.id for item in items}
+        if dropped:
+            self._items = [item for item in self._items if item.id not in dropped]
+            self._shared = False
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _bounds(self, lower: CreationKey | None, upper: CreationKey | None) -> tuple[int, int]:
+        start = 0 if lower is None else bisect_left(self._items, lower, key=_creation_key)
+        end = len(self._items) if upper is None else bisect_left(self._items, upper, key=_creation_key)
+        return start, max(start, end)
+
+    def count_between(self, lower: CreationKey | None, upper: CreationKey | None) -> int:
+        start, end = self._bounds(lower, upper)
+        return end - start
+
+    def newest_first(
+        self, after: CreationKey | None = None, limit: int | None = None, since: CreationKey | None = None
+    ) -> list:
+        """Items with `since` <= key < `after`, newest first, at most `limit` of them."""
+        start, end = self._bounds(since, after)
+        if limit is not None:
+            start = max(start, end - limit)
+        return self._items[start:end][::-1]
+
+
+class _FieldIndex:
+    """Creation-ordered buckets of entities per value of a few fields, for filtered listings.
+
+    Values are given by the caller, so tastings can be indexed on their shot's fields.
+    None values are not indexed. After `share`, a field's buckets and each bucket are copied
+    before their first change, so a write copies a few buckets, not the whole index.
+    """
+
+    def __init__(self, fields: tuple[str, ...]) -> None:
+        self.fields = fields
+        self._buckets: dict[str, dict[Hashable, _CreationOrder]] = {field: {} for field in fields}
+        self._shared_fields: set[str] = set()
+        # buckets copied or created since the last `share`; None until the first one
+        self._owned: set[tuple[str, Hashable]] | None = None
+
+    @classmethod
+    def of(cls, fields: tuple[str, ...], entries: Iterable[tuple[object, tuple]]) -> _FieldIndex:
+        index = cls(fields)
+        for (field, value), items in index._grouped(entries).items():
+            index._buckets[field][value] = _CreationOrder.of(items)
+        return index
+
+    def share(self) -> _FieldIndex:
+        """Read-only view of the current buckets, for snapshots."""
+        view = _FieldIndex(self.fields)
+        view._buckets = dict(self._buckets)
+        self._shared_fields = set(self.fields)
+        self._owned = set()
+        return view
+
+    def _writable_buckets(self, field: str) -> dict[Hashable, _CreationOrder]:
+        buckets = self._buckets[field]
+        if field in self._shared_fields:
+            buckets = self._buckets[field] = buckets.copy()
+            self._shared_fields.discard(field)
+        return buckets
+
+    def _writable_bucket(self, field: str, value: Hashable) -> _CreationOrder:
+        """The bucket of `value`, created if missing and copied if a snapshot may read it."""
+        buckets = self._writable_buckets(field)
+        bucket = buckets.get(value)
+        if bucket is None:
+            bucket = buckets[value] = _CreationOrder()
+        elif self._owned is not None and (field, value) not in self._owned:
+            bucket = buckets[value] = bucket.copy()
+        if self._owned is not None:
+            self._owned.add((field, value))
+        return bucket
+
+    def _grouped(self, entries: Iterable[tuple[object, tuple]]) -> dict[tuple[str, Hashable], list]:
+        grouped: dict[tuple[str, Hashable], list] = defaultdict(list)
+        for item, values in entries:
+            for field, value in zip(self.fields, values):
+                if value is not None:
+                    grouped[field, value].append(item)
+        return grouped
+
+    def bucket(self, field: str, value: Hashable) -> _CreationOrder | None:
+        return self._buckets[field].get(value)
+
+    def add(self, item, values: tuple) -> None:
+        for field, value in zip(self.fields, values):
+            if value is not None:
+                self._writable_bucket(field, value).add(item)
+
+    def add_many(self, entries: Iterable[tuple[object, tuple]]) -> None:
+        for (field, value), items in self._grouped(entries).items():
+            self._writable_bucket(field, value).add_many(items)
+
+    def replace(self, item, values: tuple) -> None:
+        for field, value in zip(self.fields, values):
+            if value is not None:
+                self._writable_bucket(field, value).replace(item)
+
+    def discard(self, item, values: tuple) -> None:
+        self.discard_many([(item, values)])
+
+    def discard_many(self, entries: Iterable[tuple[object, tuple]]) -> None:
+        for (field, value), items in self._grouped(entries).items():
+            if value not in self._buckets[field]:
+                continue
+            buckets = self._writable_buckets(field)
+            bucket = self._writable_bucket(field, value)
+            if len(items) == 1:
+                bucket.discard(items[0])
+            else:
+                bucket.discard_many(items)
+            if not bucket:
+                del buckets[value]
 
 
 class Repository:
-    """In-memory repository with business helpers."""
+    """In-memory repository with business helpers.
+
+    Safe to share across the FastAPI thread pool: writes are serialized on a lock and
+    replace entities and aggregates instead of mutating them, while reads take no lock
+    and copy any collection before iterating it in Python.
+    Long reads such as analytics should run on `snapshot()`, an immutable point-in-time
+    view shared by every reader of the same generation.
+    """
 
     def __init__(self) -> None:
         self._coffees: dict[UUID, Coffee] = {}
@@ -30,175 +404,736 @@ class Repository:
         self._shots: dict[UUID, Shot] = {}
         self._tastings: dict[UUID, Tasting] = {}
         self._verdicts: dict[UUID, Verdict] = {}
+        # foreign-key indexes, kept in sync by every write path
+        self._shots_by_coffee: dict[UUID, dict[UUID, Shot]] = defaultdict(dict)
+        # tuples, replaced on write, so snapshots can share them
+        self._tastings_by_shot: dict[UUID, tuple[Tasting, ...]] = {}
+        self._verdict_by_coffee: dict[UUID, UUID] = {}
+        # running sensory aggregates per beverage type (None = all beverages), then per coffee
+        self._sensory: dict[BeverageType | None, dict[UUID, SensoryAggregate]] = defaultdict(dict)
+        # typed arrays mirroring shots and tastings, for vectorised analytics scans
+        self._columns = ColumnStore()
+        # bumped by every write; lets readers stamp derived results
+        self._generation = 0
+        # creation-ordered views backing list_* and keyset pagination
+        self._coffee_order = _CreationOrder()
+        self._water_order = _CreationOrder()
+        self._shot_order = _CreationOrder()
+        self._tasting_order = _CreationOrder()
+        self._verdict_order = _CreationOrder()
+        # creation-ordered buckets per filterable field, backing filtered listings
+        self._shot_fields = _FieldIndex(SHOT_FILTER_FIELDS)
+        self._tasting_fields = _FieldIndex(TASTING_FILTER_FIELDS)
+        self._write_lock = RLock()
+        self._read_only = False
+        self._snapshot: Repository | None = None
+        # containers the latest snapshot shares, copied by `_own` before their next change
+        self._shared: set[str] = set()
+        # coffees whose shot group was copied or created since then; None before any snapshot
+        self._owned_groups: set[UUID] | None = None
+        # receives every applied mutation once attached (see app.services.journal)
+        self._journal: MutationLog | None = None
+        # latest change per entity, including cascaded deletions, for the delta feed
+        self._changes = ChangeLog()
+
+    @classmethod
+    def from_entities(
+        cls,
+        coffees: Iterable[Coffee],
+        waters: Iterable[Water],
+        shots: Iterable[Shot],
+        tastings: Iterable[Tasting],
+        verdicts: Iterable[Verdict],
+        generation: int = 0,
+        read_only: bool = False,
+    ) -> Repository:
+        """Build a repository from complete entity sets, indexing each collection in one pass."""
+        repository = cls()
+        repository._coffees = {coffee.id: coffee for coffee in coffees}
+        repository._waters = {water.id: water for water in waters}
+        repository._shots = {shot.id: shot for shot in shots}
+        repository._tastings = {tasting.id: tasting for tasting in tastings}
+        repository._verdicts = {verdict.id: verdict for verdict in verdicts}
+        for shot in repository._shots.values():
+            repository._index_shot(shot)
+        sensory = repository._sensory
+        tastings_by_shot = repository._tastings_by_shot
+        for tasting in repository._tastings.values():
+            shot = repository._shots[tasting.shot_id]
+            tasting.shot_id = shot.id
+            tastings_by_shot[shot.id] = (*tastings_by_shot.get(shot.id, ()), tasting)
+            # fresh aggregates nobody else can see yet: safe to update in place
+            for key in (None, shot.beverage_type):
+                aggregate = sensory[key].get(shot.coffee_id)
+                if aggregate is None:
+                    aggregate = sensory[key][shot.coffee_id] = SensoryAggregate()
+                aggregate.add(tasting.sensory_mean)
+        repository._columns.add_shots(list(repository._shots.values()))
+        repository._columns.add_tastings(list(repository._tastings.values()))
+        repository._verdict_by_coffee = {verdict.coffee_id: verdict.id for verdict in repository._verdicts.values()}
+        repository._coffee_order = _CreationOrder.of(repository._coffees.values())
+        repository._water_order = _CreationOrder.of(repository._waters.values())
+        repository._shot_order = _CreationOrder.of(repository._shots.values())
+        repository._tasting_order = _CreationOrder.of(repository._tastings.values())
+        repository._verdict_order = _CreationOrder.of(repository._verdicts.values())
+        shots = repository._shots
+        repository._shot_fields = _FieldIndex.of(
+            SHOT_FILTER_FIELDS, ((shot, _shot_filter_values(shot)) for shot in shots.values())
+        )
+        repository._tasting_fields = _FieldIndex.of(
+            TASTING_FILTER_FIELDS,
+            ((tasting, _tasting_filter_values(shots[tasting.shot_id])) for tasting in repository._tastings.values()),
+        )
+        repository._generation = generation
+        # entities loaded here have no change entries: every older version needs a full sync
+        repository._changes.floor = generation + 1
+        if read_only:
+            repository._read_only = True
+            repository._snapshot = repository
+        return repository
+
+    def attach_journal(self, journal: MutationLog | None) -> None:
+        """Record every subsequent mutation in `journal`."""
+        with self._write_lock:
+            self._journal = journal
+
+    def close(self) -> None:
+        """Flush and detach the journal, if any."""
+        if self._journal is not None:
+            self._journal.close()
+
+    def _log(self, op: str, kind: type, value) -> None:
+        if self._journal is not None:
+            self._journal.append(op, kind, value)
+        if op == "delete":
+            self._changed(kind, value, deleted=True)
+        else:
+            self._changed(kind, value.id)
+
+    def _changed(self, kind: type, entity_id: UUID, deleted: bool = False) -> None:
+        # stamped with the generation the running write is about to publish
+        self._changes.record(KIND_OF[kind], entity_id, self._generation + 1, deleted)
+
+    def limit_changes(self, capacity: int) -> None:
+        """Keep at most `capacity` entries in the change log behind `changes_since`."""
+        with self._write_lock:
+            self._changes.capacity = capacity
+
+    def changes_since(self, version: int | None, epoch: int | None = None) -> ChangeSet:
+        """Entities changed after `version` and tombstones of those deleted, in O(changes).
+
+        Falls back to every entity (`full=True`) when `version` is missing, comes from another
+        epoch or predates what the change log still covers.
+        """
+        with self._write_lock:
+            log = self._changes
+            current = self._generation
+            collections = {
+                "coffees": self._coffees,
+                "waters": self._waters,
+                "shots": self._shots,
+                "tastings": self._tastings,
+                "verdicts": self._verdicts,
+            }
+            if not is_covered(version, epoch, current_epoch=log.epoch, current=current, floor=log.floor):
+                changes = ChangeSet(log.epoch, current, full=True)
+                for kind, items in collections.items():
+                    changes.upserts[kind] = list(items.values())
+                return changes
+            changes = ChangeSet(log.epoch, current, full=False)
+            for change in log.since(version):
+                if change.deleted:
+                    changes.deleted[change.kind].append(change.entity_id)
+                else:
+                    changes.upserts[change.kind].append(collections[change.kind][change.entity_id])
+            return changes
+
+    def replay(self, op: str, kind: type, value) -> None:
+        """Apply one journaled mutation: `put` carries an entity, `delete` its id."""
+        name = kind.__name__.lower()
+        if op == "delete":
+            # the public delete bumps the generation itself
+            getattr(self, f"delete_{name}")(value)
+            return
+        if kind is Tasting:
+            self._put_tasting(self._shots[value.shot_id], value)
+        else:
+            getattr(self, f"_put_{name}")(value)
+        self._generation += 1
+
+    def apply_changes(self, changes: ChangeSet) -> None:
+        """Catch up with the repository a `changes_since` delta (not `full`) was read from.
+
+        Deletions are applied children first and puts parents first, as a journal replay.
+        """
+        with self._write_lock:
+            for kind, name in reversed(KIND_OF.items()):
+                for entity_id in changes.deleted[name]:
+                    self.replay("delete", kind, entity_id)
+            for kind, name in KIND_OF.items():
+                for entity in changes.upserts[name]:
+                    if kind is Tasting and entity.id in self._tastings:
+                        # tastings are only ever inserted: a new version replaces the old one
+                        self.delete_tasting(entity.id)
+                    self.replay("put", kind, entity)
+            self._generation = changes.version
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group writes: other writers wait until the block ends, readers are not held up."""
+        with self._write_lock:
+            yield
+
+    @property
+    def generation(self) -> int:
+        """Monotonic write counter: unchanged generation means unchanged data."""
+        return self._generation
+
+    @property
+    def epoch(self) -> int:
+        """Identifier of this repository's sequence of generations, drawn afresh by each instance."""
+        return self._changes.epoch
+
+    def counts(self) -> dict[str, int]:
+        """Number of entities per collection, named like the API collections."""
+        return {
+            "coffees": len(self._coffees),
+            "waters": len(self._waters),
+            "shots": len(self._shots),
+            "tastings": len(self._tastings),
+            "verdicts": len(self._verdicts),
+        }
+
+    def snapshot(self) -> Repository:
+        """Immutable point-in-time view, taken at most once per generation.
+
+        The view shares the repository's containers instead of copying them; each write then
+        copies the containers it is about to change, the first time after a snapshot only. The
+        write lock is held for O(coffees + waters) work, whatever the number of shots.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot._generation == self._generation:
+            return snapshot
+        with self._write_lock:
+            if self._snapshot is None or self._snapshot._generation != self._generation:
+                self._snapshot = self._share()
+            return self._snapshot
+
+    def _share(self) -> Repository:
+        # entities and aggregates are replaced, never mutated, so sharing containers suffices
+        view = Repository()
+        for name in SHARED_CONTAINERS:
+            setattr(view, name, getattr(self, name))
+        self._shared = set(SHARED_CONTAINERS)
+        self._owned_groups = set()
+        view._sensory = defaultdict(dict, {k: v.copy() for k, v in self._sensory.items()})
+        view._columns = self._columns.share()
+        view._generation = self._generation
+        view._coffee_order = self._coffee_order.share()
+        view._water_order = self._water_order.share()
+        view._shot_order = self._shot_order.share()
+        view._tasting_order = self._tasting_order.share()
+        view._verdict_order = self._verdict_order.share()
+        view._shot_fields = self._shot_fields.share()
+        view._tasting_fields = self._tasting_fields.share()
+        view._read_only = True
+        view._snapshot = view
+        return view
+
+    def _own(self, name: str):
+        """The container stored at `name`, copied first if the latest snapshot shares it."""
+        container = getattr(self, name)
+        if name in self._shared:
+            container = container.copy()
+            setattr(self, name, container)
+            self._shared.discard(name)
+        return container
+
+    def _shot_group(self, coffee_id: UUID) -> dict[UUID, Shot]:
+        """Shots of a coffee by id, as a dict this repository may change in place."""
+        groups = self._own("_shots_by_coffee")
+        group = groups.get(coffee_id)
+        if group is None:
+            group = groups[coffee_id] = {}
+        elif self._owned_groups is not None and coffee_id not in self._owned_groups:
+            group = groups[coffee_id] = group.copy()
+        if self._owned_groups is not None:
+            self._owned_groups.add(coffee_id)
+        return group
+
+    @property
+    def columns(self) -> ColumnStore:
+        """Typed shot and tasting columns; only read them on a snapshot."""
+        return self._columns
 
     # Coffee
-    def list_coffees(self) -> list[Coffee]:
-        return sorted(self._coffees.values(), key=lambda c: c.created_at, reverse=True)
+    def list_coffees(self, after: CreationKey | None = None, limit: int | None = None) -> list[Coffee]:
+        return self._coffee_order.newest_first(after, limit)
 
     def get_coffee(self, coffee_id: UUID) -> Coffee | None:
         return self._coffees.get(coffee_id)
 
+    @_writer
     def upsert_coffee(self, payload: CoffeeCreate, coffee_id: UUID | None = None) -> Coffee:
-        instance = self._coffees.get(coffee_id) if coffee_id else None
-        if instance is None:
-            instance = Coffee(**payload.model_dump())
+        cost = compute_cost_per_shot(payload.price_eur, payload.weight_grams)
+        previous = self._coffees.get(coffee_id) if coffee_id else None
+        if previous is None:
+            instance = Coffee(**payload.model_dump(), cost_per_shot_eur=cost)
         else:
-            for field, value in payload.model_dump().items():
-                setattr(instance, field, value)
-        instance.cost_per_shot_eur = compute_cost_per_shot(payload.price_eur, payload.weight_grams)
-        self._coffees[instance.id] = instance
+            instance = replace(previous, **payload.model_dump(), cost_per_shot_eur=cost)
+        self._put_coffee(instance)
+        self._generation += 1
         return instance
 
+    def _put_coffee(self, coffee: Coffee) -> None:
+        if coffee.id in self._coffees:
+            self._coffee_order.replace(coffee)
+        else:
+            self._coffee_order.add(coffee)
+        self._own("_coffees")[coffee.id] = coffee
+        self._log("put", Coffee, coffee)
+
     def delete_coffee(self, coffee_id: UUID) -> None:
-        if coffee_id in self._coffees:
+        self.delete_coffees([coffee_id])
+
+    @_writer
+    def delete_coffees(self, coffee_ids: Iterable[UUID]) -> list[UUID]:
+        """Delete coffees with their shots, tastings and verdict, touching only those rows."""
+        deleted: list[UUID] = []
+        coffees: list[Coffee] = []
+        shots: list[Shot] = []
+        tastings: list[Tasting] = []
+        tasting_entries: list[tuple[Tasting, tuple]] = []
+        verdicts: list[Verdict] = []
+        for coffee_id in coffee_ids:
+            if coffee_id not in self._coffees:
+                continue
+            coffee = self._own("_coffees").pop(coffee_id)
+            coffees.append(coffee)
             # cascade shots/tastings/verdict
-            for shot_id, shot in list(self._shots.items()):
-                if shot.coffee_id == coffee_id:
-                    self.delete_shot(shot_id)
-            for verdict_id, verdict in list(self._verdicts.items()):
-                if verdict.coffee_id == coffee_id:
-                    self._verdicts.pop(verdict_id, None)
-            self._coffees.pop(coffee_id, None)
+            for shot_id in self._own("_shots_by_coffee").pop(coffee_id, {}):
+                shot = self._own("_shots").pop(shot_id)
+                shots.append(shot)
+                self._changed(Shot, shot_id, deleted=True)
+                shot_tastings = self._pop_tastings_for_shot(shot_id)
+                tastings.extend(shot_tastings)
+                values = _tasting_filter_values(shot)
+                tasting_entries.extend((tasting, values) for tasting in shot_tastings)
+            verdict_id = self._verdict_by_coffee.get(coffee_id)
+            if verdict_id is not None:
+                self._own("_verdict_by_coffee").pop(coffee_id)
+                verdicts.append(self._own("_verdicts").pop(verdict_id))
+                self._changed(Verdict, verdict_id, deleted=True)
+            for aggregates in self._sensory.values():
+                aggregates.pop(coffee_id, None)
+            deleted.append(coffee_id)
+            self._log("delete", Coffee, coffee_id)
+        if deleted:
+            self._columns.delete([shot.id for shot in shots], [tasting.id for tasting in tastings])
+            self._coffee_order.discard_many(coffees)
+            self._shot_order.discard_many(shots)
+            self._tasting_order.discard_many(tastings)
+            self._shot_fields.discard_many((shot, _shot_filter_values(shot)) for shot in shots)
+            self._tasting_fields.discard_many(tasting_entries)
+            self._verdict_order.discard_many(verdicts)
+            self._generation += 1
+        return deleted
 
     # Water
-    def list_waters(self) -> list[Water]:
-        return sorted(self._waters.values(), key=lambda w: w.created_at, reverse=True)
+    def list_waters(self, after: CreationKey | None = None, limit: int | None = None) -> list[Water]:
+        return self._water_order.newest_first(after, limit)
 
     def get_water(self, water_id: UUID) -> Water | None:
         return self._waters.get(water_id)
 
+    @_writer
     def upsert_water(self, payload: WaterCreate, water_id: UUID | None = None) -> Water:
-        instance = self._waters.get(water_id) if water_id else None
-        if instance is None:
+        previous = self._waters.get(water_id) if water_id else None
+        if previous is None:
             instance = Water(**payload.model_dump())
         else:
-            for field, value in payload.model_dump().items():
-                setattr(instance, field, value)
-        self._waters[instance.id] = instance
+            instance = replace(previous, **payload.model_dump())
+        self._put_water(instance)
+        self._generation += 1
         return instance
 
+    def _put_water(self, water: Water) -> None:
+        if water.id in self._waters:
+            self._water_order.replace(water)
+        else:
+            self._water_order.add(water)
+        self._own("_waters")[water.id] = water
+        self._log("put", Water, water)
+
+    @_writer
     def delete_water(self, water_id: UUID) -> None:
-        self._waters.pop(water_id, None)
+        if water_id in self._waters:
+            water = self._own("_waters").pop(water_id)
+            # shots keep existing without their water, like ON DELETE SET NULL in SQLite
+            bucket = self._shot_fields.bucket("water_id", water_id)
+            for shot in bucket.newest_first() if bucket is not None else ():
+                self._put_shot(replace(shot, water_id=None))
+            self._water_order.discard(water)
+            self._log("delete", Water, water_id)
+            self._generation += 1
 
     # Shots
-    def list_shots(self) -> list[Shot]:
-        return sorted(self._shots.values(), key=lambda s: s.created_at, reverse=True)
+    def list_shots(
+        self, after: CreationKey | None = None, limit: int | None = None, filters: ShotFilters | None = None
+    ) -> list[Shot]:
+        if filters is None:
+            return self._shot_order.newest_first(after, limit)
+        return self._filtered(self._shot_order, self._shot_fields, filters, _shot_filter_values, after, limit)
 
     def get_shot(self, shot_id: UUID) -> Shot | None:
         return self._shots.get(shot_id)
 
     def list_shots_for_coffee(self, coffee_id: UUID) -> list[Shot]:
-        return [shot for shot in self._shots.values() if shot.coffee_id == coffee_id]
+        return list(self._shots_by_coffee.get(coffee_id, {}).values())
 
+    @_writer
     def add_shot(self, payload: ShotCreate) -> Shot:
         if self.get_coffee(payload.coffee_id) is None:
             raise ValueError("coffee_not_found")
         if payload.water_id and self.get_water(payload.water_id) is None:
             raise ValueError("water_not_found")
-        shot = Shot(**payload.model_dump())
-        shot.brew_ratio = compute_brew_ratio(payload)
-        self._shots[shot.id] = shot
+        shot = build_shot(payload)
+        self._put_shot(shot)
+        self._generation += 1
         return shot
 
+    @_writer
+    def add_shots(self, payloads: Sequence[ShotCreate]) -> list[Shot]:
+        """Insert every shot or none; raises BulkInsertError listing the rejected items."""
+        shots = prepare_shots(self, payloads)
+        for shot in shots:
+            self._index_shot(shot)
+            self._log("put", Shot, shot)
+        self._columns.add_shots(shots)
+        self._shot_order.add_many(shots)
+        self._shot_fields.add_many((shot, _shot_filter_values(shot)) for shot in shots)
+        self._generation += 1
+        return shots
+
+    def _index_shot(self, shot: Shot) -> None:
+        # share the referenced entities' UUID objects and one copy of each grind setting
+        coffee = self._coffees.get(shot.coffee_id)
+        if coffee is not None:
+            shot.coffee_id = coffee.id
+        water = self._waters.get(shot.water_id) if shot.water_id else None
+        if water is not None:
+            shot.water_id = water.id
+        shot.grind_setting = intern(shot.grind_setting)
+        self._own("_shots")[shot.id] = shot
+        self._shot_group(shot.coffee_id)[shot.id] = shot
+
+    @_writer
     def update_shot(self, shot_id: UUID, payload: ShotCreate) -> Shot:
-        shot = self.get_shot(shot_id)
-        if shot is None:
+        previous = self.get_shot(shot_id)
+        if previous is None:
             raise ValueError("shot_not_found")
         if self.get_coffee(payload.coffee_id) is None:
             raise ValueError("coffee_not_found")
         if payload.water_id and self.get_water(payload.water_id) is None:
             raise ValueError("water_not_found")
-        for field, value in payload.model_dump().items():
-            setattr(shot, field, value)
-        shot.brew_ratio = compute_brew_ratio(payload)
-        self._shots[shot.id] = shot
+        shot = replace(previous, **payload.model_dump(), brew_ratio=compute_brew_ratio(payload))
+        self._put_shot(shot)
+        self._generation += 1
         return shot
 
+    def _put_shot(self, shot: Shot) -> None:
+        previous = self._shots.get(shot.id)
+        if previous is None:
+            self._shot_order.add(shot)
+        else:
+            self._shot_order.replace(shot)
+        if previous is not None and (previous.coffee_id, previous.beverage_type) != (shot.coffee_id, shot.beverage_type):
+            for tasting in self._tastings_by_shot.get(shot.id, ()):
+                self._track_sensory(previous.coffee_id, previous.beverage_type, tasting.sensory_mean, -1)
+                self._track_sensory(shot.coffee_id, shot.beverage_type, tasting.sensory_mean, 1)
+        if previous is not None and previous.coffee_id != shot.coffee_id:
+            self._unindex_shot(previous.coffee_id, shot.id)
+        self._index_shot(shot)
+        self._index_shot_fields(previous, shot)
+        self._columns.put_shot(shot)
+        self._log("put", Shot, shot)
+
+    def _index_shot_fields(self, previous: Shot | None, shot: Shot) -> None:
+        values = _shot_filter_values(shot)
+        if previous is None:
+            self._shot_fields.add(shot, values)
+            return
+        previous_values = _shot_filter_values(previous)
+        if previous_values == values:
+            self._shot_fields.replace(shot, values)
+            return
+        self._shot_fields.discard(previous, previous_values)
+        self._shot_fields.add(shot, values)
+        tastings = self._tastings_by_shot.get(shot.id, ())
+        self._tasting_fields.discard_many((tasting, (*previous_values, shot.id)) for tasting in tastings)
+        self._tasting_fields.add_many((tasting, (*values, shot.id)) for tasting in tastings)
+
+    @_writer
     def delete_shot(self, shot_id: UUID) -> None:
-        if shot_id in self._shots:
-            for tasting_id, tasting in list(self._tastings.items()):
-                if tasting.shot_id == shot_id:
-                    self._tastings.pop(tasting_id, None)
-            self._shots.pop(shot_id, None)
+        if shot_id not in self._shots:
+            return
+        shot = self._own("_shots").pop(shot_id)
+        self._shot_order.discard(shot)
+        tastings = self._pop_tastings_for_shot(shot_id)
+        for tasting in tastings:
+            self._track_sensory(shot.coffee_id, shot.beverage_type, tasting.sensory_mean, -1)
+        self._tasting_order.discard_many(tastings)
+        self._shot_fields.discard(shot, _shot_filter_values(shot))
+        values = _tasting_filter_values(shot)
+        self._tasting_fields.discard_many((tasting, values) for tasting in tastings)
+        self._columns.delete([shot_id], [tasting.id for tasting in tastings])
+        self._unindex_shot(shot.coffee_id, shot_id)
+        self._log("delete", Shot, shot_id)
+        self._generation += 1
+
+    def _pop_tastings_for_shot(self, shot_id: UUID) -> list[Tasting]:
+        if shot_id not in self._tastings_by_shot:
+            return []
+        by_id = self._own("_tastings")
+        tastings = [by_id.pop(tasting.id) for tasting in self._own("_tastings_by_shot").pop(shot_id)]
+        for tasting in tastings:
+            self._changed(Tasting, tasting.id, deleted=True)
+        return tastings
 
     # Tastings
-    def list_tastings(self) -> list[Tasting]:
-        return sorted(self._tastings.values(), key=lambda t: t.created_at, reverse=True)
+    def list_tastings(
+        self, after: CreationKey | None = None, limit: int | None = None, filters: TastingFilters | None = None
+    ) -> list[Tasting]:
+        if filters is None:
+            return self._tasting_order.newest_first(after, limit)
+
+        def values_of(tasting: Tasting) -> tuple | None:
+            shot = self._shots.get(tasting.shot_id)
+            return _tasting_filter_values(shot) if shot else None
+
+        return self._filtered(self._tasting_order, self._tasting_fields, filters, values_of, after, limit)
 
     def get_tasting(self, tasting_id: UUID) -> Tasting | None:
         return self._tastings.get(tasting_id)
 
     def list_tastings_for_shot(self, shot_id: UUID) -> list[Tasting]:
-        return [tasting for tasting in self._tastings.values() if tasting.shot_id == shot_id]
+        return list(self._tastings_by_shot.get(shot_id, ()))
 
+    @_writer
     def add_tasting(self, payload: TastingCreate) -> Tasting:
         shot = self.get_shot(payload.shot_id)
         if shot is None:
             raise ValueError("shot_not_found")
-        scores = {
-            "acidity_score": label_to_score(payload.acidity_label),
-            "bitterness_score": label_to_score(payload.bitterness_label),
-            "body_score": label_to_score(payload.body_label),
-            "aroma_score": label_to_score(payload.aroma_label),
-            "balance_score": label_to_score(payload.balance_label),
-            "finish_score": label_to_score(payload.finish_label),
-            "overall_score": label_to_score(payload.overall_label),
-        }
-        sensory_mean = compute_sensory_mean(scores.values())
-        tasting = Tasting(
-            shot_id=payload.shot_id,
-            comments=payload.comments,
-            sensory_mean=sensory_mean,
-            **scores,
-        )
-        self._tastings[tasting.id] = tasting
-        # auto-upsert verdict based on freshest tasting
-        status = verdict_from_mean(sensory_mean)
-        rationale = f"Moyenne sensorielle {mean_to_label(sensory_mean)} sur le dernier shot"
-        self.upsert_verdict(VerdictCreate(coffee_id=shot.coffee_id, status=status, rationale=rationale))
+        tasting = build_tasting(payload)
+        self._put_tasting(shot, tasting)
+        self._generation += 1
+        self.upsert_verdict(auto_verdict(shot.coffee_id, tasting.sensory_mean))
         return tasting
 
+    @_writer
+    def add_tastings(self, payloads: Sequence[TastingCreate]) -> list[Tasting]:
+        """Insert every tasting or none, then refresh each affected coffee's verdict once."""
+        prepared = prepare_tastings(self, payloads)
+        for shot, tasting in prepared:
+            self._index_tasting(shot, tasting)
+            self._log("put", Tasting, tasting)
+        tastings = [tasting for _, tasting in prepared]
+        self._columns.add_tastings(tastings)
+        self._tasting_order.add_many(tastings)
+        self._generation += 1
+        for coffee_id, sensory_mean in latest_means(prepared).items():
+            self.upsert_verdict(auto_verdict(coffee_id, sensory_mean))
+        return tastings
+
+    def _put_tasting(self, shot: Shot, tasting: Tasting) -> None:
+        self._index_tasting(shot, tasting)
+        self._columns.add_tastings([tasting])
+        self._tasting_order.add(tasting)
+        self._log("put", Tasting, tasting)
+
+    def _index_tasting(self, shot: Shot, tasting: Tasting) -> None:
+        tasting.shot_id = shot.id
+        self._own("_tastings")[tasting.id] = tasting
+        self._own("_tastings_by_shot")[shot.id] = (*self._tastings_by_shot.get(shot.id, ()), tasting)
+        self._tasting_fields.add(tasting, _tasting_filter_values(shot))
+        self._track_sensory(shot.coffee_id, shot.beverage_type, tasting.sensory_mean, 1)
+
+    @_writer
     def delete_tasting(self, tasting_id: UUID) -> None:
-        self._tastings.pop(tasting_id, None)
+        if tasting_id in self._tastings:
+            tasting = self._own("_tastings").pop(tasting_id)
+            shot = self._shots[tasting.shot_id]
+            self._track_sensory(shot.coffee_id, shot.beverage_type, tasting.sensory_mean, -1)
+            self._tasting_order.discard(tasting)
+            self._tasting_fields.discard(tasting, _tasting_filter_values(shot))
+            self._columns.delete(tasting_ids=[tasting_id])
+            tastings_by_shot = self._own("_tastings_by_shot")
+            remaining = tuple(t for t in tastings_by_shot[shot.id] if t.id != tasting_id)
+            if remaining:
+                tastings_by_shot[shot.id] = remaining
+            else:
+                del tastings_by_shot[shot.id]
+            self._log("delete", Tasting, tasting_id)
+            self._generation += 1
 
     # Verdicts
-    def list_verdicts(self) -> list[Verdict]:
-        return list(self._verdicts.values())
+    def list_verdicts(self, after: CreationKey | None = None, limit: int | None = None) -> list[Verdict]:
+        return self._verdict_order.newest_first(after, limit)
 
     def get_verdict(self, verdict_id: UUID) -> Verdict | None:
         return self._verdicts.get(verdict_id)
 
+    @_writer
     def upsert_verdict(self, payload: VerdictCreate, verdict_id: UUID | None = None) -> Verdict:
-        instance = self._verdicts.get(verdict_id) if verdict_id else None
-        if instance is None:
+        previous = self._verdicts.get(verdict_id) if verdict_id else None
+        if previous is None:
             # ensure uniqueness per coffee
-            existing = next(
-                (v for v in self._verdicts.values() if v.coffee_id == payload.coffee_id),
-                None,
-            )
-            instance = existing or Verdict(coffee_id=payload.coffee_id, status=payload.status, rationale=payload.rationale)
-        for field, value in payload.model_dump().items():
-            setattr(instance, field, value)
-        self._verdicts[instance.id] = instance
+            existing_id = self._verdict_by_coffee.get(payload.coffee_id)
+            previous = self._verdicts.get(existing_id) if existing_id else None
+        if previous is None:
+            instance = Verdict(**payload.model_dump())
+        else:
+            instance = replace(previous, **payload.model_dump())
+        self._put_verdict(instance)
+        self._generation += 1
         return instance
 
+    def _put_verdict(self, verdict: Verdict) -> None:
+        coffee = self._coffees.get(verdict.coffee_id)
+        if coffee is not None:
+            verdict.coffee_id = coffee.id
+        if verdict.rationale is not None:
+            verdict.rationale = intern(verdict.rationale)
+        replaced_id = self._verdict_by_coffee.get(verdict.coffee_id)
+        if replaced_id is not None and replaced_id != verdict.id:
+            # one verdict per coffee, as uq_verdict_coffee in SQLite: the moved verdict replaces it
+            self._verdict_order.discard(self._own("_verdicts").pop(replaced_id))
+            self._log("delete", Verdict, replaced_id)
+        previous = self._verdicts.get(verdict.id)
+        if previous is None:
+            self._verdict_order.add(verdict)
+        else:
+            self._verdict_order.replace(verdict)
+        if previous is not None and previous.coffee_id != verdict.coffee_id:
+            if self._verdict_by_coffee.get(previous.coffee_id) == verdict.id:
+                self._own("_verdict_by_coffee").pop(previous.coffee_id)
+        self._own("_verdicts")[verdict.id] = verdict
+        self._own("_verdict_by_coffee")[verdict.coffee_id] = verdict.id
+        self._log("put", Verdict, verdict)
+
+    @_writer
     def delete_verdict(self, verdict_id: UUID) -> None:
-        self._verdicts.pop(verdict_id, None)
+        if verdict_id not in self._verdicts:
+            return
+        verdict = self._own("_verdicts").pop(verdict_id)
+        self._verdict_order.discard(verdict)
+        if self._verdict_by_coffee.get(verdict.coffee_id) == verdict_id:
+            self._own("_verdict_by_coffee").pop(verdict.coffee_id)
+        self._log("delete", Verdict, verdict_id)
+        self._generation += 1
+
+    @staticmethod
+    def _filtered(
+        order: _CreationOrder,
+        index: _FieldIndex,
+        filters: ShotFilters,
+        values_of,
+        after: CreationKey | None,
+        limit: int | None,
+    ) -> list:
+        """Filtered listing, newest first, walking only the most selective bucket.
+
+        Every equality filter has a creation-ordered bucket and the time range bounds it by
+        bisection, so the cost is that of the smallest bucket within the range; the other
+        filters are checked on its items.
+        """
+        lower, upper = filters.creation_bounds(after)
+        wanted = filters.equalities()
+        candidates: list[tuple[_CreationOrder, str | None]] = [(order, None)]
+        for field, value in wanted.items():
+            bucket = index.bucket(field, value)
+            if bucket is None:
+                return []
+            candidates.append((bucket, field))
+        source, chosen = min(candidates, key=lambda candidate: candidate[0].count_between(lower, upper))
+        residual = [(index.fields.index(field), value) for field, value in wanted.items() if field != chosen]
+        if not residual:
+            return source.newest_first(upper, limit, lower)
+        matches = []
+        for item in source.newest_first(upper, None, lower):
+            values = values_of(item)
+            if values is not None and all(values[position] == value for position, value in residual):
+                matches.append(item)
+                if len(matches) == limit:
+                    break
+        return matches
 
     # Helpers for analytics
     def shots_by_coffee(self, coffee_id: UUID):
-        return [shot for shot in self._shots.values() if shot.coffee_id == coffee_id]
+        return self.list_shots_for_coffee(coffee_id)
 
     def tastings_by_coffee(self, coffee_id: UUID) -> list[Tasting]:
-        coffee_shots = {shot.id for shot in self.shots_by_coffee(coffee_id)}
-        return [t for t in self._tastings.values() if t.shot_id in coffee_shots]
+        return [
+            tasting
+            for shot_id in list(self._shots_by_coffee.get(coffee_id, {}))
+            for tasting in self._tastings_by_shot.get(shot_id, ())
+        ]
+
+    def verdict_for_coffee(self, coffee_id: UUID) -> Verdict | None:
+        verdict_id = self._verdict_by_coffee.get(coffee_id)
+        return self._verdicts.get(verdict_id) if verdict_id else None
 
     def tasting_counts(self) -> dict[UUID, int]:
         counts: dict[UUID, int] = defaultdict(int)
-        for tasting in self._tastings.values():
-            shot = self._shots.get(tasting.shot_id)
-            if shot:
-                counts[shot.coffee_id] += 1
-        for coffee_id in self._coffees:
+        for coffee_id, shots in list(self._shots_by_coffee.items()):
+            counts[coffee_id] += sum(len(self._tastings_by_shot.get(shot_id, ())) for shot_id in list(shots))
+        for coffee_id in list(self._coffees):
             counts.setdefault(coffee_id, 0)
         return counts
+
+    def sensory_aggregate(
+        self, coffee_id: UUID, beverage_type: BeverageType | None = None
+    ) -> SensoryAggregate | None:
+        return self._sensory.get(beverage_type, {}).get(coffee_id)
+
+    def sensory_aggregates(self, beverage_type: BeverageType | None = None) -> dict[UUID, SensoryAggregate]:
+        """Aggregates of every tasted coffee, optionally restricted to one beverage type."""
+        return dict(self._sensory.get(beverage_type, {}))
+
+    def recompute_sensory_aggregates(self) -> dict[BeverageType | None, dict[UUID, SensoryAggregate]]:
+        """Rebuild the sensory aggregates from scratch (reference for consistency checks)."""
+        aggregates: dict[BeverageType | None, dict[UUID, SensoryAggregate]] = defaultdict(dict)
+        shots = self._shots.copy()
+        for tasting in list(self._tastings.values()):
+            shot = shots[tasting.shot_id]
+            for key in (None, shot.beverage_type):
+                aggregates[key].setdefault(shot.coffee_id, SensoryAggregate()).add(tasting.sensory_mean)
+        return aggregates
+
+    def sensory_aggregates_consistent(self) -> bool:
+        def _non_empty(aggregates: dict) -> dict:
+            return {key: dict(bucket) for key, bucket in aggregates.items() if bucket}
+
+        snapshot = self.snapshot()
+        return _non_empty(snapshot._sensory) == _non_empty(snapshot.recompute_sensory_aggregates())
+
+    def _track_sensory(
+        self, coffee_id: UUID, beverage_type: BeverageType, sensory_mean: float, weight: int
+    ) -> None:
+        for key in (None, beverage_type):
+            aggregates = self._sensory[key]
+            aggregate = replace(aggregates.get(coffee_id) or SensoryAggregate())
+            aggregate.add(sensory_mean, weight)
+            if aggregate.count == 0:
+                aggregates.pop(coffee_id, None)
+            else:
+                aggregates[coffee_id] = aggregate
+
+    def _unindex_shot(self, coffee_id: UUID, shot_id: UUID) -> None:
+        if shot_id not in self._shots_by_coffee.get(coffee_id, {}):
+            return
+        group = self._shot_group(coffee_id)
+        del group[shot_id]
+        if not group:
+            del self._shots_by_coffee[coffee_id]
+
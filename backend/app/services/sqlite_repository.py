@@ -0,0 +1,774 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Iterable, Iterator, Sequence
+from uuid import UUID
+
+from app.models.entities import (
+    BeverageType,
+    Coffee,
+    CoffeeFormat,
+    Shot,
+    Tasting,
+    Verdict,
+    VerdictStatus,
+    Water,
+    WaterSource,
+)
+from app.models.schemas import CoffeeCreate, ShotCreate, TastingCreate, VerdictCreate, WaterCreate
+from app.services.analysis import SensoryAggregate, compute_brew_ratio, compute_cost_per_shot
+from app.services.changes import DEFAULT_CAPACITY, KINDS, ChangeSet, is_covered
+from app.services.repository import (
+    SHOT_FILTER_FIELDS,
+    CreationKey,
+    Repository,
+    ShotFilters,
+    TastingFilters,
+    auto_verdict,
+    build_shot,
+    build_tasting,
+    latest_means,
+    prepare_shots,
+    prepare_tastings,
+)
+
+# SQLite flavour of db/migrations/001_initial.sql: same tables, constraints and index names,
+# plus (created_at, id) indexes for keyset listings and the water measures exposed by the API.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key     TEXT PRIMARY KEY,
+    value   INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0);
+-- rows written before the change log existed have no entry: older versions need a full sync
+INSERT OR IGNORE INTO meta (key, value) SELECT 'changes_floor', value FROM meta WHERE key = 'generation';
+INSERT OR IGNORE INTO meta (key, value) VALUES ('changes_epoch', random() & 4611686018427387903);
+
+-- latest change per entity, maintained by the triggers below (cascades included)
+CREATE TABLE IF NOT EXISTS changes (
+    kind        TEXT    NOT NULL,
+    entity_id   TEXT    NOT NULL,
+    version     INTEGER NOT NULL,
+    deleted     INTEGER NOT NULL,
+    PRIMARY KEY (kind, entity_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_changes_version ON changes(version);
+
+CREATE TABLE IF NOT EXISTS coffees (
+    id                  TEXT PRIMARY KEY,
+    name                TEXT    NOT NULL,
+    roaster             TEXT    NOT NULL,
+    reference           TEXT,
+    format              TEXT    NOT NULL CHECK (format IN ('grain', 'moulu')),
+    weight_grams        INTEGER NOT NULL CHECK (weight_grams > 0),
+    price_eur           REAL    NOT NULL CHECK (price_eur > 0),
+    purchased_at        TEXT    NOT NULL,
+    cost_per_shot_eur   REAL    NOT NULL,
+    created_at          TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_coffees_created ON coffees(created_at, id);
+
+CREATE TABLE IF NOT EXISTS waters (
+    id                      TEXT PRIMARY KEY,
+    label                   TEXT NOT NULL,
+    source                  TEXT NOT NULL CHECK (source IN ('robinet', 'bouteille')),
+    brand                   TEXT,
+    mineralization_ppm      REAL,
+    hardness_ca_mg_l        REAL,
+    alkalinity_hco3_mg_l    REAL,
+    ph                      REAL,
+    filter_type             TEXT,
+    created_at              TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_waters_created ON waters(created_at, id);
+
+CREATE TABLE IF NOT EXISTS shots (
+    id                      TEXT PRIMARY KEY,
+    coffee_id               TEXT NOT NULL REFERENCES coffees(id) ON DELETE CASCADE,
+    water_id                TEXT REFERENCES waters(id) ON DELETE SET NULL,
+    beverage_type           TEXT NOT NULL CHECK (beverage_type IN ('ristretto', 'expresso', 'cafe_long')),
+    grind_setting           TEXT NOT NULL,
+    dose_in_grams           REAL NOT NULL CHECK (dose_in_grams > 0),
+    beverage_weight_grams   REAL NOT NULL CHECK (beverage_weight_grams > 0),
+    extraction_time_seconds REAL NOT NULL CHECK (extraction_time_seconds > 0),
+    brew_ratio              REAL NOT NULL,
+    notes                   TEXT,
+    created_at              TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_shots_coffee ON shots(coffee_id);
+CREATE INDEX IF NOT EXISTS idx_shots_water_beverage ON shots(water_id, beverage_type);
+CREATE INDEX IF NOT EXISTS idx_shots_created ON shots(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_shots_coffee_created ON shots(coffee_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_shots_water_created ON shots(water_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_shots_beverage_created ON shots(beverage_type, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_shots_grind_created ON shots(grind_setting, created_at, id);
+
+CREATE TABLE IF NOT EXISTS tastings (
+    id                      TEXT PRIMARY KEY,
+    shot_id                 TEXT    NOT NULL REFERENCES shots(id) ON DELETE CASCADE,
+    acidity_score           INTEGER NOT NULL CHECK (acidity_score BETWEEN 1 AND 5),
+    bitterness_score        INTEGER NOT NULL CHECK (bitterness_score BETWEEN 1 AND 5),
+    body_score              INTEGER NOT NULL CHECK (body_score BETWEEN 1 AND 5),
+    aroma_score             INTEGER NOT NULL CHECK (aroma_score BETWEEN 1 AND 5),
+    balance_score           INTEGER NOT NULL CHECK (balance_score BETWEEN 1 AND 5),
+    finish_score            INTEGER NOT NULL CHECK (finish_score BETWEEN 1 AND 5),
+    overall_score           INTEGER NOT NULL CHECK (overall_score BETWEEN 1 AND 5),
+    sensory_mean            REAL    NOT NULL,
+    weighted_sensory_mean   REAL,
+    comments                TEXT,
+    created_at              TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tastings_shot ON tastings(shot_id);
+CREATE INDEX IF NOT EXISTS idx_tastings_created ON tastings(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tastings_shot_created ON tastings(shot_id, created_at, id);
+
+CREATE TABLE IF NOT EXISTS verdicts (
+    id          TEXT PRIMARY KEY,
+    coffee_id   TEXT NOT NULL REFERENCES coffees(id) ON DELETE CASCADE,
+    status      TEXT NOT NULL CHECK (status IN ('racheter', 'a_affiner', 'en_observation', 'a_eviter')),
+    rationale   TEXT,
+    created_at  TEXT NOT NULL,
+    CONSTRAINT uq_verdict_coffee UNIQUE (coffee_id)
+);
+CREATE INDEX IF NOT EXISTS idx_verdict_status ON verdicts(status);
+CREATE INDEX IF NOT EXISTS idx_verdicts_created ON verdicts(created_at, id);
+"""
+
+COLUMNS = {
+    "coffees": (
+        "id", "name", "roaster", "reference", "format", "weight_grams", "price_eur",
+        "purchased_at", "cost_per_shot_eur", "created_at",
+    ),
+    "waters": (
+        "id", "label", "source", "brand", "mineralization_ppm", "hardness_ca_mg_l",
+        "alkalinity_hco3_mg_l", "ph", "filter_type", "created_at",
+    ),
+    "shots": (
+        "id", "coffee_id", "water_id", "beverage_type", "grind_setting", "dose_in_grams",
+        "beverage_weight_grams", "extraction_time_seconds", "brew_ratio", "notes", "created_at",
+    ),
+    "tastings": (
+        "id", "shot_id", "acidity_score", "bitterness_score", "body_score", "aroma_score",
+        "balance_score", "finish_score", "overall_score", "sensory_mean", "weighted_sensory_mean",
+        "comments", "created_at",
+    ),
+    "verdicts": ("id", "coffee_id", "status", "rationale", "created_at"),
+}
+
+# Statements are plain constants so sqlite3's per-connection statement cache reuses them.
+SELECT = {table: f"SELECT {', '.join(columns)} FROM {table}" for table, columns in COLUMNS.items()}
+INSERT = {
+    table: f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    for table, columns in COLUMNS.items()
+}
+UPDATE = {
+    table: f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in columns[1:-1])} WHERE id = ?"
+    for table, columns in COLUMNS.items()
+}
+BY_ID = {table: f"{SELECT[table]} WHERE id = ?" for table in COLUMNS}
+NEWEST_FIRST = {table: f"{SELECT[table]} ORDER BY created_at DESC, id DESC LIMIT ?" for table in COLUMNS}
+NEWEST_FIRST_AFTER = {
+    table: f"{SELECT[table]} WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?"
+    for table in COLUMNS
+}
+DELETE = {table: f"DELETE FROM {table} WHERE id = ?" for table in COLUMNS}
+# filtered listings: shots are aliased s and tastings t, which join s when a shot field is filtered
+FILTERED = {
+    "shots": f"SELECT {', '.join(f's.{c}' for c in COLUMNS['shots'])} FROM shots s",
+    "tastings": f"SELECT {', '.join(f't.{c}' for c in COLUMNS['tastings'])} FROM tastings t",
+}
+FILTERED_ALIAS = {"shots": "s", "tastings": "t"}
+OLDEST_FIRST = {table: f"{SELECT[table]} ORDER BY created_at, id" for table in COLUMNS}
+
+SHOTS_FOR_COFFEE = f"{SELECT['shots']} WHERE coffee_id = ? ORDER BY created_at, id"
+TASTINGS_FOR_SHOT = f"{SELECT['tastings']} WHERE shot_id = ? ORDER BY created_at, id"
+TASTINGS_FOR_COFFEE = (
+    f"SELECT {', '.join(f't.{c}' for c in COLUMNS['tastings'])} FROM tastings t "
+    "JOIN shots s ON s.id = t.shot_id WHERE s.coffee_id = ? ORDER BY s.created_at, s.id, t.created_at, t.id"
+)
+VERDICT_FOR_COFFEE = f"{SELECT['verdicts']} WHERE coffee_id = ?"
+TASTING_COUNTS = (
+    "SELECT c.id, COUNT(t.id) FROM coffees c "
+    "LEFT JOIN shots s ON s.coffee_id = c.id LEFT JOIN tastings t ON t.shot_id = s.id GROUP BY c.id"
+)
+_CENTI = "CAST(ROUND(t.sensory_mean * 100) AS INTEGER)"
+SENSORY_AGGREGATES = (
+    f"SELECT s.coffee_id, COUNT(*), SUM({_CENTI}), SUM({_CENTI} * {_CENTI}) "
+    "FROM tastings t JOIN shots s ON s.id = t.shot_id"
+)
+SENSORY_ALL = f"{SENSORY_AGGREGATES} GROUP BY s.coffee_id"
+SENSORY_FOR_BEVERAGE = f"{SENSORY_AGGREGATES} WHERE s.beverage_type = ? GROUP BY s.coffee_id"
+SENSORY_FOR_COFFEE = f"{SENSORY_AGGREGATES} WHERE s.coffee_id = ? GROUP BY s.coffee_id"
+SENSORY_FOR_COFFEE_BEVERAGE = f"{SENSORY_AGGREGATES} WHERE s.coffee_id = ? AND s.beverage_type = ? GROUP BY s.coffee_id"
+GENERATION = "SELECT value FROM meta WHERE key = 'generation'"
+EPOCH = "SELECT value FROM meta WHERE key = 'changes_epoch'"
+COUNTS = "SELECT " + ", ".join(f"(SELECT COUNT(*) FROM {table})" for table in COLUMNS)
+BUMP_GENERATION = "UPDATE meta SET value = value + 1 WHERE key = 'generation' RETURNING value"
+# each change is stamped with the generation its transaction is about to publish
+_NEXT_VERSION = "(SELECT value + 1 FROM meta WHERE key = 'generation')"
+# An upsert rather than INSERT OR REPLACE: when the trigger fires from a foreign key action
+# (ON DELETE SET NULL on shots.water_id), the conflict policy of the outer statement applies and
+# the REPLACE fails on the primary key. Triggers are recreated so existing databases get this.
+CHANGE_TRIGGERS = "".join(
+    f"""
+DROP TRIGGER IF EXISTS changes_{table}_{event};
+CREATE TRIGGER changes_{table}_{event} AFTER {event.upper()} ON {table} BEGIN
+    INSERT INTO changes (kind, entity_id, version, deleted)
+    VALUES ('{table}', {row}.id, {_NEXT_VERSION}, {deleted})
+    ON CONFLICT(kind, entity_id) DO UPDATE SET version = excluded.version, deleted = excluded.deleted;
+END;"""
+    for table in COLUMNS
+    for event, row, deleted in (("insert", "NEW", 0), ("update", "NEW", 0), ("delete", "OLD", 1))
+)
+CHANGES_META = "SELECT key, value FROM meta WHERE key IN ('generation', 'changes_floor', 'changes_epoch')"
+CHANGED = {
+    table: f"{SELECT[table]} WHERE id IN "
+    f"(SELECT entity_id FROM changes WHERE kind = '{table}' AND deleted = 0 AND version > ?) ORDER BY created_at, id"
+    for table in COLUMNS
+}
+DELETED = "SELECT kind, entity_id FROM changes WHERE deleted = 1 AND version > ? ORDER BY version"
+# version of the newest change beyond the capacity, which becomes the new floor once pruned
+PRUNE_BOUNDARY = "SELECT version FROM changes ORDER BY version DESC LIMIT 1 OFFSET ?"
+PRUNE_CHANGES = "DELETE FROM changes WHERE version <= ?"
+RAISE_FLOOR = "UPDATE meta SET value = max(value, ?) WHERE key = 'changes_floor'"
+# writes between two prunings of the change log
+PRUNE_EVERY = 256
+
+
+def _db_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="microseconds")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _uuid(value: str | None) -> UUID | None:
+    return UUID(value) if value else None
+
+
+def _coffee(row: sqlite3.Row) -> Coffee:
+    return Coffee(
+        id=UUID(row["id"]),
+        name=row["name"],
+        roaster=row["roaster"],
+        reference=row["reference"],
+        format=CoffeeFormat(row["format"]),
+        weight_grams=row["weight_grams"],
+        price_eur=row["price_eur"],
+        purchased_at=date.fromisoformat(row["purchased_at"]),
+        cost_per_shot_eur=row["cost_per_shot_eur"],
+        created_at=datetime.fromisoformat(row["created_at"]),
+    )
+
+
+def _water(row: sqlite3.Row) -> Water:
+    return Water(
+        id=UUID(row["id"]),
+        label=row["label"],
+        source=WaterSource(row["source"]),
+        brand=row["brand"],
+        mineralization_ppm=row["mineralization_ppm"],
+        hardness_ca_mg_l=row["hardness_ca_mg_l"],
+        alkalinity_hco3_mg_l=row["alkalinity_hco3_mg_l"],
+        ph=row["ph"],
+        filter_type=row["filter_type"],
+        created_at=datetime.fromisoformat(row["created_at"]),
+    )
+
+
+def _shot(row: sqlite3.Row) -> Shot:
+    return Shot(
+        id=UUID(row["id"]),
+        coffee_id=UUID(row["coffee_id"]),
+        water_id=_uuid(row["water_id"]),
+        beverage_type=BeverageType(row["beverage_type"]),
+        grind_setting=row["grind_setting"],
+        dose_in_grams=row["dose_in_grams"],
+        beverage_weight_grams=row["beverage_weight_grams"],
+        extraction_time_seconds=row["extraction_time_seconds"],
+        brew_ratio=row["brew_ratio"],
+        notes=row["notes"],
+        created_at=datetime.fromisoformat(row["created_at"]),
+    )
+
+
+def _tasting(row: sqlite3.Row) -> Tasting:
+    return Tasting(
+        id=UUID(row["id"]),
+        shot_id=UUID(row["shot_id"]),
+        acidity_score=row["acidity_score"],
+        bitterness_score=row["bitterness_score"],
+        body_score=row["body_score"],
+        aroma_score=row["aroma_score"],
+        balance_score=row["balance_score"],
+        finish_score=row["finish_score"],
+        overall_score=row["overall_score"],
+        sensory_mean=row["sensory_mean"],
+        weighted_sensory_mean=row["weighted_sensory_mean"],
+        comments=row["comments"],
+        created_at=datetime.fromisoformat(row["created_at"]),
+    )
+
+
+def _verdict(row: sqlite3.Row) -> Verdict:
+    return Verdict(
+        id=UUID(row["id"]),
+        coffee_id=UUID(row["coffee_id"]),
+        status=VerdictStatus(row["status"]),
+        rationale=row["rationale"],
+        created_at=datetime.fromisoformat(row["created_at"]),
+    )
+
+
+def _aggregate(row: sqlite3.Row) -> SensoryAggregate:
+    return SensoryAggregate(count=row[1], total=row[2], total_sq=row[3])
+
+
+class SqliteRepository:
+    """SQLite-backed repository exposing the same interface as the in-memory `Repository`.
+
+    Each thread gets its own connection in WAL mode, so readers never wait for the writer.
+    Writes run inside `transaction()`, which callers can widen to batch many writes into a
+    single commit. Deleting a water nulls `water_id` on its shots, as the Postgres schema does.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._snapshot: Repository | None = None
+        self._snapshot_lock = threading.Lock()
+        # in-memory copy of the database behind `snapshot`, kept up to date from the change log
+        self._mirror: Repository | None = None
+        self.change_capacity = DEFAULT_CAPACITY
+        self._connection().executescript(SCHEMA + CHANGE_TRIGGERS)
+        # drawn once when the schema is created, then shared by every process using the file
+        self._epoch = self._execute(EPOCH).fetchone()[0]
+
+    @classmethod
+    def from_url(cls, database_url: str) -> SqliteRepository:
+        path = database_url.removeprefix("sqlite:///")
+        if path == database_url or not path or path == ":memory:":
+            raise ValueError("database_url must look like sqlite:///path/to/file.db")
+        return cls(path)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, isolation_level=None, check_same_thread=False, cached_statements=256
+            )
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute("PRAGMA foreign_keys = ON")
+            connection.execute("PRAGMA busy_timeout = 5000")
+            self._local.connection = connection
+            self._local.depth = 0
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def _execute(self, sql: str, params: Iterable[Any] = ()) -> sqlite3.Cursor:
+        return self._connection().execute(sql, [_db_value(p) for p in params])
+
+    def _execute_many(self, sql: str, rows: Iterable[Iterable[Any]]) -> None:
+        self._connection().executemany(sql, ([_db_value(p) for p in row] for row in rows))
+
+    def _one(self, sql: str, params: Iterable[Any], factory):
+        row = self._execute(sql, params).fetchone()
+        return factory(row) if row else None
+
+    def _all(self, sql: str, params: Iterable[Any], factory) -> list:
+        return [factory(row) for row in self._execute(sql, params)]
+
+    def _row(self, table: str, instance) -> list[Any]:
+        return [getattr(instance, column) for column in COLUMNS[table]]
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Run the enclosed writes in one IMMEDIATE transaction (nested calls join it)."""
+        connection = self._connection()
+        if self._local.depth == 0:
+            connection.execute("BEGIN IMMEDIATE")
+        self._local.depth += 1
+        try:
+            yield
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                connection.execute("ROLLBACK")
+            raise
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            connection.execute("COMMIT")
+
+    @contextmanager
+    def _read(self) -> Iterator[None]:
+        """Run the enclosed reads against one consistent WAL snapshot."""
+        connection = self._connection()
+        if self._local.depth:
+            yield
+            return
+        connection.execute("BEGIN")
+        try:
+            yield
+        finally:
+            connection.execute("COMMIT")
+
+    def snapshot(self) -> Repository:
+        """Immutable in-memory view of one consistent read, refreshed at most once per generation.
+
+        An in-memory mirror of the database catches up through `changes_since`, so a new
+        generation costs O(changes); the whole database is loaded only the first time, or once
+        the change log no longer covers the mirror. Concurrent callers after a write wait for a
+        single refresh instead of each running their own.
+        """
+        cached = self._snapshot
+        if cached is not None and cached.generation == self.generation:
+            return cached
+        with self._snapshot_lock:
+            mirror = self._mirror
+            changes = self.changes_since(None if mirror is None else mirror.generation, self._epoch)
+            cached = self._snapshot
+            if cached is not None and cached.generation == changes.version:
+                return cached
+            if mirror is None or changes.full:
+                mirror = Repository.from_entities(
+                    *(changes.upserts[kind] for kind in KINDS), generation=changes.version
+                )
+                # nobody reads the change feed of the mirror
+                mirror.limit_changes(0)
+                self._mirror = mirror
+            else:
+                mirror.apply_changes(changes)
+            self._snapshot = mirror.snapshot()
+            return self._snapshot
+
+    def _written(self) -> None:
+        generation = self._execute(BUMP_GENERATION).fetchone()[0]
+        if generation % PRUNE_EVERY == 0:
+            self._prune_changes()
+
+    def _prune_changes(self) -> None:
+        boundary = self._execute(PRUNE_BOUNDARY, (self.change_capacity,)).fetchone()
+        if boundary is not None:
+            self._execute(PRUNE_CHANGES, (boundary[0],))
+            self._execute(RAISE_FLOOR, (boundary[0],))
+
+    def limit_changes(self, capacity: int) -> None:
+        """Keep about `capacity` entries in the change log (pruned every PRUNE_EVERY writes)."""
+        self.change_capacity = capacity
+
+    def changes_since(self, version: int | None, epoch: int | None = None) -> ChangeSet:
+        """Entities changed after `version` and tombstones of those deleted (see `Repository`)."""
+        factories = {"coffees": _coffee, "waters": _water, "shots": _shot, "tastings": _tasting, "verdicts": _verdict}
+        with self._read():
+            meta = dict(self._execute(CHANGES_META).fetchall())
+            current, current_epoch = meta["generation"], meta["changes_epoch"]
+            if not is_covered(
+                version, epoch, current_epoch=current_epoch, current=current, floor=meta["changes_floor"]
+            ):
+                changes = ChangeSet(current_epoch, current, full=True)
+                for table, factory in factories.items():
+                    changes.upserts[table] = self._all(OLDEST_FIRST[table], (), factory)
+                return changes
+            changes = ChangeSet(current_epoch, current, full=False)
+            if version == current:
+                return changes
+            for table, factory in factories.items():
+                changes.upserts[table] = self._all(CHANGED[table], (version,), factory)
+            for kind, entity_id in self._execute(DELETED, (version,)):
+                changes.deleted[kind].append(UUID(entity_id))
+            return changes
+
+    @property
+    def generation(self) -> int:
+        """Monotonic write counter shared by every process using the database."""
+        return self._execute(GENERATION).fetchone()[0]
+
+    @property
+    def epoch(self) -> int:
+        """Identifier of the database's sequence of generations, stored with it."""
+        return self._epoch
+
+    def counts(self) -> dict[str, int]:
+        """Number of entities per collection, named like the API collections."""
+        return dict(zip(COLUMNS, self._execute(COUNTS).fetchone()))
+
+    def _list(self, table: str, factory, after: CreationKey | None, limit: int | None) -> list:
+        limit = -1 if limit is None else limit
+        if after is None:
+            return self._all(NEWEST_FIRST[table], (limit,), factory)
+        return self._all(NEWEST_FIRST_AFTER[table], (*after, limit), factory)
+
+    def _filtered_list(
+        self, table: str, factory, filters: ShotFilters, after: CreationKey | None, limit: int | None
+    ) -> list:
+        alias = FILTERED_ALIAS[table]
+        equalities = filters.equalities()
+        sql = FILTERED[table]
+        if table == "tastings" and any(field in SHOT_FILTER_FIELDS for field in equalities):
+            sql += " JOIN shots s ON s.id = t.shot_id"
+        clauses = [f"{'s' if field in SHOT_FILTER_FIELDS else alias}.{field} = ?" for field in equalities]
+        params: list[Any] = list(equalities.values())
+        lower, upper = filters.creation_bounds(after)
+        if lower is not None:
+            clauses.append(f"({alias}.created_at, {alias}.id) >= (?, ?)")
+            params.extend(lower)
+        if upper is not None:
+            clauses.append(f"({alias}.created_at, {alias}.id) < (?, ?)")
+            params.extend(upper)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {alias}.created_at DESC, {alias}.id DESC LIMIT ?"
+        return self._all(sql, (*params, -1 if limit is None else limit), factory)
+
+    # Coffee
+    def list_coffees(self, after: CreationKey | None = None, limit: int | None = None) -> list[Coffee]:
+        return self._list("coffees", _coffee, after, limit)
+
+    def get_coffee(self, coffee_id: UUID) -> Coffee | None:
+        return self._one(BY_ID["coffees"], (coffee_id,), _coffee)
+
+    def upsert_coffee(self, payload: CoffeeCreate, coffee_id: UUID | None = None) -> Coffee:
+        cost = compute_cost_per_shot(payload.price_eur, payload.weight_grams)
+        with self.transaction():
+            instance = self.get_coffee(coffee_id) if coffee_id else None
+            if instance is None:
+                instance = Coffee(**payload.model_dump(), cost_per_shot_eur=cost)
+                self._execute(INSERT["coffees"], self._row("coffees", instance))
+            else:
+                for field, value in payload.model_dump().items():
+                    setattr(instance, field, value)
+                instance.cost_per_shot_eur = cost
+                self._execute(UPDATE["coffees"], self._row("coffees", instance)[1:-1] + [instance.id])
+            self._written()
+        return instance
+
+    def delete_coffee(self, coffee_id: UUID) -> None:
+        self.delete_coffees([coffee_id])
+
+    def delete_coffees(self, coffee_ids: Iterable[UUID]) -> list[UUID]:
+        """Delete coffees; shots, tastings and verdicts follow through ON DELETE CASCADE."""
+        deleted: list[UUID] = []
+        with self.transaction():
+            for coffee_id in coffee_ids:
+                if self._execute(DELETE["coffees"], (coffee_id,)).rowcount:
+                    deleted.append(coffee_id)
+            if deleted:
+                self._written()
+        return deleted
+
+    # Water
+    def list_waters(self, after: CreationKey | None = None, limit: int | None = None) -> list[Water]:
+        return self._list("waters", _water, after, limit)
+
+    def get_water(self, water_id: UUID) -> Water | None:
+        return self._one(BY_ID["waters"], (water_id,), _water)
+
+    def upsert_water(self, payload: WaterCreate, water_id: UUID | None = None) -> Water:
+        with self.transaction():
+            instance = self.get_water(water_id) if water_id else None
+            if instance is None:
+                instance = Water(**payload.model_dump())
+                self._execute(INSERT["waters"], self._row("waters", instance))
+            else:
+                for field, value in payload.model_dump().items():
+                    setattr(instance, field, value)
+                self._execute(UPDATE["waters"], self._row("waters", instance)[1:-1] + [instance.id])
+            self._written()
+        return instance
+
+    def delete_water(self, water_id: UUID) -> None:
+        with self.transaction():
+            if self._execute(DELETE["waters"], (water_id,)).rowcount:
+                self._written()
+
+    # Shots
+    def list_shots(
+        self, after: CreationKey | None = None, limit: int | None = None, filters: ShotFilters | None = None
+    ) -> list[Shot]:
+        if filters is not None:
+            return self._filtered_list("shots", _shot, filters, after, limit)
+        return self._list("shots", _shot, after, limit)
+
+    def get_shot(self, shot_id: UUID) -> Shot | None:
+        return self._one(BY_ID["shots"], (shot_id,), _shot)
+
+    def list_shots_for_coffee(self, coffee_id: UUID) -> list[Shot]:
+        return self._all(SHOTS_FOR_COFFEE, (coffee_id,), _shot)
+
+    def _check_shot_references(self, payload: ShotCreate) -> None:
+        if self.get_coffee(payload.coffee_id) is None:
+            raise ValueError("coffee_not_found")
+        if payload.water_id and self.get_water(payload.water_id) is None:
+            raise ValueError("water_not_found")
+
+    def add_shot(self, payload: ShotCreate) -> Shot:
+        with self.transaction():
+            self._check_shot_references(payload)
+            shot = build_shot(payload)
+            self._execute(INSERT["shots"], self._row("shots", shot))
+            self._written()
+        return shot
+
+    def add_shots(self, payloads: Sequence[ShotCreate]) -> list[Shot]:
+        """Insert every shot or none; raises BulkInsertError listing the rejected items."""
+        with self.transaction():
+            shots = prepare_shots(self, payloads)
+            self._execute_many(INSERT["shots"], (self._row("shots", shot) for shot in shots))
+            self._written()
+        return shots
+
+    def update_shot(self, shot_id: UUID, payload: ShotCreate) -> Shot:
+        with self.transaction():
+            shot = self.get_shot(shot_id)
+            if shot is None:
+                raise ValueError("shot_not_found")
+            self._check_shot_references(payload)
+            for field, value in payload.model_dump().items():
+                setattr(shot, field, value)
+            shot.brew_ratio = compute_brew_ratio(payload)
+            self._execute(UPDATE["shots"], self._row("shots", shot)[1:-1] + [shot.id])
+            self._written()
+        return shot
+
+    def delete_shot(self, shot_id: UUID) -> None:
+        with self.transaction():
+            if self._execute(DELETE["shots"], (shot_id,)).rowcount:
+                self._written()
+
+    # Tastings
+    def list_tastings(
+        self, after: CreationKey | None = None, limit: int | None = None, filters: TastingFilters | None = None
+    ) -> list[Tasting]:
+        if filters is not None:
+            return self._filtered_list("tastings", _tasting, filters, after, limit)
+        return self._list("tastings", _tasting, after, limit)
+
+    def get_tasting(self, tasting_id: UUID) -> Tasting | None:
+        return self._one(BY_ID["tastings"], (tasting_id,), _tasting)
+
+    def list_tastings_for_shot(self, shot_id: UUID) -> list[Tasting]:
+        return self._all(TASTINGS_FOR_SHOT, (shot_id,), _tasting)
+
+    def add_tasting(self, payload: TastingCreate) -> Tasting:
+        with self.transaction():
+            shot = self.get_shot(payload.shot_id)
+            if shot is None:
+                raise ValueError("shot_not_found")
+            tasting = build_tasting(payload)
+            self._execute(INSERT["tastings"], self._row("tastings", tasting))
+            self._written()
+            self.upsert_verdict(auto_verdict(shot.coffee_id, tasting.sensory_mean))
+        return tasting
+
+    def add_tastings(self, payloads: Sequence[TastingCreate]) -> list[Tasting]:
+        """Insert every tasting or none, then refresh each affected coffee's verdict once."""
+        with self.transaction():
+            prepared = prepare_tastings(self, payloads)
+            self._execute_many(INSERT["tastings"], (self._row("tastings", tasting) for _, tasting in prepared))
+            self._written()
+            for coffee_id, sensory_mean in latest_means(prepared).items():
+                self.upsert_verdict(auto_verdict(coffee_id, sensory_mean))
+        return [tasting for _, tasting in prepared]
+
+    def delete_tasting(self, tasting_id: UUID) -> None:
+        with self.transaction():
+            if self._execute(DELETE["tastings"], (tasting_id,)).rowcount:
+                self._written()
+
+    # Verdicts
+    def list_verdicts(self, after: CreationKey | None = None, limit: int | None = None) -> list[Verdict]:
+        return self._list("verdicts", _verdict, after, limit)
+
+    def get_verdict(self, verdict_id: UUID) -> Verdict | None:
+        return self._one(BY_ID["verdicts"], (verdict_id,), _verdict)
+
+    def upsert_verdict(self, payload: VerdictCreate, verdict_id: UUID | None = None) -> Verdict:
+        with self.transaction():
+            instance = self.get_verdict(verdict_id) if verdict_id else None
+            existing = self.verdict_for_coffee(payload.coffee_id)
+            if instance is None:
+                instance = existing
+            elif existing is not None and existing.id != instance.id:
+                # uq_verdict_coffee: the moved verdict replaces the target coffee's one
+                self._execute(DELETE["verdicts"], (existing.id,))
+            if instance is None:
+                instance = Verdict(**payload.model_dump())
+                self._execute(INSERT["verdicts"], self._row("verdicts", instance))
+            else:
+                for field, value in payload.model_dump().items():
+                    setattr(instance, field, value)
+                self._execute(UPDATE["verdicts"], self._row("verdicts", instance)[1:-1] + [instance.id])
+            self._written()
+        return instance
+
+    def delete_verdict(self, verdict_id: UUID) -> None:
+        with self.transaction():
+            if self._execute(DELETE["verdicts"], (verdict_id,)).rowcount:
+                self._written()
+
+    # Helpers for analytics
+    def shots_by_coffee(self, coffee_id: UUID):
+        return self.list_shots_for_coffee(coffee_id)
+
+    def tastings_by_coffee(self, coffee_id: UUID) -> list[Tasting]:
+        return self._all(TASTINGS_FOR_COFFEE, (coffee_id,), _tasting)
+
+    def verdict_for_coffee(self, coffee_id: UUID) -> Verdict | None:
+        return self._one(VERDICT_FOR_COFFEE, (coffee_id,), _verdict)
+
+    def tasting_counts(self) -> dict[UUID, int]:
+        return {UUID(coffee_id): count for coffee_id, count in self._execute(TASTING_COUNTS)}
+
+    def sensory_aggregate(
+        self, coffee_id: UUID, beverage_type: BeverageType | None = None
+    ) -> SensoryAggregate | None:
+        if beverage_type is None:
+            return self._one(SENSORY_FOR_COFFEE, (coffee_id,), _aggregate)
+        return self._one(SENSORY_FOR_COFFEE_BEVERAGE, (coffee_id, beverage_type), _aggregate)
+
+    def sensory_aggregates(self, beverage_type: BeverageType | None = None) -> dict[UUID, SensoryAggregate]:
+        """Aggregates of every tasted coffee, optionally restricted to one beverage type."""
+        if beverage_type is None:
+            rows = self._execute(SENSORY_ALL)
+        else:
+            rows = self._execute(SENSORY_FOR_BEVERAGE, (beverage_type,))
+        return {UUID(row[0]): _aggregate(row) for row in rows}
+
+    def recompute_sensory_aggregates(self) -> dict[BeverageType | None, dict[UUID, SensoryAggregate]]:
+        """Rebuild the sensory aggregates in Python (reference for consistency checks)."""
+        shots = {shot.id: shot for shot in self.list_shots()}
+        aggregates: dict[BeverageType | None, dict[UUID, SensoryAggregate]] = {}
+        for tasting in self.list_tastings():
+            shot = shots[tasting.shot_id]
+            for key in (None, shot.beverage_type):
+                aggregates.setdefault(key, {}).setdefault(shot.coffee_id, SensoryAggregate()).add(
+                    tasting.sensory_mean
+                )
+        return aggregates
+
+    def sensory_aggregates_consistent(self) -> bool:
+        expected = self.recompute_sensory_aggregates()
+        return all(
+            self.sensory_aggregates(key) == expected.get(key, {}) for key in (None, *BeverageType)
+        )
@@ -0,0 +1,82 @@
+"""Time journaled repository startup: full journal replay versus snapshot plus tail.
+
+Usage (from `backend/`):
+
+    python -m benchmarks.bench_journal --shots 100000 1000000
+
+Each size is seeded into a fresh journal directory, reopened from the journal alone,
+compacted into a snapshot, extended by a small tail of writes and reopened again.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.dataset import seed_repository
+from app.services.journal import Journal
+
+
+def _size(directory: Path) -> int:
+    return sum(path.stat().st_size for path in directory.iterdir())
+
+
+def _reopen(directory: Path) -> float:
+    start = time.perf_counter()
+    repository = Journal(directory).open()
+    elapsed = time.perf_counter() - start
+    repository.close()
+    return elapsed
+
+
+def time_startup(nb_shots: int, tail: int) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as raw:
+        directory = Path(raw)
+        journal = Journal(directory, snapshot_every=10**12)
+        start = time.perf_counter()
+        seed_repository(journal.open(), nb_shots)
+        seeded = time.perf_counter() - start
+        journal.close()
+        journal_bytes = _size(directory)
+        replay = _reopen(directory)
+
+        journal = Journal(directory, snapshot_every=10**12)
+        repository = journal.open()
+        start = time.perf_counter()
+        journal.compact()
+        compaction = time.perf_counter() - start
+        seed_repository(repository, tail)
+        journal.close()
+        snapshot_bytes = _size(directory)
+        return {
+            "seed": seeded,
+            "journal_mb": journal_bytes / 1e6,
+            "replay": replay,
+            "compact": compaction,
+            "snapshot_mb": snapshot_bytes / 1e6,
+            "snapshot_start": _reopen(directory),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shots", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--tail", type=int, default=1_000, help="shots written after the snapshot")
+    args = parser.parse_args()
+
+    print(
+        f"{'shots':>10} {'seed (s)':>9} {'journal MB':>11} {'replay (s)':>11} "
+        f"{'compact (s)':>12} {'on disk MB':>11} {'snapshot+tail (s)':>18}"
+    )
+    for nb_shots in args.shots:
+        r = time_startup(nb_shots, args.tail)
+        print(
+            f"{nb_shots:>10} {r['seed']:>9.2f} {r['journal_mb']:>11.1f} {r['replay']:>11.2f} "
+            f"{r['compact']:>12.2f} {r['snapshot_mb']:>11.1f} {r['snapshot_start']:>18.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
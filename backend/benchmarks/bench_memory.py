@@ -0,0 +1,64 @@
+"""Measure the resident memory held by the in-memory repository per million shots.
+
+Usage (from `backend/`):
+
+    python -m benchmarks.bench_memory --shots 100000 1000000
+
+Each figure is the peak RSS of a fresh process, as `bench_suite.peak_rss_bytes` reports it, so
+numpy column buffers and allocator overhead count, unlike a tracemalloc measurement. For each
+size, one process seeds the repository with the synthetic dataset (one tasting per shot) and
+another only builds the dataset's raw dicts. The repository's share is the difference of the
+two peaks; it still includes the seeding id map and the payload batch alive at the peak.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.bench_suite import peak_rss_bytes
+from benchmarks.dataset import seed_repository
+from app.services.repository import Repository
+from scripts.generate_mock_dataset import build_coffees, build_shots, build_tastings, build_waters
+
+
+def _peak_rss(nb_shots: int, seed: bool) -> int:
+    if seed:
+        kept = seed_repository(Repository(), nb_shots)
+    else:
+        coffees, waters = build_coffees(), build_waters()
+        shots = build_shots(coffees, waters, nb=nb_shots)
+        kept = (coffees, waters, shots, build_tastings(shots))
+    gc.collect()
+    peak = peak_rss_bytes()
+    del kept
+    return peak
+
+
+def peak_rss_of_fresh_process(nb_shots: int, seed: bool) -> int:
+    # a new spawned process per run, since ru_maxrss never goes down
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_peak_rss, nb_shots, seed).result()
+
+
+def measure(nb_shots: int) -> tuple[int, int]:
+    """Peak RSS of seeding `nb_shots`, and of building the same dataset without a repository."""
+    return peak_rss_of_fresh_process(nb_shots, seed=True), peak_rss_of_fresh_process(nb_shots, seed=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shots", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'shots':>10} {'seeded RSS (MB)':>16} {'dataset RSS (MB)':>17} {'MB / 1M shots':>14}")
+    for nb_shots in args.shots:
+        seeded, dataset = measure(nb_shots)
+        per_million = (seeded - dataset) / nb_shots * 1_000_000
+        print(f"{nb_shots:>10} {seeded / 1e6:>16.0f} {dataset / 1e6:>17.0f} {per_million / 1e6:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compare list and analytics response latency with and without fast serialization.
+
+Usage (from `backend/`):
+
+    python -m benchmarks.bench_serialization --shots 10000 50000
+
+Each route is requested through the ASGI app with `BARISENSE_FAST_SERIALIZATION` off, then
+on; the table shows the median latency of `--repeat` requests for both paths.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import time
+
+from benchmarks.dataset import seed_repository
+from app.core.config import get_settings
+from app.core.dependencies import get_repository
+from app.main import app
+from app.services.repository import Repository
+from fastapi.testclient import TestClient
+
+ROUTES = ("/api/v1/shots", "/api/v1/tastings", "/api/v1/coffees", "/api/v1/analytics/rankings/global")
+
+
+def median_latency(client: TestClient, path: str, fast: bool, repeat: int) -> float:
+    os.environ["BARISENSE_FAST_SERIALIZATION"] = "true" if fast else "false"
+    get_settings.cache_clear()
+    client.get(path)  # warm caches
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        client.get(path)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shots", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'shots':>8} {'route':<36} {'default (ms)':>12} {'fast (ms)':>10} {'speed-up':>9}")
+    for nb_shots in args.shots:
+        repository = seed_repository(Repository(), nb_shots)
+        app.dependency_overrides[get_repository] = lambda: repository
+        client = TestClient(app)
+        for path in ROUTES:
+            default = median_latency(client, path, False, args.repeat)
+            fast = median_latency(client, path, True, args.repeat)
+            print(
+                f"{nb_shots:>8} {path:<36} {default * 1e3:>12.1f} {fast * 1e3:>10.1f} {default / fast:>8.1f}x"
+            )
+        app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
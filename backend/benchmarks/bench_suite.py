@@ -0,0 +1,382 @@
+"""Time every CRUD and analytics route on growing synthetic datasets, with a regression check.
+
+Usage (from `backend/`):
+
+    python -m benchmarks.bench_suite --shots 1000 10000 100000 1000000 --output results.json
+    python -m benchmarks.bench_suite --shots 1000 10000 --baseline results.json
+
+For each dataset size the repository is seeded from `scripts/generate_mock_dataset.py`, then
+each case is requested `--repeat` times through the ASGI app; unpaginated lists, analytics
+routes and `AnalyticsEngine.build_summary` run `--heavy-repeat` times. Analytics routes get a
+fresh `AnalyticsCache` per request, so they are timed cold, as after a write. Work a case needs
+before its request (creating the entity to delete, say) is not timed. A case reports ops/sec,
+p50/p99 latency and the peak memory allocated by one extra run under tracemalloc, kept out of
+the timed runs as tracing slows allocation down. Each dataset also reports its seeding time and
+the peak RSS of the process so far.
+
+The JSON results go to `--output` (stdout by default). With `--baseline`, cases whose p50 or
+peak allocation grew, or whose ops/sec dropped, by more than `--tolerance` are listed on stderr
+and the exit code is 1. Latency changes below `--min-delta-ms` and allocation changes below
+`--min-delta-bytes` are ignored as noise.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from benchmarks.dataset import seed_repository
+from app.api.pagination import MAX_PAGE_SIZE
+from app.core.config import get_settings
+from app.core.dependencies import create_repository, get_analytics_cache, get_repository
+from app.main import app
+from app.services.analysis import AnalyticsEngine
+from app.services.cache import AnalyticsCache
+from fastapi.testclient import TestClient
+
+API = get_settings().api_v1_prefix
+BULK_SIZE = 100
+LABELS = {
+    f"{axis}_label": "équilibré"
+    for axis in ("acidity", "bitterness", "body", "aroma", "balance", "finish", "overall")
+}
+
+# Request = (method, path, params, json body); a case turns its fixtures into one request
+Request = tuple[str, str, dict[str, Any] | None, Any]
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    prepare: Callable[[TestClient, dict[str, str]], Request]
+    heavy: bool = False  # timed `--heavy-repeat` times, its cost grows with the dataset
+    cold_cache: bool = False
+
+
+def coffee_payload(name: str = "Bench") -> dict[str, Any]:
+    return {
+        "name": name,
+        "roaster": "Bench",
+        "format": "grain",
+        "weight_grams": 250,
+        "price_eur": 12.5,
+        "purchased_at": "2024-06-01",
+    }
+
+
+def water_payload(label: str = "Bench") -> dict[str, Any]:
+    return {"label": label, "source": "robinet"}
+
+
+def shot_payload(fixtures: dict[str, str], grind: str = "12") -> dict[str, Any]:
+    return {
+        "coffee_id": fixtures["coffee"],
+        "water_id": fixtures["water"],
+        "beverage_type": "expresso",
+        "grind_setting": grind,
+        "dose_in_grams": 18,
+        "beverage_weight_grams": 36,
+        "extraction_time_seconds": 28,
+    }
+
+
+def tasting_payload(fixtures: dict[str, str]) -> dict[str, Any]:
+    return {"shot_id": fixtures["shot"], **LABELS}
+
+
+def verdict_payload(fixtures: dict[str, str]) -> dict[str, Any]:
+    return {"coffee_id": fixtures["coffee"], "status": "en_observation"}
+
+
+def create(client: TestClient, collection: str, payload: dict[str, Any]) -> str:
+    response = client.post(f"{API}/{collection}", json=payload)
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+def fixtures_of(client: TestClient) -> dict[str, str]:
+    """Ids of existing entities, one per collection, that the cases read or reference."""
+    fixtures = {
+        "coffee": client.get(f"{API}/coffees", params={"limit": 1}).json()[0]["id"],
+        "water": client.get(f"{API}/waters", params={"limit": 1}).json()[0]["id"],
+        "shot": client.get(f"{API}/shots", params={"limit": 1}).json()[0]["id"],
+        "tasting": client.get(f"{API}/tastings", params={"limit": 1}).json()[0]["id"],
+    }
+    fixtures["verdict"] = create(client, "verdicts", verdict_payload(fixtures))
+    return fixtures
+
+
+def crud_cases() -> list[Case]:
+    def read(collection: str, fixture: str) -> list[Case]:
+        return [
+            Case(
+                f"GET /{collection}?limit={MAX_PAGE_SIZE}",
+                lambda client, fx: ("GET", f"{API}/{collection}", {"limit": MAX_PAGE_SIZE}, None),
+            ),
+            Case(f"GET /{collection}", lambda client, fx: ("GET", f"{API}/{collection}", None, None), heavy=True),
+            Case(
+                f"GET /{collection}/{{id}}",
+                lambda client, fx: ("GET", f"{API}/{collection}/{fx[fixture]}", None, None),
+            ),
+        ]
+
+    def delete(collection: str, payload: Callable[[dict[str, str]], dict[str, Any]]) -> Case:
+        def prepare(client: TestClient, fx: dict[str, str]) -> Request:
+            return "DELETE", f"{API}/{collection}/{create(client, collection, payload(fx))}", None, None
+
+        return Case(f"DELETE /{collection}/{{id}}", prepare)
+
+    return [
+        *read("coffees", "coffee"),
+        *read("waters", "water"),
+        *read("shots", "shot"),
+        *read("tastings", "tasting"),
+        *read("verdicts", "verdict"),
+        Case("POST /coffees", lambda client, fx: ("POST", f"{API}/coffees", None, coffee_payload())),
+        Case("POST /waters", lambda client, fx: ("POST", f"{API}/waters", None, water_payload())),
+        Case("POST /shots", lambda client, fx: ("POST", f"{API}/shots", None, shot_payload(fx))),
+        Case("POST /tastings", lambda client, fx: ("POST", f"{API}/tastings", None, tasting_payload(fx))),
+        Case("POST /verdicts", lambda client, fx: ("POST", f"{API}/verdicts", None, verdict_payload(fx))),
+        Case(
+            "POST /shots/bulk",
+            lambda client, fx: ("POST", f"{API}/shots/bulk", None, [shot_payload(fx)] * BULK_SIZE),
+        ),
+        Case(
+            "POST /tastings/bulk",
+            lambda client, fx: ("POST", f"{API}/tastings/bulk", None, [tasting_payload(fx)] * BULK_SIZE),
+        ),
+        Case(
+            "PUT /coffees/{id}",
+            lambda client, fx: ("PUT", f"{API}/coffees/{fx['coffee']}", None, coffee_payload("Bench PUT")),
+        ),
+        Case(
+            "PUT /waters/{id}",
+            lambda client, fx: ("PUT", f"{API}/waters/{fx['water']}", None, water_payload("Bench PUT")),
+        ),
+        Case(
+            "PUT /shots/{id}",
+            lambda client, fx: ("PUT", f"{API}/shots/{fx['shot']}", None, shot_payload(fx, grind="13")),
+        ),
+        delete("coffees", lambda fx: coffee_payload()),
+        delete("waters", lambda fx: water_payload()),
+        delete("shots", shot_payload),
+        delete("tastings", tasting_payload),
+        delete("verdicts", verdict_payload),
+        Case(
+            "DELETE /coffees?ids=",
+            lambda client, fx: (
+                "DELETE",
+                f"{API}/coffees",
+                {"ids": [create(client, "coffees", coffee_payload()) for _ in range(10)]},
+                None,
+            ),
+        ),
+    ]
+
+
+def analytics_cases() -> list[Case]:
+    paths = (
+        "/analytics",
+        "/analytics/rankings/global",
+        "/analytics/rankings/expresso",
+        "/analytics/quality-price",
+        "/analytics/stability",
+        "/analytics/retest",
+        "/dashboard",
+    )
+    return [
+        Case(
+            f"GET {path}",
+            lambda client, fx, path=path: ("GET", f"{API}{path}", None, None),
+            heavy=True,
+            cold_cache=True,
+        )
+        for path in paths
+    ]
+
+
+def percentile(sorted_timings: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of timings sorted in ascending order."""
+    rank = max(1, math.ceil(fraction * len(sorted_timings)))
+    return sorted_timings[rank - 1]
+
+
+def summarize(timings: list[float], peak_alloc: int) -> dict[str, Any]:
+    ordered = sorted(timings)
+    total = sum(ordered)
+    return {
+        "samples": len(ordered),
+        "ops_per_sec": len(ordered) / total if total else math.inf,
+        "p50_ms": percentile(ordered, 0.50) * 1e3,
+        "p99_ms": percentile(ordered, 0.99) * 1e3,
+        "peak_alloc_bytes": peak_alloc,
+    }
+
+
+def traced_peak(run: Callable[[], None]) -> int:
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def time_case(client: TestClient, case: Case, fixtures: dict[str, str], repeat: int) -> dict[str, Any]:
+    def run() -> float:
+        method, path, params, body = case.prepare(client, fixtures)
+        if case.cold_cache:
+            cache = AnalyticsCache()
+            app.dependency_overrides[get_analytics_cache] = lambda: cache
+        start = time.perf_counter()
+        response = client.request(method, path, params=params, json=body)
+        elapsed = time.perf_counter() - start
+        if response.status_code >= 400:
+            raise RuntimeError(f"{case.name}: {response.status_code} {response.text[:200]}")
+        return elapsed
+
+    run()  # warm-up: the first request after a write also pays the new snapshot
+    timings = [run() for _ in range(repeat)]
+    return summarize(timings, traced_peak(run))
+
+
+def time_build_summary(repository, repeat: int) -> dict[str, Any]:
+    engine = AnalyticsEngine(repository)
+
+    def run() -> float:
+        start = time.perf_counter()
+        engine.build_summary()
+        return time.perf_counter() - start
+
+    run()
+    timings = [run() for _ in range(repeat)]
+    return summarize(timings, traced_peak(run))
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def bench_dataset(nb_shots: int, database_url: str, repeat: int, heavy_repeat: int) -> dict[str, Any]:
+    start = time.perf_counter()
+    repository = seed_repository(create_repository(database_url), nb_shots)
+    seed_seconds = time.perf_counter() - start
+    app.dependency_overrides[get_repository] = lambda: repository
+    cases: dict[str, Any] = {}
+    try:
+        with TestClient(app) as client:
+            fixtures = fixtures_of(client)
+            for case in [*crud_cases(), *analytics_cases()]:
+                cases[case.name] = time_case(client, case, fixtures, heavy_repeat if case.heavy else repeat)
+                print(f"{nb_shots:>8} {case.name:<36} {cases[case.name]['p50_ms']:>10.2f} ms", file=sys.stderr)
+        cases["AnalyticsEngine.build_summary"] = time_build_summary(repository, heavy_repeat)
+    finally:
+        app.dependency_overrides.clear()
+    return {
+        "shots": nb_shots,
+        "seed_seconds": seed_seconds,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "cases": cases,
+    }
+
+
+def compare(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerance: float,
+    min_delta_ms: float,
+    min_delta_bytes: int,
+) -> list[str]:
+    """Regressions of `results` against `baseline`, for the dataset sizes and cases both contain."""
+    baseline_datasets = {dataset["shots"]: dataset["cases"] for dataset in baseline["datasets"]}
+    regressions = []
+    for dataset in results["datasets"]:
+        reference = baseline_datasets.get(dataset["shots"], {})
+        for name, current in dataset["cases"].items():
+            before = reference.get(name)
+            if before is None:
+                continue
+            checks = (
+                ("p50_ms", current["p50_ms"] - before["p50_ms"], min_delta_ms),
+                ("peak_alloc_bytes", current["peak_alloc_bytes"] - before["peak_alloc_bytes"], min_delta_bytes),
+            )
+            for metric, delta, floor in checks:
+                if delta > floor and delta > before[metric] * tolerance:
+                    regressions.append(
+                        f"{dataset['shots']:>8} {name:<36} {metric}: {before[metric]:.6g} -> {current[metric]:.6g}"
+                    )
+            slower = 1 / current["ops_per_sec"] - 1 / before["ops_per_sec"]
+            if slower * 1e3 > min_delta_ms and current["ops_per_sec"] < before["ops_per_sec"] * (1 - tolerance):
+                regressions.append(
+                    f"{dataset['shots']:>8} {name:<36} ops_per_sec: "
+                    f"{before['ops_per_sec']:.6g} -> {current['ops_per_sec']:.6g}"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shots", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=50, help="timed requests per CRUD case")
+    parser.add_argument(
+        "--heavy-repeat", type=int, default=5, help="timed runs per analytics case and unpaginated list"
+    )
+    parser.add_argument(
+        "--database-url",
+        default="memory://",
+        help="repository to seed, as `Settings.database_url`; sqlite/journal locations must be empty",
+    )
+    parser.add_argument("--output", help="file for the JSON results (default: stdout)")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative degradation")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1)
+    parser.add_argument("--min-delta-bytes", type=int, default=1 << 20)
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database_url": args.database_url,
+            "repeat": args.repeat,
+            "heavy_repeat": args.heavy_repeat,
+        },
+        "datasets": [],
+    }
+    for nb_shots in sorted(args.shots):
+        # distinct locations per size for file-backed repositories
+        database_url = args.database_url if args.database_url == "memory://" else f"{args.database_url}-{nb_shots}"
+        results["datasets"].append(bench_dataset(nb_shots, database_url, args.repeat, args.heavy_repeat))
+
+    encoded = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(encoded + "\n")
+    else:
+        print(encoded)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as source:
+            baseline = json.load(source)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms, args.min_delta_bytes)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("No regression against the baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
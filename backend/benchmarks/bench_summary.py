@@ -0,0 +1,44 @@
+"""Time `AnalyticsEngine.build_summary` on growing synthetic datasets.
+
+Usage (from `backend/`):
+
+    python -m benchmarks.bench_summary --shots 1000 10000 100000
+
+A linear-time summary shows a roughly constant time per shot across sizes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from benchmarks.dataset import seed_repository
+from app.services.analysis import AnalyticsEngine
+from app.services.repository import Repository
+
+
+def time_summary(nb_shots: int, repeat: int = 3) -> float:
+    repository = seed_repository(Repository(), nb_shots)
+    engine = AnalyticsEngine(repository)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        engine.build_summary()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shots", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'shots':>10} {'build_summary (s)':>18} {'µs / shot':>10}")
+    for nb_shots in args.shots:
+        elapsed = time_summary(nb_shots, args.repeat)
+        print(f"{nb_shots:>10} {elapsed:>18.3f} {elapsed / nb_shots * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
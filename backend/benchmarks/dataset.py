@@ -0,0 +1,54 @@
+"""Seed a repository with the synthetic dataset of `scripts/generate_mock_dataset.py`."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = BACKEND_ROOT.parent
+for path in (BACKEND_ROOT, PROJECT_ROOT):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from app.models.schemas import CoffeeCreate, ShotCreate, TastingCreate, WaterCreate  # noqa: E402
+from app.services.analysis import score_to_label  # noqa: E402
+from app.services.repository import Repository  # noqa: E402
+from scripts.generate_mock_dataset import build_coffees, build_shots, build_tastings, build_waters  # noqa: E402
+
+SENSORY_AXES = ("acidity", "bitterness", "body", "aroma", "balance", "finish", "overall")
+BATCH = 5000
+
+
+def seed_repository(repository: Repository, nb_shots: int) -> Repository:
+    """Load `nb_shots` synthetic shots (one tasting each) through the public bulk repository API."""
+    waters = build_waters()
+    coffees = build_coffees()
+    shots = build_shots(coffees, waters, nb=nb_shots)
+    tastings = build_tastings(shots)
+
+    ids: dict[str, object] = {}
+    for water in waters:
+        ids[water["id"]] = repository.upsert_water(WaterCreate(**water)).id
+    for coffee in coffees:
+        ids[coffee["id"]] = repository.upsert_coffee(CoffeeCreate(**coffee)).id
+    for start in range(0, len(shots), BATCH):
+        batch = shots[start : start + BATCH]
+        payloads = [
+            ShotCreate(**{**shot, "coffee_id": ids[shot["coffee_id"]], "water_id": ids[shot["water_id"]]})
+            for shot in batch
+        ]
+        for shot, created in zip(batch, repository.add_shots(payloads)):
+            ids[shot["id"]] = created.id
+    for start in range(0, len(tastings), BATCH):
+        repository.add_tastings(
+            [
+                TastingCreate(
+                    shot_id=ids[tasting["shot_id"]],
+                    comments=tasting["comments"],
+                    **{f"{axis}_label": score_to_label(tasting[axis]) for axis in SENSORY_AXES},
+                )
+                for tasting in tastings[start : start + BATCH]
+            ]
+        )
+    return repository
@@ -8,18 +8,31 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-import pytest
+# module-level clients must not create ./barisense.db
+os.environ.setdefault("BARISENSE_DATABASE_URL", "memory://")
+
 from fastapi.testclient import TestClient
 
 from app.core.config import get_settings
 from app.core.dependencies import get_repository
 from app.main import app
 from app.services.repository import Repository
+from app.services.sqlite_repository import SqliteRepository
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repository(request, tmp_path):
+    """Fresh repository of each backend."""
+    if request.param == "memory":
+        yield Repository()
+        return
+    repository = SqliteRepository(str(tmp_path / "barisense.db"))
+    yield repository
+    repository.close()
 
 
 @pytest.fixture
-def client():
-    repository = Repository()
+def client(repository):
     app.dependency_overrides[get_repository] = lambda: repository
     yield TestClient(app)
     app.dependency_overrides.clear()
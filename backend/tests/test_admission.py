@@ -0,0 +1,55 @@
+import asyncio
+
+from app.api.admission import ConcurrencyLimiter, get_limiter
+
+
+def test_limiter_queues_then_sheds_excess_requests() -> None:
+    async def scenario() -> None:
+        limiter = ConcurrencyLimiter(limit=1, queue=1, wait_seconds=1.0)
+        assert await limiter.acquire()
+
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.waiting == 1
+        # the queue is full: shed at once
+        assert not await limiter.acquire()
+
+        limiter.release()
+        assert await queued
+        assert (limiter.active, limiter.waiting) == (1, 0)
+        limiter.release()
+        assert limiter.active == 0
+        assert (limiter.admitted, limiter.rejected) == (2, 1)
+
+    asyncio.run(scenario())
+
+
+def test_limiter_gives_up_after_the_wait_deadline() -> None:
+    async def scenario() -> None:
+        limiter = ConcurrencyLimiter(limit=1, queue=4, wait_seconds=0.01)
+        assert await limiter.acquire()
+        assert not await limiter.acquire()
+        assert (limiter.waiting, limiter.rejected) == (0, 1)
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_saturated_analytics_get_503_while_health_answers(client) -> None:
+    limiter = get_limiter("analytics")
+    saved = limiter.active, limiter.queue
+    limiter.active, limiter.queue = limiter.limit, 0
+    try:
+        response = client.get("/api/v1/analytics")
+        health = client.get("/health")
+        coffees = client.get("/api/v1/coffees")
+    finally:
+        limiter.active, limiter.queue = saved
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert health.status_code == 200
+    assert coffees.status_code == 200
+    assert client.get("/api/v1/analytics").status_code == 200
+    assert limiter.active == 0
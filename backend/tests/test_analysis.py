@@ -1,15 +1,32 @@
+import random
+from dataclasses import replace
+from datetime import date
+from statistics import mean
 from uuid import uuid4
 
 import pytest
 
-from app.models.schemas import ShotCreate, TastingCreate
+from app.models.entities import BeverageType, Shot, Water, WaterSource
+from app.models.schemas import CoffeeCreate, ShotCreate, TastingCreate, WaterCreate
 from app.services.analysis import (
+    AnalyticsEngine,
+    SensoryAggregate,
+    classify_water_profile,
     compute_brew_ratio,
     compute_cost_per_shot,
+    compute_extraction_score,
     compute_sensory_mean,
+    compute_water_impact,
+    diagnose_extraction,
     label_to_score,
+    score_shots,
     verdict_from_mean,
+    verdict_label,
+    water_sensory_aggregates,
 )
+from app.services.repository import Repository
+
+SENSORY_AXES = ("acidity", "bitterness", "body", "aroma", "balance", "finish", "overall")
 
 
 def test_compute_cost_per_shot_uses_reference_dose() -> None:
@@ -32,34 +49,22 @@ def test_compute_brew_ratio_rounds_to_two_decimals() -> None:
 
 
 def test_compute_sensory_mean_and_verdict() -> None:
-    tasting = TastingCreate(
-        shot_id=uuid4(),
-        acidity=4,
-        bitterness=2,
-        body=5,
-        aroma=5,
-        balance=4,
-        finish=4,
-        overall=5,
-        comments="rich and sweet",
-    )
-    mean = compute_sensory_mean(tasting)
+    mean = compute_sensory_mean([4, 2, 5, 5, 4, 4, 5])
 
     assert mean == 4.14
-    assert verdict_from_mean(mean) == "à affiner"
+    assert verdict_label(verdict_from_mean(mean)) == "à affiner"
 
 
 @pytest.mark.parametrize(
     ("label", "expected"),
     [
-        ("Absente", 1),
-        ("faible", 2),
-        ("léger", 2),
-        ("Equilibre", 3),
-        ("marqué", 4),
-        ("Prononce", 4),
+        ("insipide", 1),
+        ("Doux", 2),
+        (" doux ", 2),
+        ("Équilibré", 3),
+        ("equilibre", 3),
+        ("expressif", 4),
         ("INTENSE", 5),
-        ("5", 5),
     ],
 )
 def test_label_to_score_accepts_common_labels(label: str, expected: int) -> None:
@@ -69,3 +74,211 @@ def test_label_to_score_accepts_common_labels(label: str, expected: int) -> None
 def test_label_to_score_rejects_unknown_label() -> None:
     with pytest.raises(ValueError):
         label_to_score("mystery")
+
+
+def _random_shot(rng: random.Random) -> Shot:
+    return Shot(
+        coffee_id=uuid4(),
+        beverage_type=rng.choice(list(BeverageType)),
+        grind_setting="8",
+        dose_in_grams=18.0,
+        beverage_weight_grams=36.0,
+        # include the exact thresholds of the diagnosis rules
+        extraction_time_seconds=rng.choice([22.0, 36.0, round(rng.uniform(10, 50), 1)]),
+        brew_ratio=rng.choice([1.4, 1.8, 2.3, 2.6, 3.1, round(rng.uniform(0.8, 4.0), 2)]),
+        water_id=uuid4(),
+    )
+
+
+def _random_water(rng: random.Random) -> Water:
+    def measure(*thresholds: float) -> float | None:
+        return rng.choice([None, *thresholds, round(rng.uniform(1, 250), 1)])
+
+    return Water(
+        label="Eau",
+        source=WaterSource.TAP,
+        brand=None,
+        mineralization_ppm=measure(70, 180),
+        hardness_ca_mg_l=measure(25, 90),
+        alkalinity_hco3_mg_l=measure(40, 120),
+    )
+
+
+def _reference_extraction_score(shot: Shot) -> float:
+    target = {BeverageType.RISTRETTO: 1.6, BeverageType.EXPRESSO: 2.0, BeverageType.CAFE_LONG: 2.8}[shot.beverage_type]
+    time_penalty = 0.0
+    if shot.extraction_time_seconds < 22:
+        time_penalty = (22 - shot.extraction_time_seconds) * 0.04
+    elif shot.extraction_time_seconds > 36:
+        time_penalty = (shot.extraction_time_seconds - 36) * 0.04
+    score = 5 - min(4, abs(shot.brew_ratio - target) * 1.4 + time_penalty)
+    return round(max(1.0, min(score, 5.0)), 2)
+
+
+def test_batch_extraction_kernel_matches_scalar_helpers() -> None:
+    rng = random.Random(20240601)
+    shots = [_random_shot(rng) for _ in range(2000)]
+    waters = {shot.water_id: _random_water(rng) for shot in shots if rng.random() < 0.8}
+
+    batch = score_shots(shots, waters)
+
+    for row, shot in enumerate(shots):
+        water = waters.get(shot.water_id)
+        assert float(batch.scores[row]) == compute_extraction_score(shot) == _reference_extraction_score(shot)
+        assert batch.diagnosis(row) == diagnose_extraction(shot, water)
+        if water:
+            assert batch.water_codes[row] >= 0
+            assert batch.diagnosis(row)[1][-2].startswith(f"Eau {classify_water_profile(water)[0]}")
+
+
+def _seeded_repository(rng: random.Random) -> Repository:
+    repository = Repository()
+    waters = [
+        repository.upsert_water(WaterCreate(label=f"Eau {index}", source="robinet", brand=None, mineralization_ppm=m))
+        for index, m in enumerate((40, 120, 250))
+    ]
+    coffees = [
+        repository.upsert_coffee(
+            CoffeeCreate(
+                name=f"Café {index}",
+                roaster="Test Roastery",
+                reference=None,
+                format="grain",
+                weight_grams=250,
+                price_eur=14.0,
+                purchased_at=date(2024, 6, 1),
+            )
+        )
+        for index in range(4)
+    ]
+    labels = ["insipide", "doux", "équilibré", "expressif", "intense"]
+    shots = repository.add_shots(
+        [
+            ShotCreate(
+                coffee_id=rng.choice(coffees).id,
+                water_id=rng.choice(waters).id if rng.random() < 0.9 else None,
+                beverage_type=rng.choice(list(BeverageType)),
+                grind_setting="9",
+                dose_in_grams=18,
+                beverage_weight_grams=round(rng.uniform(20, 60), 1),
+                extraction_time_seconds=round(rng.uniform(15, 45), 1),
+            )
+            for _ in range(300)
+        ]
+    )
+    repository.add_tastings(
+        [
+            TastingCreate(
+                shot_id=rng.choice(shots).id,
+                **{f"{axis}_label": rng.choice(labels) for axis in SENSORY_AXES},
+            )
+            for _ in range(400)
+        ]
+    )
+    # tombstones: deleted shots and tastings, and a shot moved to another coffee
+    for shot in rng.sample(shots, 40):
+        repository.delete_shot(shot.id)
+    for tasting in rng.sample(repository.list_tastings(), 40):
+        repository.delete_tasting(tasting.id)
+    moved = repository.list_shots()[0]
+    repository.update_shot(moved.id, ShotCreate(**{**_shot_fields(moved), "coffee_id": coffees[0].id}))
+    return repository
+
+
+def _shot_fields(shot: Shot) -> dict:
+    return {field: getattr(shot, field) for field in ShotCreate.model_fields}
+
+
+def test_column_scans_match_object_scans() -> None:
+    repository = _seeded_repository(random.Random(20240602))
+    shots = repository.list_shots()
+    tastings = repository.list_tastings()
+
+    summary = AnalyticsEngine(repository).build_summary()
+
+    for impact in summary.water_rankings:
+        water = repository.get_water(impact.water_id)
+        expected = compute_water_impact(water, shots, tastings, rank=impact.rank)
+        assert impact == expected
+    for block in summary.coffees:
+        coffee_tastings = repository.tastings_by_coffee(block.coffee.id)
+        scores = [t.sensory_mean for t in coffee_tastings]
+        assert block.sensory_summary.sample_size == len(scores)
+        assert block.sensory_summary.mean == (round(mean(scores), 2) if scores else None)
+
+    for water in repository.list_waters():
+        expected: dict = {key: {} for key in (None, *BeverageType)}
+        for shot in shots:
+            if shot.water_id != water.id:
+                continue
+            for tasting in repository.list_tastings_for_shot(shot.id):
+                for key in (None, shot.beverage_type):
+                    expected[key].setdefault(shot.coffee_id, SensoryAggregate()).add(tasting.sensory_mean)
+        assert water_sensory_aggregates(repository.snapshot().columns, water.id) == expected
+
+
+def test_summary_means_round_like_statistics_mean() -> None:
+    repository = _seeded_repository(random.Random(20240603))
+    coffee = repository.list_coffees()[0]
+    water = repository.upsert_water(WaterCreate(label="Demi", source="robinet", brand=None))
+    # brew ratios 2.09 and 2.1: the mean lands on a rounding half of the hundredths
+    for weight in (37.62, 37.8):
+        repository.add_shot(
+            ShotCreate(
+                coffee_id=coffee.id,
+                water_id=water.id,
+                beverage_type="expresso",
+                grind_setting="9",
+                dose_in_grams=18,
+                beverage_weight_grams=weight,
+                extraction_time_seconds=28,
+            )
+        )
+    shots = repository.list_shots()
+    tastings = repository.list_tastings()
+
+    summary = AnalyticsEngine(repository).build_summary()
+
+    def rounded_mean(values: list[float]) -> float | None:
+        return round(mean(values), 2) if values else None
+
+    assert [i.average_brew_ratio for i in summary.water_rankings if i.water_id == water.id] == [
+        rounded_mean([2.09, 2.1])
+    ]
+    for impact in summary.water_rankings:
+        assert impact == compute_water_impact(repository.get_water(impact.water_id), shots, tastings, impact.rank)
+    for block in summary.coffees:
+        coffee_shots = repository.list_shots_for_coffee(block.coffee.id)
+        coffee_tastings = repository.tastings_by_coffee(block.coffee.id)
+        assert block.sensory_summary.mean == rounded_mean([t.sensory_mean for t in coffee_tastings])
+        assert block.sensory_summary.weighted_mean == rounded_mean(
+            [t.weighted_sensory_mean or t.sensory_mean for t in coffee_tastings]
+        )
+        for impact in block.water_impacts:
+            water_of_impact = repository.get_water(impact.water_id)
+            assert impact == compute_water_impact(water_of_impact, coffee_shots, coffee_tastings, impact.rank)
+
+
+def test_summary_uses_the_weighted_mean_of_the_tastings_that_have_one() -> None:
+    rng = random.Random(20240604)
+    seeded = _seeded_repository(rng)
+    repository = Repository.from_entities(
+        seeded.list_coffees(),
+        seeded.list_waters(),
+        seeded.list_shots(),
+        [
+            replace(tasting, weighted_sensory_mean=round(rng.uniform(1, 5), 2)) if rng.random() < 0.3 else tasting
+            for tasting in seeded.list_tastings()
+        ],
+        seeded.list_verdicts(),
+    )
+    weighted = [tasting for tasting in repository.list_tastings() if tasting.weighted_sensory_mean is not None]
+    repository.delete_tasting(weighted[0].id)
+
+    summary = AnalyticsEngine(repository).build_summary()
+
+    assert set(repository.snapshot().columns.weighted_means) == {tasting.id for tasting in weighted[1:]}
+    for block in summary.coffees:
+        coffee_tastings = repository.tastings_by_coffee(block.coffee.id)
+        expected = [tasting.weighted_sensory_mean or tasting.sensory_mean for tasting in coffee_tastings]
+        assert block.sensory_summary.weighted_mean == (round(mean(expected), 2) if expected else None)
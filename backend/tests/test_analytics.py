@@ -1,8 +1,18 @@
 from __future__ import annotations
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
 from fastapi.testclient import TestClient
 
+from app.core.dependencies import get_repository
 from app.main import app
+from app.models.schemas import WaterCreate
+from app.services.analysis import score_to_label
+from app.services.cache import AnalyticsCache
+from app.services.sqlite_repository import SqliteRepository
 
 client = TestClient(app)
 
@@ -56,15 +66,18 @@ def _create_shot(coffee_id: str, water_id: str, beverage_type: str, ratio: float
 
 
 def _create_tasting(shot_id: str, base_score: int) -> dict:
+    scores = {
+        "acidity": base_score,
+        "bitterness": base_score - 1,
+        "body": base_score + 1,
+        "aroma": base_score + 1,
+        "balance": base_score,
+        "finish": base_score,
+        "overall": base_score + 1,
+    }
     payload = {
         "shot_id": shot_id,
-        "acidity": min(5, base_score),
-        "bitterness": max(1, base_score - 1),
-        "body": min(5, base_score + 1),
-        "aroma": min(5, base_score + 1),
-        "balance": min(5, base_score),
-        "finish": min(5, base_score),
-        "overall": min(5, base_score + 1),
+        **{f"{axis}_label": score_to_label(score) for axis, score in scores.items()},
         "comments": "Test tasting",
     }
     response = client.post("/api/v1/tastings", json=payload)
@@ -102,3 +115,149 @@ def test_analytics_summary_exposes_diagnostics_and_rankings() -> None:
     water_impacts = coffee_block["water_impacts"]
     assert any(impact["classification"] == "faible minéralisation" for impact in water_impacts)
     assert any(impact["classification"] == "fortement minéralisée" for impact in water_impacts)
+
+
+def _labelled_tasting(client, shot_id: str, label: str) -> None:
+    labels = {
+        f"{axis}_label": label
+        for axis in ("acidity", "bitterness", "body", "aroma", "balance", "finish", "overall")
+    }
+    response = client.post("/api/v1/tastings", json={"shot_id": shot_id, **labels})
+    assert response.status_code == 201
+
+
+def test_rankings_per_beverage_and_water(client) -> None:
+    coffee = {"roaster": "R", "format": "grain", "weight_grams": 250, "price_eur": 12, "purchased_at": "2024-06-01"}
+    coffee_a = client.post("/api/v1/coffees", json={"name": "A", **coffee}).json()["id"]
+    coffee_b = client.post("/api/v1/coffees", json={"name": "B", **coffee}).json()["id"]
+    soft = client.post("/api/v1/waters", json={"label": "Douce", "source": "robinet", "brand": None}).json()["id"]
+    hard = client.post("/api/v1/waters", json={"label": "Dure", "source": "robinet", "brand": None}).json()["id"]
+
+    def shot(coffee_id: str, water_id: str, beverage_type: str) -> str:
+        payload = {
+            "coffee_id": coffee_id,
+            "beverage_type": beverage_type,
+            "grind_setting": "8",
+            "dose_in_grams": 18,
+            "beverage_weight_grams": 36,
+            "extraction_time_seconds": 28,
+            "water_id": water_id,
+        }
+        return client.post("/api/v1/shots", json=payload).json()["id"]
+
+    _labelled_tasting(client, shot(coffee_a, soft, "expresso"), "intense")
+    _labelled_tasting(client, shot(coffee_a, hard, "cafe_long"), "insipide")
+    _labelled_tasting(client, shot(coffee_b, hard, "expresso"), "expressif")
+
+    global_ranking = client.get("/api/v1/analytics/rankings/global").json()
+    assert [r["coffee_id"] for r in global_ranking] == [coffee_b, coffee_a]
+
+    expresso = client.get("/api/v1/analytics/rankings/expresso").json()
+    assert [r["coffee_id"] for r in expresso] == [coffee_a, coffee_b]
+    assert {r["beverage_filter"] for r in expresso} == {"expresso"}
+
+    cafe_long = client.get("/api/v1/analytics/rankings/cafe_long").json()
+    assert [r["coffee_id"] for r in cafe_long] == [coffee_a]
+    assert cafe_long[0]["score_label"] == "insipide"
+
+    hard_only = client.get("/api/v1/analytics/rankings/global", params={"water_id": hard}).json()
+    assert [r["coffee_id"] for r in hard_only] == [coffee_b, coffee_a]
+    assert hard_only[1]["score_label"] == "insipide"
+    assert hard_only[0]["water_filter"] == hard
+
+    assert client.get("/api/v1/analytics/rankings/global", params={"water_id": str(uuid4())}).status_code == 404
+    assert client.get("/api/v1/analytics/rankings/lungo").status_code == 422
+
+
+def test_analytics_results_are_cached_per_generation_with_etag(client) -> None:
+    coffee = {"roaster": "R", "format": "grain", "weight_grams": 250, "price_eur": 12, "purchased_at": "2024-06-01"}
+    client.post("/api/v1/coffees", json={"name": "A", **coffee})
+
+    first = client.get("/api/v1/analytics")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.json()["coffees"][0]["coffee"]["name"] == "A"
+
+    not_modified = client.get("/api/v1/analytics", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+
+    ranking_etag = client.get("/api/v1/analytics/rankings/global").headers["ETag"]
+    assert ranking_etag != etag
+
+    client.post("/api/v1/coffees", json={"name": "B", **coffee})
+    refreshed = client.get("/api/v1/analytics", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != etag
+    assert len(refreshed.json()["coffees"]) == 2
+
+
+def test_etag_is_shared_by_workers_on_the_same_database(tmp_path) -> None:
+    # two repositories on one file stand for two uvicorn workers, each with its own cache
+    workers = [SqliteRepository(str(tmp_path / "barisense.db")) for _ in range(2)]
+    coffee = {"roaster": "R", "format": "grain", "weight_grams": 250, "price_eur": 12, "purchased_at": "2024-06-01"}
+    try:
+        app.dependency_overrides[get_repository] = lambda: workers[0]
+        shared = TestClient(app)
+        shared.post("/api/v1/coffees", json={"name": "A", **coffee})
+        etag = shared.get("/api/v1/analytics").headers["ETag"]
+
+        app.dependency_overrides[get_repository] = lambda: workers[1]
+        other = shared.get("/api/v1/analytics", headers={"If-None-Match": etag})
+        assert other.status_code == 304
+        assert other.headers["ETag"] == etag
+    finally:
+        app.dependency_overrides.clear()
+        for worker in workers:
+            worker.close()
+
+
+def test_not_modified_is_answered_without_a_snapshot(client, repository, monkeypatch) -> None:
+    etag = client.get("/api/v1/analytics").headers["ETag"]
+    repository.upsert_water(WaterCreate(label="Volvic", source="bouteille"))
+    refreshed = client.get("/api/v1/analytics").headers["ETag"]
+    assert refreshed != etag
+
+    def no_snapshot():
+        raise AssertionError("snapshot taken for a 304")
+
+    monkeypatch.setattr(repository, "snapshot", no_snapshot)
+    assert client.get("/api/v1/analytics", headers={"If-None-Match": refreshed}).status_code == 304
+
+
+def test_analytics_cache_reuses_result_until_next_write() -> None:
+    cache = AnalyticsCache()
+    calls = []
+
+    def compute() -> int:
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_compute("k", 1, compute) == 1
+    assert cache.get_or_compute("k", 1, compute) == 1
+    assert cache.get_or_compute("k", 2, compute) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_analytics_cache_coalesces_concurrent_identical_computations() -> None:
+    cache = AnalyticsCache()
+    release = threading.Event()
+    calls = []
+
+    def compute() -> int:
+        calls.append(1)
+        release.wait(5)
+        return 42
+
+    with ThreadPoolExecutor(4) as pool:
+        results = [pool.submit(cache.get_or_compute, "k", 1, compute) for _ in range(4)]
+        deadline = time.monotonic() + 5
+        while cache.coalesced < 3 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        release.set()
+        assert [result.result() for result in results] == [42] * 4
+
+    assert len(calls) == 1
+    assert (cache.misses, cache.coalesced) == (1, 3)
+    # a later generation is not coalesced with the finished computation
+    assert cache.get_or_compute("k", 2, lambda: 7) == 7
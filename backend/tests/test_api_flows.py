@@ -1,3 +1,4 @@
+import base64
 from uuid import uuid4
 
 from fastapi.testclient import TestClient
@@ -32,16 +33,218 @@ def test_create_tasting_rejects_unknown_shot() -> None:
         "/api/v1/tastings",
         json={
             "shot_id": str(uuid4()),
-            "acidity": 3,
-            "bitterness": 2,
-            "body": 3,
-            "aroma": 4,
-            "balance": 3,
-            "finish": 3,
-            "overall": 3,
+            **{
+                f"{axis}_label": "équilibré"
+                for axis in ("acidity", "bitterness", "body", "aroma", "balance", "finish", "overall")
+            },
             "comments": "No matching shot",
         },
     )
 
     assert response.status_code == 404
     assert response.json()["detail"] == "Shot introuvable"
+
+
+def test_bulk_delete_coffees(client) -> None:
+    coffee_payload = {
+        "name": "Bulk",
+        "roaster": "Test Roastery",
+        "reference": None,
+        "format": "grain",
+        "weight_grams": 250,
+        "price_eur": 12.0,
+        "purchased_at": "2024-06-01",
+    }
+    ids = [client.post("/api/v1/coffees", json=coffee_payload).json()["id"] for _ in range(3)]
+
+    unknown = client.delete("/api/v1/coffees", params={"ids": [ids[0], str(uuid4())]})
+    assert unknown.status_code == 404
+    assert len(client.get("/api/v1/coffees").json()) == 3
+
+    response = client.delete("/api/v1/coffees", params={"ids": ids[:2]})
+    assert response.status_code == 204
+    assert [c["id"] for c in client.get("/api/v1/coffees").json()] == [ids[2]]
+
+
+def test_list_routes_paginate_with_opaque_cursor(client) -> None:
+    for idx in range(5):
+        client.post("/api/v1/waters", json={"label": f"Eau {idx}", "source": "robinet", "brand": None})
+    everything = [w["id"] for w in client.get("/api/v1/waters").json()]
+
+    collected = []
+    params = {"limit": 2}
+    while True:
+        response = client.get("/api/v1/waters", params=params)
+        assert response.status_code == 200
+        collected.extend(w["id"] for w in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params = {"limit": 2, "after": cursor}
+
+    assert collected == everything
+    assert client.get("/api/v1/waters", params={"after": "not-a-cursor"}).status_code == 400
+    aware = base64.urlsafe_b64encode(f"2024-06-01T08:00:00+02:00|{uuid4()}".encode()).decode()
+    assert client.get("/api/v1/shots", params={"after": aware}).status_code == 400
+
+
+def test_bulk_shots_and_tastings_are_atomic_with_item_errors(client) -> None:
+    coffee_id = client.post(
+        "/api/v1/coffees",
+        json={
+            "name": "Matin",
+            "roaster": "Test Roastery",
+            "reference": None,
+            "format": "grain",
+            "weight_grams": 250,
+            "price_eur": 12.0,
+            "purchased_at": "2024-06-01",
+        },
+    ).json()["id"]
+    shot = {
+        "coffee_id": coffee_id,
+        "beverage_type": "expresso",
+        "grind_setting": "8",
+        "dose_in_grams": 18,
+        "beverage_weight_grams": 36,
+        "extraction_time_seconds": 28,
+    }
+
+    rejected = client.post(
+        "/api/v1/shots/bulk",
+        json=[shot, {**shot, "coffee_id": str(uuid4())}, {**shot, "dose_in_grams": -1}],
+    )
+    assert rejected.status_code == 422
+    assert rejected.json()["created"] == []
+    assert [(e["index"], e["field"]) for e in rejected.json()["errors"]] == [(2, "dose_in_grams")]
+    unknown = client.post("/api/v1/shots/bulk", json=[shot, {**shot, "coffee_id": str(uuid4())}])
+    assert unknown.json()["errors"] == [{"index": 1, "field": None, "detail": "Café introuvable"}]
+    assert client.get("/api/v1/shots").json() == []
+
+    created = client.post("/api/v1/shots/bulk", json=[shot, {**shot, "beverage_type": "ristretto"}])
+    assert created.status_code == 201
+    shot_ids = [s["id"] for s in created.json()["created"]]
+    assert len(client.get("/api/v1/shots").json()) == 2
+
+    tasting = {
+        "acidity_label": "expressif",
+        "bitterness_label": "doux",
+        "body_label": "expressif",
+        "aroma_label": "expressif",
+        "balance_label": "équilibré",
+        "finish_label": "équilibré",
+        "overall_label": "expressif",
+    }
+    missing = client.post("/api/v1/tastings/bulk", json=[{**tasting, "shot_id": str(uuid4())}])
+    assert missing.json()["errors"][0]["detail"] == "Shot introuvable"
+
+    response = client.post(
+        "/api/v1/tastings/bulk",
+        json=[
+            {**tasting, "shot_id": shot_ids[0]},
+            {**tasting, "shot_id": shot_ids[1], "overall_label": "insipide", "aroma_label": "insipide"},
+        ],
+    )
+    assert response.status_code == 201
+    assert len(response.json()["created"]) == 2
+    verdicts = client.get("/api/v1/verdicts").json()
+    assert len(verdicts) == 1
+    assert verdicts[0]["rationale"].endswith("sur le dernier shot")
+    assert len(client.get("/api/v1/tastings").json()) == 2
+
+
+def test_shot_and_tasting_listings_accept_filters(client) -> None:
+    coffee = {
+        "name": "Filtre",
+        "roaster": "Test Roastery",
+        "reference": None,
+        "format": "grain",
+        "weight_grams": 250,
+        "price_eur": 12.0,
+        "purchased_at": "2024-06-01",
+    }
+    coffee_ids = [client.post("/api/v1/coffees", json=coffee).json()["id"] for _ in range(2)]
+    shots = [
+        client.post(
+            "/api/v1/shots",
+            json={
+                "coffee_id": coffee_ids[index % 2],
+                "beverage_type": ["expresso", "ristretto"][index // 2 % 2],
+                "grind_setting": "8",
+                "dose_in_grams": 18,
+                "beverage_weight_grams": 36,
+                "extraction_time_seconds": 28,
+            },
+        ).json()
+        for index in range(6)
+    ]
+    labels = ["acidity", "bitterness", "body", "aroma", "balance", "finish", "overall"]
+    for shot in shots:
+        client.post("/api/v1/tastings", json={"shot_id": shot["id"], **{f"{a}_label": "doux" for a in labels}})
+
+    params = {"coffee_id": coffee_ids[0], "beverage_type": "expresso"}
+    listed = client.get("/api/v1/shots", params=params).json()
+    assert [s["id"] for s in listed] == [shots[4]["id"], shots[0]["id"]]
+    first = client.get("/api/v1/shots", params={**params, "limit": 1})
+    rest = client.get("/api/v1/shots", params={**params, "after": first.headers["X-Next-Cursor"]})
+    assert [s["id"] for s in first.json() + rest.json()] == [s["id"] for s in listed]
+
+    tastings = client.get("/api/v1/tastings", params={"coffee_id": coffee_ids[1], "shot_id": shots[3]["id"]}).json()
+    assert [t["shot_id"] for t in tastings] == [shots[3]["id"]]
+    future = client.get("/api/v1/shots", params={"created_from": "2999-01-01T00:00:00+02:00"})
+    assert future.status_code == 200 and future.json() == []
+    assert client.get("/api/v1/shots", params={"beverage_type": "latte"}).status_code == 422
+
+
+def test_changes_feed_sends_upserts_then_tombstones(client) -> None:
+    initial = client.get("/api/v1/changes").json()
+    assert initial["full"] is True
+    cursor = {"since": initial["version"], "epoch": initial["epoch"]}
+
+    water = client.post("/api/v1/waters", json={"label": "Robinet", "source": "robinet", "brand": None}).json()
+    delta = client.get("/api/v1/changes", params=cursor).json()
+    assert delta["full"] is False
+    assert [w["id"] for w in delta["waters"]] == [water["id"]]
+    assert delta["coffees"] == [] and delta["deleted"]["waters"] == []
+
+    client.delete(f"/api/v1/waters/{water['id']}")
+    delta = client.get("/api/v1/changes", params={**cursor, "since": delta["version"]}).json()
+    assert delta["waters"] == [] and delta["deleted"]["waters"] == [water["id"]]
+    assert client.get("/api/v1/changes", params={**cursor, "epoch": initial["epoch"] + 1}).json()["full"] is True
+
+
+def test_deleting_a_used_water_detaches_its_shots_in_the_change_feed(client) -> None:
+    coffee = client.post(
+        "/api/v1/coffees",
+        json={
+            "name": "A",
+            "roaster": "R",
+            "format": "grain",
+            "weight_grams": 250,
+            "price_eur": 12,
+            "purchased_at": "2024-06-01",
+        },
+    ).json()
+    water = client.post("/api/v1/waters", json={"label": "Robinet", "source": "robinet"}).json()
+    shot = client.post(
+        "/api/v1/shots",
+        json={
+            "coffee_id": coffee["id"],
+            "water_id": water["id"],
+            "beverage_type": "expresso",
+            "grind_setting": "12",
+            "dose_in_grams": 18,
+            "beverage_weight_grams": 36,
+            "extraction_time_seconds": 28,
+        },
+    ).json()
+    before = client.get("/api/v1/changes").json()
+
+    assert client.delete(f"/api/v1/waters/{water['id']}").status_code == 204
+
+    assert client.get(f"/api/v1/shots/{shot['id']}").json()["water_id"] is None
+    delta = client.get("/api/v1/changes", params={"since": before["version"], "epoch": before["epoch"]}).json()
+    assert delta["full"] is False
+    assert delta["deleted"]["waters"] == [water["id"]]
+    assert [s["id"] for s in delta["shots"]] == [shot["id"]]
+    assert delta["shots"][0]["water_id"] is None
@@ -0,0 +1,256 @@
+import random
+import threading
+import time
+from typing import Iterator
+
+import pytest
+
+from app.models.entities import BeverageType, VerdictStatus
+from app.models.schemas import CoffeeCreate, VerdictCreate, WaterCreate
+from app.services import columns as columns_module
+from app.services.analysis import AnalyticsEngine, build_rankings
+from app.services.repository import Repository, ShotFilters, TastingFilters
+from app.services.sqlite_repository import SqliteRepository
+from tests.test_repository import _coffee, _everything, _shot_payload, _tasting, assert_indexes_consistent
+
+LABELS = ["insipide", "doux", "équilibré", "expressif", "intense"]
+
+
+def _hammer(repository, seconds: float = 1.0, writers: int = 4, readers: int = 4) -> list[BaseException]:
+    errors: list[BaseException] = []
+    deadline = time.monotonic() + seconds
+
+    def guarded(work):
+        def run():
+            try:
+                while time.monotonic() < deadline:
+                    work()
+            except BaseException as err:  # noqa: BLE001 - surfaced to the test
+                errors.append(err)
+
+        return run
+
+    def write(seed: int):
+        rng = random.Random(seed)
+        own: list = []
+
+        def step():
+            coffee = _coffee(repository, f"Café {rng.random():.4f}")
+            own.append(coffee.id)
+            shots = [
+                repository.add_shot(_shot_payload(coffee.id, rng.choice(["ristretto", "expresso", "cafe_long"])))
+                for _ in range(rng.randint(1, 3))
+            ]
+            for shot in shots:
+                _tasting(repository, shot.id, rng.choice(LABELS))
+            if rng.random() < 0.3:
+                repository.delete_shot(shots[0].id)
+            if rng.random() < 0.3:
+                # each writer only deletes its own coffees so references stay valid
+                repository.delete_coffees([own.pop(0) for _ in range(min(2, len(own)))])
+
+        return step
+
+    def read():
+        snapshot = repository.snapshot()
+        generation = snapshot.generation
+        summary = AnalyticsEngine(snapshot).build_summary()
+        build_rankings(snapshot)
+        assert len(summary.coffees) == len(snapshot.list_coffees())
+        assert snapshot.generation == generation
+        # live reads must survive writers too
+        repository.list_shots(limit=20)
+        repository.tasting_counts()
+        for coffee in repository.list_coffees(limit=5):
+            repository.tastings_by_coffee(coffee.id)
+
+    threads = [threading.Thread(target=guarded(write(seed))) for seed in range(writers)]
+    threads += [threading.Thread(target=guarded(read)) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def test_concurrent_writes_and_analytics_stay_consistent(repository) -> None:
+    errors = _hammer(repository)
+
+    assert errors == []
+    assert repository.sensory_aggregates_consistent()
+    assert_indexes_consistent(repository)
+    counts = repository.tasting_counts()
+    assert sum(counts.values()) == len(repository.list_tastings())
+
+
+def test_snapshot_is_frozen_point_in_time() -> None:
+    repository = Repository()
+    coffee = _coffee(repository, "A")
+    shot = repository.add_shot(_shot_payload(coffee.id))
+    _tasting(repository, shot.id, "doux")
+    snapshot = repository.snapshot()
+    assert repository.snapshot() is snapshot
+
+    repository.update_shot(shot.id, _shot_payload(coffee.id, "ristretto"))
+    _tasting(repository, shot.id, "intense")
+    renamed = CoffeeCreate.model_validate(coffee, from_attributes=True).model_copy(update={"name": "renamed"})
+    repository.upsert_coffee(renamed, coffee.id)
+
+    assert snapshot.get_shot(shot.id).beverage_type.value == "expresso"
+    assert len(snapshot.list_tastings()) == 1
+    assert snapshot.sensory_aggregate(coffee.id).count == 1
+    assert snapshot.get_coffee(coffee.id).name == "A"
+    assert repository.get_coffee(coffee.id).name == "renamed"
+    assert repository.snapshot() is not snapshot
+    with pytest.raises(RuntimeError):
+        snapshot.delete_coffee(coffee.id)
+
+
+def _answers(snapshot) -> tuple:
+    """What a snapshot answers through its read methods, detached from its containers."""
+    coffees, shots = snapshot.list_coffees(), snapshot.list_shots()
+    return (
+        [[item.id for item in items] for items in _collections(snapshot)],
+        _everything(snapshot),
+        {coffee.id: {shot.id for shot in snapshot.list_shots_for_coffee(coffee.id)} for coffee in coffees},
+        {shot.id: [tasting.id for tasting in snapshot.list_tastings_for_shot(shot.id)] for shot in shots},
+        {coffee.id: snapshot.verdict_for_coffee(coffee.id) for coffee in coffees},
+        {key: snapshot.sensory_aggregates(key) for key in (None, *BeverageType)},
+        snapshot.tasting_counts(),
+        {coffee.id: [s.id for s in snapshot.list_shots(filters=ShotFilters(coffee_id=coffee.id))] for coffee in coffees},
+        {key: [s.id for s in snapshot.list_shots(filters=ShotFilters(beverage_type=key))] for key in BeverageType},
+        {shot.id: [t.id for t in snapshot.list_tastings(filters=TastingFilters(shot_id=shot.id))] for shot in shots},
+    )
+
+
+def _frozen(snapshot) -> tuple:
+    """`_answers` plus the raw column tables."""
+    columns = snapshot.columns
+    tables = [
+        (dict(table.rows), table.live.tolist(), {name: table.column(name).tolist() for name in table.dtypes})
+        for table in (columns.shots, columns.tastings)
+    ]
+    return (*_answers(snapshot), tables, (list(columns.coffees.ids), list(columns.waters.ids), dict(columns.weighted_means)))
+
+
+def _collections(repository) -> tuple[list, ...]:
+    return (
+        repository.list_coffees(),
+        repository.list_waters(),
+        repository.list_shots(),
+        repository.list_tastings(),
+        repository.list_verdicts(),
+    )
+
+
+def _random_writes(repository, seed: int, steps: int) -> Iterator[None]:
+    """Apply `steps` writes of every kind, yielding after each one."""
+    rng = random.Random(seed)
+    waters = [repository.upsert_water(WaterCreate(label=f"Eau {i}", source="bouteille")) for i in range(2)]
+    coffees = [_coffee(repository, f"Café {i}") for i in range(3)]
+
+    def payload():
+        shot = _shot_payload(rng.choice(coffees).id, rng.choice(list(BeverageType)).value)
+        return shot.model_copy(update={"water_id": rng.choice([None, *[water.id for water in waters]])})
+
+    for _ in range(steps):
+        shots = repository.list_shots()
+        tastings = repository.list_tastings()
+        action = rng.random()
+        if action < 0.25 or not shots:
+            repository.add_shots([payload() for _ in range(rng.randint(1, 3))])
+        elif action < 0.5:
+            _tasting(repository, rng.choice(shots).id, rng.choice(LABELS))
+        elif action < 0.6:
+            repository.update_shot(rng.choice(shots).id, payload())
+        elif action < 0.7 and tastings:
+            repository.delete_tasting(rng.choice(tastings).id)
+        elif action < 0.8:
+            repository.delete_shot(rng.choice(shots).id)
+        elif action < 0.85:
+            repository.upsert_verdict(
+                VerdictCreate(coffee_id=rng.choice(coffees).id, status=rng.choice(list(VerdictStatus)))
+            )
+        elif action < 0.9:
+            water = rng.choice(waters)
+            repository.delete_water(water.id)
+            waters.remove(water)
+            waters.append(repository.upsert_water(WaterCreate(label="Eau", source="robinet")))
+        elif action < 0.93:
+            doomed = rng.choice(coffees)
+            repository.delete_coffees([doomed.id])
+            coffees.remove(doomed)
+            coffees.append(_coffee(repository, "Café"))
+        yield
+
+
+def test_snapshots_keep_their_state_through_later_writes(monkeypatch) -> None:
+    # small compaction threshold, so deletes also rebuild the shared column tables
+    monkeypatch.setattr(columns_module, "COMPACT_MIN_DEAD", 4)
+    rng = random.Random(7)
+    repository = Repository()
+    snapshots = []
+    for _ in _random_writes(repository, seed=11, steps=400):
+        if rng.random() < 0.3:
+            snapshot = repository.snapshot()
+            snapshots.append((snapshot, _frozen(snapshot)))
+
+    assert len(snapshots) > 50
+    for snapshot, frozen in snapshots:
+        assert _frozen(snapshot) == frozen
+        assert_indexes_consistent(snapshot)
+    assert_indexes_consistent(repository)
+    assert repository.sensory_aggregates_consistent()
+
+
+def test_sqlite_snapshot_catches_up_from_the_change_log(tmp_path, monkeypatch) -> None:
+    repository = SqliteRepository(str(tmp_path / "barisense.db"))
+    builds = []
+    from_entities = Repository.from_entities
+
+    def counted_from_entities(*args, **kwargs) -> Repository:
+        builds.append(kwargs["generation"])
+        return from_entities(*args, **kwargs)
+
+    monkeypatch.setattr(Repository, "from_entities", staticmethod(counted_from_entities))
+    rng = random.Random(5)
+    for _ in _random_writes(repository, seed=13, steps=200):
+        if rng.random() < 0.5:
+            snapshot = repository.snapshot()
+            assert snapshot.generation == repository.generation
+            assert _answers(snapshot) == _answers(repository)
+            assert_indexes_consistent(snapshot)
+    repository.close()
+
+    assert len(builds) == 1
+
+
+def test_concurrent_sqlite_snapshots_load_the_database_once(tmp_path, monkeypatch) -> None:
+    repository = SqliteRepository(str(tmp_path / "barisense.db"))
+    coffee = _coffee(repository, "A")
+    repository.add_shot(_shot_payload(coffee.id))
+    builds = []
+    from_entities = Repository.from_entities
+
+    def slow_from_entities(*args, **kwargs) -> Repository:
+        builds.append(kwargs["generation"])
+        time.sleep(0.05)
+        return from_entities(*args, **kwargs)
+
+    monkeypatch.setattr(Repository, "from_entities", staticmethod(slow_from_entities))
+    barrier = threading.Barrier(8)
+    snapshots = []
+
+    def read() -> None:
+        barrier.wait()
+        snapshots.append(repository.snapshot())
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    repository.close()
+
+    assert len(builds) == 1
+    assert len({id(snapshot) for snapshot in snapshots}) == 1
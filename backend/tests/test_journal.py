@@ -0,0 +1,154 @@
+import threading
+
+import pytest
+
+from app.models.entities import BeverageType, VerdictStatus
+from app.models.schemas import VerdictCreate, WaterCreate
+from app.services.journal import Journal, JournalCorrupted
+from tests.test_repository import _coffee, _shot_payload, _tasting, assert_indexes_consistent
+
+
+def _state(repository) -> tuple:
+    return (
+        repository.list_coffees(),
+        repository.list_waters(),
+        repository.list_shots(),
+        repository.list_tastings(),
+        repository.list_verdicts(),
+        {key: repository.sensory_aggregates(key) for key in (None, *BeverageType)},
+    )
+
+
+def _populate(repository) -> None:
+    water = repository.upsert_water(WaterCreate(label="Volvic", source="bouteille", brand="Volvic", ph=7.0))
+    coffee_a = _coffee(repository, "A")
+    coffee_b = _coffee(repository, "B")
+    shots = repository.add_shots(
+        [_shot_payload(coffee_a.id), _shot_payload(coffee_a.id, "ristretto"), _shot_payload(coffee_b.id)]
+    )
+    moved = _shot_payload(coffee_b.id, "cafe_long").model_copy(update={"water_id": water.id})
+    repository.update_shot(shots[1].id, moved)
+    for shot, label in zip(shots, ["intense", "doux", "insipide"]):
+        _tasting(repository, shot.id, label)
+    repository.upsert_verdict(VerdictCreate(coffee_id=coffee_a.id, status=VerdictStatus.RACHETER, rationale="manuel"))
+    repository.delete_shot(shots[2].id)
+    doomed = _coffee(repository, "C")
+    _tasting(repository, repository.add_shot(_shot_payload(doomed.id)).id)
+    repository.delete_coffee(doomed.id)
+
+
+def test_journal_replays_every_mutation(tmp_path) -> None:
+    journal = Journal(tmp_path)
+    repository = journal.open()
+    _populate(repository)
+    expected = _state(repository)
+    journaled = journal.records_since_snapshot
+    repository.close()
+
+    journal = Journal(tmp_path)
+    reopened = journal.open()
+    assert journal.records_since_snapshot == journaled
+    # one generation per replayed record, puts and deletes alike
+    assert reopened.generation == journaled
+    assert _state(reopened) == expected
+    assert reopened.sensory_aggregates_consistent()
+    assert_indexes_consistent(reopened)
+    reopened.close()
+
+
+def test_compaction_snapshots_and_replays_only_the_tail(tmp_path) -> None:
+    journal = Journal(tmp_path)
+    repository = journal.open()
+    _populate(repository)
+    journal.compact()
+    tail = _coffee(repository, "D")
+    _tasting(repository, repository.add_shot(_shot_payload(tail.id)).id, "expressif")
+    expected = _state(repository)
+    repository.close()
+
+    assert [p.name for p in sorted(tmp_path.glob("snapshot-*.bin"))] == ["snapshot-00000001.bin"]
+    assert [p.name for p in sorted(tmp_path.glob("journal-*.bin"))] == ["journal-00000001.bin"]
+
+    journal = Journal(tmp_path)
+    reopened = journal.open()
+    assert journal.records_since_snapshot == 4  # coffee, shot, tasting and its verdict
+    assert _state(reopened) == expected
+    assert_indexes_consistent(reopened)
+    reopened.close()
+
+
+def test_torn_tail_frame_is_dropped(tmp_path) -> None:
+    repository = Journal(tmp_path).open()
+    coffee = _coffee(repository, "A")
+    repository.close()
+    segment = next(tmp_path.glob("journal-*.bin"))
+    intact = segment.stat().st_size
+    with open(segment, "ab") as handle:
+        handle.write(b"\x40\x00\x00\x00\x00\x00\x00\x00partial")
+
+    reopened = Journal(tmp_path).open()
+    assert [c.id for c in reopened.list_coffees()] == [coffee.id]
+    assert segment.stat().st_size == intact
+    reopened.close()
+
+
+def _flip_byte(path, offset: int) -> None:
+    data = bytearray(path.read_bytes())
+    data[offset] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+
+def test_corrupt_frame_in_an_earlier_segment_stops_the_replay(tmp_path) -> None:
+    repository = Journal(tmp_path).open()
+    _coffee(repository, "A")
+    repository.close()
+    repository = Journal(tmp_path).open()
+    _coffee(repository, "B")
+    repository.close()
+    first, second = sorted(tmp_path.glob("journal-*.bin"))
+    _flip_byte(first, first.stat().st_size - 1)
+
+    with pytest.raises(JournalCorrupted, match=first.name):
+        Journal(tmp_path).open()
+    assert second.stat().st_size > 0
+
+
+def test_corrupt_frame_before_intact_ones_is_not_taken_for_a_torn_tail(tmp_path) -> None:
+    repository = Journal(tmp_path).open()
+    _coffee(repository, "A")
+    _coffee(repository, "B")
+    repository.close()
+    segment = next(tmp_path.glob("journal-*.bin"))
+    size = segment.stat().st_size
+    _flip_byte(segment, 10)
+
+    with pytest.raises(JournalCorrupted):
+        Journal(tmp_path).open()
+    assert segment.stat().st_size == size
+
+
+def test_only_one_background_compaction_runs_at_a_time(tmp_path, monkeypatch) -> None:
+    release = threading.Event()
+    calls = []
+
+    def slow_compact(self) -> None:
+        calls.append(threading.current_thread().name)
+        release.wait(5)
+
+    monkeypatch.setattr(Journal, "compact", slow_compact)
+    journal = Journal(tmp_path, snapshot_every=2)
+    repository = journal.open()
+    for name in "ABCDEF":
+        _coffee(repository, name)
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == "journal-compaction":
+            thread.join(5)
+    assert calls == ["journal-compaction"]
+
+    _coffee(repository, "G")
+    for thread in threading.enumerate():
+        if thread.name == "journal-compaction":
+            thread.join(5)
+    assert len(calls) == 2
+    repository.close()
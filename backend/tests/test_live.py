@@ -0,0 +1,107 @@
+import asyncio
+import json
+import random
+
+from app.services.analysis import build_rankings
+from app.services.live import LiveRankings, RankingTracker
+from tests.test_repository import _coffee, _shot_payload, _tasting
+
+
+def _taste(repository, coffee_id, label: str):
+    shot = repository.add_shot(_shot_payload(coffee_id))
+    _tasting(repository, shot.id, label)
+    return shot
+
+
+def _published(tracker: RankingTracker) -> list[dict]:
+    ranking, _ = tracker.state()
+    return [entry.model_dump() for entry in ranking.updated]
+
+
+def test_tracker_diffs_only_the_coffees_that_moved(repository) -> None:
+    coffees = [_coffee(repository, name) for name in "ABCD"]
+    for coffee, label in zip(coffees, ["doux", "équilibré", "expressif", "intense"]):
+        _taste(repository, coffee.id, label)
+    tracker = RankingTracker(repository)
+
+    ranking, verdicts = tracker.update()
+    assert ranking.full and verdicts.full and len(verdicts.updated) == 4
+    assert _published(tracker) == [entry.model_dump() for entry in build_rankings(repository)[None]]
+    assert tracker.update() is None
+
+    # C drops below A: only C, A and B move; D keeps first place
+    for _ in range(3):
+        _taste(repository, coffees[2].id, "insipide")
+    ranking, verdicts = tracker.update()
+    assert not ranking.full
+    assert {entry.coffee_id for entry in ranking.updated} == {coffees[0].id, coffees[1].id, coffees[2].id}
+    assert [verdict.coffee_id for verdict in verdicts.updated] == [coffees[2].id]
+    assert _published(tracker) == [entry.model_dump() for entry in build_rankings(repository)[None]]
+
+    repository.delete_coffee(coffees[3].id)
+    ranking, verdicts = tracker.update()
+    assert ranking.removed == [coffees[3].id] and len(verdicts.removed) == 1
+    assert {entry.position for entry in ranking.updated} == {1, 2, 3}
+    assert _published(tracker) == [entry.model_dump() for entry in build_rankings(repository)[None]]
+
+
+def test_tracker_follows_tasting_deletes_and_shot_moves_without_a_full_scan(repository, monkeypatch) -> None:
+    rng = random.Random(20240605)
+    labels = ["insipide", "doux", "équilibré", "expressif", "intense"]
+    coffees = [_coffee(repository, name) for name in "ABCDEF"]
+    for _ in range(24):
+        _taste(repository, rng.choice(coffees).id, rng.choice(labels))
+    tracker = RankingTracker(repository)
+    tracker.update()
+    published = {entry["coffee_id"]: entry for entry in _published(tracker)}
+    full_scans = []
+    monkeypatch.setattr(repository, "sensory_aggregates", lambda *args: full_scans.append(args) or {})
+
+    for step in range(24):
+        shots = repository.list_shots()
+        if step % 4 == 0:
+            repository.delete_tasting(rng.choice(repository.list_tastings()).id)
+        elif step % 4 == 1:
+            repository.update_shot(rng.choice(shots).id, _shot_payload(rng.choice(coffees).id))
+        elif step % 4 == 2:
+            _taste(repository, rng.choice(coffees).id, rng.choice(labels))
+        elif step == 11:
+            repository.delete_coffee(coffees.pop().id)
+        else:
+            repository.delete_shot(rng.choice(shots).id)
+        ranking, _ = tracker.update()
+        assert not ranking.full
+        for coffee_id in ranking.removed:
+            del published[coffee_id]
+        published.update((entry.coffee_id, entry.model_dump()) for entry in ranking.updated)
+        expected = [entry.model_dump() for entry in build_rankings(repository)[None]]
+        assert sorted(published.values(), key=lambda entry: entry["position"]) == expected
+        assert _published(tracker) == expected
+    assert full_scans == []
+
+
+def test_live_rankings_fan_out_the_same_frames() -> None:
+    from app.services.repository import Repository
+
+    repository = Repository()
+    coffee = _coffee(repository, "A")
+
+    async def scenario() -> list[list[bytes]]:
+        live = LiveRankings(repository, interval=0.01)
+        subscribers = [await live.subscribe() for _ in range(3)]
+        _taste(repository, coffee.id, "intense")
+        received = []
+        for subscriber in subscribers:
+            frames = [await asyncio.wait_for(subscriber.queue.get(), 1) for _ in range(2)]
+            received.append(frames)
+            live.unsubscribe(subscriber)
+        return received
+
+    received = asyncio.run(scenario())
+    assert received[0] == received[1] == received[2]
+    initial, update = received[0]
+    assert initial.startswith(b"event: ranking\n")
+    events = dict(block.split("\ndata: ") for block in update.decode().strip().split("\n\n"))
+    ranking = json.loads(events["event: ranking"])
+    assert ranking["full"] is False and ranking["updated"][0]["coffee_id"] == str(coffee.id)
+    assert json.loads(events["event: verdicts"])["updated"][0]["coffee_id"] == str(coffee.id)
@@ -0,0 +1,48 @@
+from app.api.metrics import RequestMetrics
+
+COFFEE = {"roaster": "R", "format": "grain", "weight_grams": 250, "price_eur": 12, "purchased_at": "2024-06-01"}
+
+
+def _samples(text: str) -> dict[str, float]:
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line and not line.startswith("#")
+    }
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    metrics = RequestMetrics(buckets=(0.01, 0.1))
+    for seconds in (0.005, 0.01, 0.05, 3.0):
+        metrics.observe("GET", "/api/v1/coffees", 200, seconds)
+
+    samples = _samples(metrics.render())
+
+    series = 'method="GET",route="/api/v1/coffees",status="200"'
+    assert samples[f"barisense_http_requests_total{{{series}}}"] == 4
+    assert samples[f'barisense_http_request_duration_seconds_bucket{{{series},le="0.01"}}'] == 2
+    assert samples[f'barisense_http_request_duration_seconds_bucket{{{series},le="0.1"}}'] == 3
+    assert samples[f'barisense_http_request_duration_seconds_bucket{{{series},le="+Inf"}}'] == 4
+    assert samples[f"barisense_http_request_duration_seconds_sum{{{series}}}"] == 3.065
+
+
+def test_metrics_endpoint_reports_routes_and_repository(client, repository) -> None:
+    before = _samples(client.get("/metrics").text)
+    coffee_id = client.post("/api/v1/coffees", json={"name": "A", **COFFEE}).json()["id"]
+    client.get(f"/api/v1/coffees/{coffee_id}")
+    client.get("/api/v1/analytics")
+    client.get("/api/v1/analytics")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = _samples(response.text)
+    by_id = 'barisense_http_requests_total{method="GET",route="/api/v1/coffees/{coffee_id}",status="200"}'
+    assert samples[by_id] == before.get(by_id, 0) + 1
+    assert samples['barisense_entities{collection="coffees"}'] == 1
+    assert samples['barisense_entities{collection="shots"}'] == 0
+    assert samples["barisense_repository_generation"] == repository.generation
+    assert samples['barisense_analytics_cache_lookups_total{result="hit"}'] == 1
+    assert samples["barisense_analytics_cache_hit_ratio"] == 0.5
+    assert "barisense_threadpool_queued" in samples
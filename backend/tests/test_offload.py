@@ -0,0 +1,105 @@
+import time
+
+import pytest
+
+from app.core.dependencies import get_analytics_cache, get_analytics_executor
+from app.main import app
+from app.models.schemas import CoffeeCreate
+from app.services.cache import AnalyticsCache
+from app.services.offload import AnalyticsExecutor, AnalyticsTimeout, SnapshotDecoder, SnapshotEncoder
+from app.services.repository import Repository
+from tests.test_repository import _coffee, _shot_payload, _tasting
+
+
+def _add_tasted_coffees(repository) -> None:
+    for name, label in (("A", "intense"), ("B", "insipide")):
+        shot = repository.add_shot(_shot_payload(_coffee(repository, name).id))
+        _tasting(repository, shot.id, label)
+
+
+def _coffee_names(snapshot: Repository) -> list[str]:
+    return [coffee.name for coffee in snapshot.list_coffees()]
+
+
+def _sleep(snapshot: Repository, seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def _same_entities(decoded: Repository, snapshot: Repository) -> bool:
+    return (
+        decoded.list_coffees() == snapshot.list_coffees()
+        and decoded.list_shots() == snapshot.list_shots()
+        and decoded.list_tastings() == snapshot.list_tastings()
+        and decoded.sensory_aggregates() == snapshot.sensory_aggregates()
+    )
+
+
+def test_snapshot_round_trips_through_the_offload_encoding(repository) -> None:
+    encoder, decoder = SnapshotEncoder(), SnapshotDecoder()
+    for _ in range(3):
+        _add_tasted_coffees(repository)
+    snapshot = repository.snapshot()
+
+    assert _same_entities(decoder.decode(encoder.encode(snapshot)), snapshot)
+
+    # a few writes later, the worker copy is patched instead of rebuilt
+    previous = decoder.decode(encoder.encode(snapshot))
+    repository.delete_shot(snapshot.list_shots()[0].id)
+    repository.upsert_coffee(
+        CoffeeCreate(name="C", roaster="R", format="grain", weight_grams=250, price_eur=9.0, purchased_at="2024-06-02")
+    )
+    following = repository.snapshot()
+    decoded = decoder.decode(encoder.encode(following))
+
+    assert decoded is previous
+    assert _same_entities(decoded, following)
+
+
+@pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+def test_executor_modes_compute_the_same_result(mode) -> None:
+    repository = Repository()
+    _add_tasted_coffees(repository)
+    executor = AnalyticsExecutor(mode, workers=1, timeout=60)
+    try:
+        assert executor.run(_coffee_names, repository.snapshot()) == ["B", "A"]
+    finally:
+        executor.close()
+
+
+def test_thread_executor_times_out() -> None:
+    executor = AnalyticsExecutor("thread", workers=1, timeout=0.05)
+    try:
+        with pytest.raises(AnalyticsTimeout):
+            executor.run(_sleep, Repository(), 0.5)
+    finally:
+        executor.close()
+
+
+def test_analytics_routes_run_on_the_process_pool(client, repository) -> None:
+    _add_tasted_coffees(repository)
+    paths = ["/api/v1/analytics", "/api/v1/analytics/rankings/global", "/api/v1/dashboard"]
+    inline = [client.get(path).json() for path in paths]
+    executor = AnalyticsExecutor("process", workers=1, timeout=60)
+    app.dependency_overrides[get_analytics_executor] = lambda: executor
+    app.dependency_overrides[get_analytics_cache] = lambda: AnalyticsCache()
+    try:
+        offloaded = [client.get(path) for path in paths]
+    finally:
+        executor.close()
+
+    assert [response.status_code for response in offloaded] == [200, 200, 200]
+    assert [response.json() for response in offloaded] == inline
+
+
+def test_analytics_timeout_is_a_503(client) -> None:
+    executor = AnalyticsExecutor("thread", workers=1, timeout=0.05)
+    app.dependency_overrides[get_analytics_executor] = lambda: executor
+    # the only worker is busy, so the summary cannot start in time
+    executor._executor().submit(time.sleep, 0.5)
+    try:
+        response = client.get("/api/v1/analytics")
+    finally:
+        executor.close()
+
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Calcul analytique trop long, réessayez plus tard"
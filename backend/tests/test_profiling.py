@@ -0,0 +1,44 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.profiling import PROFILE_ID_HEADER, ProfilingMiddleware
+
+
+def _busy_endpoint() -> dict[str, int]:
+    total = 0
+    for value in range(300_000):
+        total += value % 7
+    return {"total": total}
+
+
+def _client(tmp_path) -> TestClient:
+    app = FastAPI()
+    app.get("/busy")(_busy_endpoint)
+    profiled = ProfilingMiddleware(
+        app, directory=str(tmp_path), header="X-Profile", api_key="secret", api_key_header="X-API-Key"
+    )
+    return TestClient(profiled)
+
+
+def test_profiled_request_writes_collapsed_stacks(tmp_path) -> None:
+    response = _client(tmp_path).get("/busy", headers={"X-Profile": "1", "X-API-Key": "secret"})
+
+    assert response.status_code == 200
+    profile_id = response.headers[PROFILE_ID_HEADER]
+    lines = (tmp_path / f"{profile_id}.collapsed").read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    # stacks start at the endpoint, which ran on a pool thread
+    assert stack.split(";")[0].endswith(":_busy_endpoint")
+    assert int(count) > 0
+
+
+def test_requests_without_header_or_key_are_not_profiled(tmp_path) -> None:
+    client = _client(tmp_path)
+
+    plain = client.get("/busy")
+    unauthorized = client.get("/busy", headers={"X-Profile": "1", "X-API-Key": "wrong"})
+
+    assert PROFILE_ID_HEADER not in plain.headers
+    assert PROFILE_ID_HEADER not in unauthorized.headers
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,508 @@
+from collections import defaultdict
+from datetime import date
+from statistics import mean, pstdev
+from uuid import uuid4
+
+import pytest
+
+from app.models.entities import BeverageType, VerdictStatus
+from app.models.schemas import CoffeeCreate, ShotCreate, TastingCreate, VerdictCreate, WaterCreate
+from app.services import columns as columns_module
+from app.services.repository import BulkInsertError, Repository, ShotFilters, TastingFilters, auto_verdict
+from app.services import sqlite_repository as sqlite_module
+from app.services.sqlite_repository import SqliteRepository
+
+
+def _coffee(repository: Repository, name: str):
+    return repository.upsert_coffee(
+        CoffeeCreate(
+            name=name,
+            roaster="Test Roastery",
+            reference=None,
+            format="grain",
+            weight_grams=250,
+            price_eur=14.0,
+            purchased_at=date(2024, 6, 1),
+        )
+    )
+
+
+def _shot_payload(coffee_id, beverage_type: str = "expresso") -> ShotCreate:
+    return ShotCreate(
+        coffee_id=coffee_id,
+        beverage_type=beverage_type,
+        grind_setting="9",
+        dose_in_grams=18,
+        beverage_weight_grams=36,
+        extraction_time_seconds=28,
+    )
+
+
+def _tasting(repository: Repository, shot_id, label: str = "expressif"):
+    return repository.add_tasting(
+        TastingCreate(
+            shot_id=shot_id,
+            acidity_label=label,
+            bitterness_label="doux",
+            body_label=label,
+            aroma_label=label,
+            balance_label="équilibré",
+            finish_label="équilibré",
+            overall_label=label,
+        )
+    )
+
+
+def assert_indexes_consistent(repository) -> None:
+    if not isinstance(repository, Repository):
+        return  # the SQLite backend keeps its indexes in the database
+    shots_by_coffee: dict = defaultdict(set)
+    for shot in repository._shots.values():
+        shots_by_coffee[shot.coffee_id].add(shot.id)
+    tastings_by_shot: dict = defaultdict(set)
+    for tasting in repository._tastings.values():
+        tastings_by_shot[tasting.shot_id].add(tasting.id)
+    verdict_by_coffee = {verdict.coffee_id: verdict.id for verdict in repository._verdicts.values()}
+
+    assert {k: set(v) for k, v in repository._shots_by_coffee.items()} == dict(shots_by_coffee)
+    assert {k: {t.id for t in v} for k, v in repository._tastings_by_shot.items()} == dict(tastings_by_shot)
+    assert repository._verdict_by_coffee == verdict_by_coffee
+
+    for order, items in (
+        (repository._coffee_order, repository._coffees),
+        (repository._water_order, repository._waters),
+        (repository._shot_order, repository._shots),
+        (repository._tasting_order, repository._tastings),
+        (repository._verdict_order, repository._verdicts),
+    ):
+        assert [item.id for item in order._items] == [
+            item.id for item in sorted(items.values(), key=lambda item: (item.created_at, item.id))
+        ]
+        assert all(item is items[item.id] for item in order._items)
+
+    for index, items, values_of in (
+        (repository._shot_fields, repository._shots, lambda shot: shot),
+        (repository._tasting_fields, repository._tastings, lambda tasting: repository._shots[tasting.shot_id]),
+    ):
+        expected: dict = defaultdict(list)
+        for item in sorted(items.values(), key=lambda item: (item.created_at, item.id)):
+            for field in index.fields:
+                value = getattr(values_of(item), "id" if field == "shot_id" else field)
+                if value is not None:
+                    expected[field, value].append(item.id)
+        indexed = {
+            (field, value): [item.id for item in bucket._items]
+            for field, buckets in index._buckets.items()
+            for value, bucket in buckets.items()
+        }
+        assert indexed == dict(expected)
+
+    assert_columns_consistent(repository)
+
+
+def assert_columns_consistent(repository: Repository) -> None:
+    columns = repository.columns
+    shots, tastings = columns.shots, columns.tastings
+    assert set(shots.rows) == set(repository._shots)
+    assert int(shots.live.sum()) == len(shots) == len(repository._shots)
+    for shot in repository._shots.values():
+        row = shots.rows[shot.id]
+        assert shots.live[row]
+        assert shots.column("brew_ratio")[row] == shot.brew_ratio
+        assert shots.column("extraction_time")[row] == shot.extraction_time_seconds
+        assert columns.coffees.ids[shots.column("coffee")[row]] == shot.coffee_id
+        water_code = shots.column("water")[row]
+        assert (columns.waters.ids[water_code] if water_code >= 0 else None) == shot.water_id
+    assert set(tastings.rows) == set(repository._tastings)
+    assert int(tastings.live.sum()) == len(tastings) == len(repository._tastings)
+    sensory_means = columns.sensory_means()
+    for tasting in repository._tastings.values():
+        row = tastings.rows[tasting.id]
+        assert tastings.live[row]
+        assert tastings.column("shot")[row] == shots.rows[tasting.shot_id]
+        assert sensory_means[row] == tasting.sensory_mean
+
+
+def test_indexes_follow_every_write_path(repository) -> None:
+    coffee_a = _coffee(repository, "A")
+    coffee_b = _coffee(repository, "B")
+    shot_1 = repository.add_shot(_shot_payload(coffee_a.id))
+    shot_2 = repository.add_shot(_shot_payload(coffee_a.id, "ristretto"))
+    shot_3 = repository.add_shot(_shot_payload(coffee_b.id))
+    tasting_1 = _tasting(repository, shot_1.id)
+    _tasting(repository, shot_2.id, "intense")
+    _tasting(repository, shot_3.id, "doux")
+    assert_indexes_consistent(repository)
+
+    assert {s.id for s in repository.list_shots_for_coffee(coffee_a.id)} == {shot_1.id, shot_2.id}
+    assert len(repository.tastings_by_coffee(coffee_a.id)) == 2
+    assert repository.tasting_counts() == {coffee_a.id: 2, coffee_b.id: 1}
+
+    # moving a shot to another coffee re-homes its tastings too
+    repository.update_shot(shot_2.id, _shot_payload(coffee_b.id, "ristretto"))
+    assert_indexes_consistent(repository)
+    assert repository.tasting_counts() == {coffee_a.id: 1, coffee_b.id: 2}
+
+    repository.delete_tasting(tasting_1.id)
+    assert_indexes_consistent(repository)
+    assert repository.list_tastings_for_shot(shot_1.id) == []
+
+    manual = repository.upsert_verdict(VerdictCreate(coffee_id=coffee_a.id, status=VerdictStatus.A_EVITER))
+    assert repository.verdict_for_coffee(coffee_a.id).id == manual.id
+    coffee_c = _coffee(repository, "C")
+    repository.upsert_verdict(VerdictCreate(coffee_id=coffee_c.id, status=VerdictStatus.RACHETER), verdict_id=manual.id)
+    assert_indexes_consistent(repository)
+    assert repository.verdict_for_coffee(coffee_a.id) is None
+    assert repository.verdict_for_coffee(coffee_c.id).id == manual.id
+
+    repository.delete_shot(shot_3.id)
+    assert_indexes_consistent(repository)
+    repository.delete_coffee(coffee_b.id)
+    assert_indexes_consistent(repository)
+    assert repository.list_shots_for_coffee(coffee_b.id) == []
+    assert repository.tasting_counts() == {coffee_a.id: 0, coffee_c.id: 0}
+
+
+def test_tasting_reuses_indexed_verdict_for_coffee(repository) -> None:
+    coffee = _coffee(repository, "A")
+    shot = repository.add_shot(_shot_payload(coffee.id))
+    _tasting(repository, shot.id, "intense")
+    _tasting(repository, shot.id, "insipide")
+
+    verdicts = repository.list_verdicts()
+    assert len(verdicts) == 1
+    assert verdicts[0].status == VerdictStatus.A_EVITER
+    assert_indexes_consistent(repository)
+
+
+def test_moving_a_verdict_replaces_the_target_coffee_verdict(repository) -> None:
+    coffee_a = _coffee(repository, "A")
+    coffee_b = _coffee(repository, "B")
+    moved = repository.upsert_verdict(VerdictCreate(coffee_id=coffee_a.id, status=VerdictStatus.RACHETER))
+    replaced = repository.upsert_verdict(VerdictCreate(coffee_id=coffee_b.id, status=VerdictStatus.A_EVITER))
+
+    repository.upsert_verdict(VerdictCreate(coffee_id=coffee_b.id, status=VerdictStatus.RACHETER), verdict_id=moved.id)
+
+    assert [v.id for v in repository.list_verdicts()] == [moved.id]
+    assert repository.get_verdict(replaced.id) is None
+    assert repository.verdict_for_coffee(coffee_a.id) is None
+    assert repository.verdict_for_coffee(coffee_b.id).id == moved.id
+    assert_indexes_consistent(repository)
+
+
+def test_delete_coffees_cascades_only_their_rows(repository) -> None:
+    coffee_a = _coffee(repository, "A")
+    coffee_b = _coffee(repository, "B")
+    coffee_c = _coffee(repository, "C")
+    for coffee in (coffee_a, coffee_b, coffee_c):
+        shot = repository.add_shot(_shot_payload(coffee.id))
+        _tasting(repository, shot.id)
+
+    deleted = repository.delete_coffees([coffee_a.id, coffee_b.id, coffee_a.id])
+
+    assert deleted == [coffee_a.id, coffee_b.id]
+    assert [c.id for c in repository.list_coffees()] == [coffee_c.id]
+    assert {s.coffee_id for s in repository.list_shots()} == {coffee_c.id}
+    assert len(repository.list_tastings()) == 1
+    assert [v.coffee_id for v in repository.list_verdicts()] == [coffee_c.id]
+    assert_indexes_consistent(repository)
+
+
+def test_delete_water_detaches_its_shots(repository) -> None:
+    coffee = _coffee(repository, "A")
+    water = repository.upsert_water(WaterCreate(label="Robinet", source="robinet"))
+    other = repository.upsert_water(WaterCreate(label="Bouteille", source="bouteille"))
+    used = repository.add_shot(_shot_payload(coffee.id).model_copy(update={"water_id": water.id}))
+    _tasting(repository, used.id)
+    kept = repository.add_shot(_shot_payload(coffee.id).model_copy(update={"water_id": other.id}))
+
+    repository.delete_water(water.id)
+
+    assert repository.get_shot(used.id).water_id is None
+    assert repository.get_shot(kept.id).water_id == other.id
+    assert repository.list_shots(filters=ShotFilters(water_id=water.id)) == []
+    assert repository.list_tastings(filters=TastingFilters(water_id=water.id)) == []
+    assert_indexes_consistent(repository)
+
+
+def test_list_shots_keyset_pages_cover_everything_once(repository) -> None:
+    coffee = _coffee(repository, "A")
+    shots = [repository.add_shot(_shot_payload(coffee.id)) for _ in range(7)]
+    expected = sorted(shots, key=lambda s: (s.created_at, s.id), reverse=True)
+
+    seen = []
+    after = None
+    while True:
+        page = repository.list_shots(after=after, limit=3)
+        if not page:
+            break
+        seen.extend(page)
+        after = (page[-1].created_at, page[-1].id)
+
+    assert seen == expected
+    assert repository.list_shots() == expected
+
+
+def test_filtered_listings_match_a_full_scan_across_pages(repository) -> None:
+    coffees = [_coffee(repository, name) for name in "ABC"]
+    waters = [repository.upsert_water(WaterCreate(label=label, source="robinet")) for label in ("Paris", "Lyon")]
+    shots = []
+    for index in range(24):
+        payload = _shot_payload(coffees[index % 3].id, ["expresso", "ristretto"][index % 2])
+        payload.grind_setting = str(index % 4)
+        payload.water_id = waters[index % 2].id if index % 5 else None
+        shots.append(repository.add_shot(payload))
+    for shot in shots[::2]:
+        _tasting(repository, shot.id)
+        _tasting(repository, shot.id, "doux")
+    # moving a shot must move its tastings between buckets as well
+    moved = _shot_payload(coffees[2].id, "cafe_long")
+    moved.water_id = waters[0].id
+    repository.update_shot(shots[0].id, moved)
+    repository.delete_shot(shots[4].id)
+    assert_indexes_consistent(repository)
+
+    middle = sorted(shot.created_at for shot in shots)[8]
+    shots_by_id = {shot.id: shot for shot in repository.list_shots()}
+
+    def matches(filters, shot) -> bool:
+        return all(getattr(shot, field) == value for field, value in filters.equalities().items()) and (
+            filters.created_from is None or shot.created_at >= filters.created_from
+        )
+
+    for filters in (
+        ShotFilters(coffee_id=coffees[0].id),
+        ShotFilters(water_id=waters[0].id, beverage_type=BeverageType.EXPRESSO),
+        ShotFilters(coffee_id=coffees[2].id, grind_setting="0", created_from=middle),
+        ShotFilters(beverage_type=BeverageType.CAFE_LONG),
+        ShotFilters(coffee_id=uuid4()),
+    ):
+        expected = [shot for shot in repository.list_shots() if matches(filters, shot)]
+        assert _all_pages(repository.list_shots, filters) == expected
+
+    for filters in (
+        TastingFilters(shot_id=shots[2].id),
+        TastingFilters(coffee_id=coffees[2].id, water_id=waters[0].id),
+        TastingFilters(beverage_type=BeverageType.RISTRETTO, created_from=middle),
+    ):
+        shot_filters = ShotFilters(**{f: v for f, v in vars(filters).items() if f != "shot_id"})
+        expected = [
+            tasting
+            for tasting in repository.list_tastings()
+            if matches(shot_filters, shots_by_id[tasting.shot_id])
+            and filters.shot_id in (None, tasting.shot_id)
+            and (filters.created_from is None or tasting.created_at >= filters.created_from)
+        ]
+        assert [t.id for t in _all_pages(repository.list_tastings, filters)] == [t.id for t in expected]
+
+    created_to = sorted(shot.created_at for shot in shots_by_id.values())[-3]
+    assert repository.list_shots(filters=ShotFilters(created_to=created_to)) == [
+        shot for shot in repository.list_shots() if shot.created_at < created_to
+    ]
+
+
+def _all_pages(list_items, filters) -> list:
+    seen, after = [], None
+    while page := list_items(after=after, limit=3, filters=filters):
+        seen.extend(page)
+        after = (page[-1].created_at, page[-1].id)
+    return seen
+
+
+def test_sensory_aggregates_track_tastings_and_shot_moves(repository) -> None:
+    coffee_a = _coffee(repository, "A")
+    coffee_b = _coffee(repository, "B")
+    expresso = repository.add_shot(_shot_payload(coffee_a.id))
+    ristretto = repository.add_shot(_shot_payload(coffee_a.id, "ristretto"))
+    other = repository.add_shot(_shot_payload(coffee_b.id))
+    tastings = [
+        _tasting(repository, expresso.id, "intense"),
+        _tasting(repository, expresso.id, "doux"),
+        _tasting(repository, ristretto.id, "expressif"),
+        _tasting(repository, other.id, "insipide"),
+    ]
+    assert repository.sensory_aggregates_consistent()
+
+    means = [t.sensory_mean for t in tastings[:3]]
+    aggregate = repository.sensory_aggregate(coffee_a.id)
+    assert aggregate.count == 3
+    assert aggregate.mean == mean(means)
+    assert abs(aggregate.spread - pstdev(means)) < 1e-9
+    assert repository.sensory_aggregate(coffee_a.id, BeverageType.RISTRETTO).count == 1
+
+    repository.update_shot(ristretto.id, _shot_payload(coffee_b.id, "cafe_long"))
+    assert repository.sensory_aggregates_consistent()
+    assert repository.sensory_aggregate(coffee_a.id, BeverageType.RISTRETTO) is None
+    assert repository.sensory_aggregate(coffee_b.id, BeverageType.CAFE_LONG).count == 1
+
+    repository.delete_tasting(tastings[0].id)
+    repository.delete_shot(other.id)
+    assert repository.sensory_aggregates_consistent()
+    repository.delete_coffee(coffee_a.id)
+    assert repository.sensory_aggregates_consistent()
+    assert set(repository.sensory_aggregates()) == {coffee_b.id}
+
+
+def test_sqlite_repository_persists_and_rolls_back(tmp_path) -> None:
+    path = str(tmp_path / "barisense.db")
+    repository = SqliteRepository(path)
+    coffee = _coffee(repository, "A")
+    shot = repository.add_shot(_shot_payload(coffee.id))
+    _tasting(repository, shot.id)
+    generation = repository.generation
+
+    try:
+        with repository.transaction():
+            _coffee(repository, "B")
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert [c.id for c in repository.list_coffees()] == [coffee.id]
+    assert repository.generation == generation
+    repository.close()
+
+    reopened = SqliteRepository(path)
+    assert reopened.get_shot(shot.id) == shot
+    assert reopened.verdict_for_coffee(coffee.id) is not None
+    assert reopened.sensory_aggregates_consistent()
+    assert reopened.generation == generation
+    reopened.close()
+
+
+def test_add_tastings_refreshes_each_verdict_once(repository) -> None:
+    coffee_a = _coffee(repository, "A")
+    coffee_b = _coffee(repository, "B")
+    shots = repository.add_shots([_shot_payload(coffee_a.id), _shot_payload(coffee_b.id), _shot_payload(coffee_a.id)])
+    labels = ["intense", "doux", "insipide", "expressif"]
+    payloads = [
+        TastingCreate(
+            shot_id=shot.id,
+            acidity_label=label,
+            bitterness_label="doux",
+            body_label=label,
+            aroma_label=label,
+            balance_label="équilibré",
+            finish_label="équilibré",
+            overall_label=label,
+        )
+        for shot, label in zip([shots[0], shots[1], shots[2], shots[1]], labels)
+    ]
+    tastings = repository.add_tastings(payloads)
+
+    # the verdict follows each coffee's last tasting, as with one add_tasting per item
+    expected = {
+        coffee_a.id: auto_verdict(coffee_a.id, tastings[2].sensory_mean),
+        coffee_b.id: auto_verdict(coffee_b.id, tastings[3].sensory_mean),
+    }
+    assert {v.coffee_id: (v.status, v.rationale) for v in repository.list_verdicts()} == {
+        coffee_id: (verdict.status, verdict.rationale) for coffee_id, verdict in expected.items()
+    }
+    assert repository.sensory_aggregates_consistent()
+    assert len(repository.list_tastings()) == 4
+    assert_indexes_consistent(repository)
+
+
+def test_add_shots_rejects_whole_batch_on_bad_reference(repository) -> None:
+    coffee = _coffee(repository, "A")
+    generation = repository.generation
+    with pytest.raises(BulkInsertError) as err:
+        repository.add_shots([_shot_payload(coffee.id), _shot_payload(uuid4())])
+    assert err.value.errors == {1: "coffee_not_found"}
+    assert repository.list_shots() == []
+    assert repository.generation == generation
+
+
+def test_columns_tombstone_deletes_and_compact_without_losing_rows(monkeypatch) -> None:
+    monkeypatch.setattr(columns_module, "COMPACT_MIN_DEAD", 4)
+    repository = Repository()
+    coffee_a = _coffee(repository, "A")
+    coffee_b = _coffee(repository, "B")
+    shots = repository.add_shots([_shot_payload(coffee_a.id) for _ in range(6)])
+    kept = repository.add_shot(_shot_payload(coffee_b.id, "ristretto"))
+    for shot in shots[:4]:
+        _tasting(repository, shot.id)
+    _tasting(repository, kept.id)
+
+    repository.delete_shot(shots[0].id)
+    assert repository.columns.shots.dead == 1
+    assert_indexes_consistent(repository)
+
+    repository.delete_coffee(coffee_a.id)
+
+    # most rows were dead: both tables were compacted and tastings re-pointed at their shot
+    assert repository.columns.shots.size == repository.columns.shots.rows[kept.id] + 1 == 1
+    assert repository.columns.tastings.dead == 0
+    assert_indexes_consistent(repository)
+    repository.update_shot(kept.id, _shot_payload(coffee_b.id, "expresso"))
+    assert_indexes_consistent(repository)
+    assert_indexes_consistent(repository.snapshot())
+
+
+def _apply(local: dict, changes) -> None:
+    if changes.full:
+        local.clear()
+    for kind, entities in changes.upserts.items():
+        local.update({(kind, entity.id): entity for entity in entities})
+    for kind, ids in changes.deleted.items():
+        for entity_id in ids:
+            local.pop((kind, entity_id), None)
+
+
+def _everything(repository) -> dict:
+    return {
+        (kind, entity.id): entity
+        for kind, entities in (
+            ("coffees", repository.list_coffees()),
+            ("waters", repository.list_waters()),
+            ("shots", repository.list_shots()),
+            ("tastings", repository.list_tastings()),
+            ("verdicts", repository.list_verdicts()),
+        )
+        for entity in entities
+    }
+
+
+def test_changes_since_replays_writes_and_cascaded_deletes(repository) -> None:
+    local: dict = {}
+    first = repository.changes_since(None)
+    _apply(local, first)
+    assert first.full and local == {}
+
+    coffee_a = _coffee(repository, "A")
+    coffee_b = _coffee(repository, "B")
+    shots = [repository.add_shot(_shot_payload(coffee.id)) for coffee in (coffee_a, coffee_a, coffee_b)]
+    for shot in shots:
+        _tasting(repository, shot.id)
+    changes = repository.changes_since(first.version, first.epoch)
+    assert not changes.full
+    assert len(changes.upserts["verdicts"]) == 2  # one entry per verdict despite repeated refreshes
+    _apply(local, changes)
+    assert local == _everything(repository)
+
+    version = changes.version
+    repository.update_shot(shots[2].id, _shot_payload(coffee_b.id, "ristretto"))
+    repository.delete_coffee(coffee_a.id)
+    changes = repository.changes_since(version, first.epoch)
+    assert [shot.id for shot in changes.upserts["shots"]] == [shots[2].id]
+    assert set(changes.deleted["shots"]) == {shots[0].id, shots[1].id}
+    assert len(changes.deleted["tastings"]) == 2 and len(changes.deleted["verdicts"]) == 1
+    _apply(local, changes)
+    assert local == _everything(repository)
+
+    unchanged = repository.changes_since(changes.version, first.epoch)
+    assert not unchanged.full and not any(unchanged.upserts.values()) and not any(unchanged.deleted.values())
+    assert repository.changes_since(version, first.epoch + 1).full
+    assert repository.changes_since(changes.version + 1, first.epoch).full
+
+
+def test_change_log_capacity_forces_a_full_sync(repository, monkeypatch) -> None:
+    monkeypatch.setattr(sqlite_module, "PRUNE_EVERY", 1)
+    repository.limit_changes(3)
+    coffee = _coffee(repository, "A")
+    start = repository.changes_since(None).version
+    for _ in range(5):
+        repository.add_shot(_shot_payload(coffee.id))
+
+    assert repository.changes_since(start).full
+    recent = repository.changes_since(repository.generation - 2)
+    assert not recent.full and len(recent.upserts["shots"]) == 2
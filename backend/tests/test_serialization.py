@@ -0,0 +1,166 @@
+import pytest
+
+from app.api.routes.dashboard import build_dashboard
+from app.core.config import get_settings
+from app.core.dependencies import get_analytics_cache
+from app.main import app
+from app.models.schemas import DashboardSection
+from app.services.cache import AnalyticsCache
+
+API = "/api/v1"
+LIST_ROUTES = ["/coffees", "/waters", "/shots", "/tastings", "/verdicts"]
+ANALYTICS_ROUTES = [
+    "/analytics",
+    "/analytics/rankings/global",
+    "/analytics/rankings/ristretto",
+    "/analytics/quality-price",
+    "/analytics/stability",
+    "/analytics/retest",
+]
+LABELS = ["insipide", "doux", "équilibré", "expressif", "intense"]
+
+
+def _seed(client) -> None:
+    water = client.post(
+        f"{API}/waters",
+        json={"label": "Volvic", "source": "bouteille", "brand": "Volvic", "mineralization_ppm": 130.5},
+    ).json()
+    client.post(f"{API}/waters", json={"label": "Robinet", "source": "robinet", "brand": None})
+    for index in range(4):
+        coffee = client.post(
+            f"{API}/coffees",
+            json={
+                "name": f"Éthiopie Guji n°{index}",
+                "roaster": "Brûlerie",
+                "reference": None,
+                "format": "grain",
+                "weight_grams": 250,
+                "price_eur": 14.9,
+                "purchased_at": "2024-06-01",
+            },
+        ).json()
+        if index == 3:
+            break  # left untasted, so /analytics/retest has a row
+        for shot_index, beverage in enumerate(["ristretto", "expresso", "cafe_long"]):
+            shot = client.post(
+                f"{API}/shots",
+                json={
+                    "coffee_id": coffee["id"],
+                    "beverage_type": beverage,
+                    "grind_setting": "7.5",
+                    "dose_in_grams": 18.2,
+                    "beverage_weight_grams": 31 + 7 * shot_index + index,
+                    "extraction_time_seconds": 27.5,
+                    "water_id": water["id"] if shot_index else None,
+                    "notes": "crème épaisse" if index else None,
+                },
+            ).json()
+            client.post(
+                f"{API}/tastings",
+                json={
+                    "shot_id": shot["id"],
+                    "comments": "notes d'agrumes" if shot_index else None,
+                    **{
+                        f"{axis}_label": LABELS[(index + shot_index + offset) % 5]
+                        for offset, axis in enumerate(
+                            ["acidity", "bitterness", "body", "aroma", "balance", "finish", "overall"]
+                        )
+                    },
+                },
+            )
+
+
+def _fetch(client, monkeypatch, fast: bool, path: str, params: dict | None = None):
+    monkeypatch.setenv("BARISENSE_FAST_SERIALIZATION", "true" if fast else "false")
+    get_settings.cache_clear()
+    return client.get(f"{API}{path}", params=params)
+
+
+@pytest.mark.parametrize("path", LIST_ROUTES + ANALYTICS_ROUTES)
+def test_fast_serialization_sends_identical_bytes(client, monkeypatch, path) -> None:
+    _seed(client)
+
+    default = _fetch(client, monkeypatch, False, path)
+    fast = _fetch(client, monkeypatch, True, path)
+
+    assert default.status_code == fast.status_code == 200
+    assert fast.content == default.content
+    assert fast.headers["content-type"] == default.headers["content-type"]
+    assert fast.headers.get("etag") == default.headers.get("etag")
+
+
+def test_fast_serialization_keeps_cursor_and_not_modified(client, monkeypatch) -> None:
+    _seed(client)
+
+    default = _fetch(client, monkeypatch, False, "/shots", {"limit": 4})
+    fast = _fetch(client, monkeypatch, True, "/shots", {"limit": 4})
+    assert fast.content == default.content
+    assert fast.headers["x-next-cursor"] == default.headers["x-next-cursor"]
+
+    etag = _fetch(client, monkeypatch, True, "/analytics/stability").headers["etag"]
+    not_modified = client.get(f"{API}/analytics/stability", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+
+
+def test_dashboard_matches_the_individual_routes(client, monkeypatch) -> None:
+    _seed(client)
+
+    for fast in (False, True):
+        dashboard = _fetch(client, monkeypatch, fast, "/dashboard", {"recent": 4}).json()
+        assert dashboard["coffees"] == client.get(f"{API}/coffees").json()
+        assert dashboard["shots"] == client.get(f"{API}/shots", params={"limit": 4}).json()
+        assert dashboard["tastings"] == client.get(f"{API}/tastings", params={"limit": 4}).json()
+        assert dashboard["summary"] == client.get(f"{API}/analytics").json()
+        assert dashboard["rankings"]["global"] == client.get(f"{API}/analytics/rankings/global").json()
+        assert dashboard["rankings"]["ristretto"] == client.get(f"{API}/analytics/rankings/ristretto").json()
+        for section, path in (("quality_price", "/analytics/quality-price"), ("retest", "/analytics/retest")):
+            assert dashboard[section] == client.get(f"{API}{path}").json()
+
+    partial = client.get(f"{API}/dashboard", params={"sections": ["stability", "waters"]})
+    assert partial.json()["stability"] == client.get(f"{API}/analytics/stability").json()
+    assert len(partial.json()["waters"]) == 2
+    assert partial.json()["coffees"] is None and partial.json()["summary"] is None
+    not_modified = client.get(partial.url, headers={"If-None-Match": partial.headers["etag"]})
+    assert not_modified.status_code == 304
+
+
+def test_dashboard_builds_and_caches_only_the_requested_sections(client) -> None:
+    _seed(client)
+    cache = AnalyticsCache()
+    app.dependency_overrides[get_analytics_cache] = lambda: cache
+    params = {"sections": ["summary", "coffees"], "recent": 2}
+
+    partial = client.get(f"{API}/dashboard", params=params).json()
+    full = client.get(f"{API}/dashboard", params={"recent": 2}).json()
+    assert client.get(f"{API}/dashboard", params=params).json() == partial
+
+    assert {section for section, value in partial.items() if value is not None} == {"summary", "coffees"}
+    assert partial["summary"] == full["summary"] and partial["coffees"] == full["coffees"]
+    assert all(value is not None for value in full.values())
+    assert full["shots"] == client.get(f"{API}/shots", params={"limit": 2}).json()
+    assert full["tastings"] == client.get(f"{API}/tastings", params={"limit": 2}).json()
+    assert (cache.misses, cache.hits) == (2, 1)
+    assert set(cache._entries) == {
+        ("dashboard", frozenset({DashboardSection.SUMMARY, DashboardSection.COFFEES}), 2),
+        ("dashboard", frozenset(DashboardSection), 2),
+    }
+
+
+
+def test_dashboard_sections_share_the_snapshot_listings_and_aggregates(client, repository, monkeypatch) -> None:
+    _seed(client)
+    snapshot = repository.snapshot()
+    calls = []
+
+    def counted(name):
+        method = getattr(snapshot, name)
+        return lambda *args: calls.append((name, args)) or method(*args)
+
+    for name in ("list_coffees", "list_waters", "sensory_aggregates"):
+        monkeypatch.setattr(snapshot, name, counted(name))
+
+    dashboard = build_dashboard(snapshot, frozenset(DashboardSection), 2)
+    assert dashboard.summary is not None and dashboard.rankings is not None
+    assert calls.count(("list_coffees", ())) == 1
+    assert calls.count(("list_waters", ())) == 1
+    assert calls.count(("sensory_aggregates", ())) == 1
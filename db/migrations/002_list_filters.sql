@@ -0,0 +1,9 @@
+-- Barisense - index des listes filtrées de shots et de dégustations
+-- Chaque filtre d'égalité (café, eau, type de boisson, mouture, shot) est suivi de
+-- (created_at, id) : la page la plus récente se lit dans l'index, sans tri.
+
+CREATE INDEX IF NOT EXISTS idx_shots_coffee_created ON shots(coffee_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_shots_water_created ON shots(water_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_shots_beverage_created ON shots(beverage_type, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_shots_grind_created ON shots(grind_setting, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tastings_shot_created ON tastings(shot_id, created_at, id);